@@ -5,6 +5,7 @@ import random
 import sys
 import os
 from typing import Dict, List, Tuple, Set
+from search_stats import SearchStats, SessionStats
 
 # Initialize pygame
 pygame.init()
@@ -201,6 +202,11 @@ class LabyrinthGame:
         self.location_visits = {}
         self.hint_effectiveness = {}
 
+        # Per-session search histograms, written to LUMOS_SEARCH_STATS (.json or .csv) on quit
+        self.search_stats = SessionStats()
+        self.search_stats_path = os.environ.get("LUMOS_SEARCH_STATS")
+        self.last_search_stats = None
+
         # Game screens
         self.current_screen = "main_menu"  # main_menu, game, puzzle, boss, encounter, game_over, win
         self.current_message = ""
@@ -645,15 +651,20 @@ class LabyrinthGame:
         """A* search for finding optimal hints"""
         frontier = []
         explored = set()
+        stats = SearchStats("hint", "astar", {"location": initial_state.get("location")})
+        self.last_search_stats = stats
 
         # Initialize with starting node
         initial_node = HintNode(state=initial_state, path_cost=0, heuristic=heuristic(initial_state))
         heapq.heappush(frontier, initial_node)
+        stats.nodes_generated = 1
+        stats.frontier(1)
 
         while frontier:
             node = heapq.heappop(frontier)
 
             if goal_test(node.state):
+                self.search_stats.add(stats.finish("goal"))
                 # Reconstruct path
                 path = []
                 while node.parent:
@@ -664,10 +675,18 @@ class LabyrinthGame:
             # Add to explored set
             state_hash = str(sorted(node.state.items()))
             if state_hash in explored:
+                stats.duplicate_pops += 1
                 continue
             explored.add(state_hash)
 
             # Expand node
+            stats.nodes_expanded += 1
+            depth = 0
+            parent = node.parent
+            while parent:
+                depth += 1
+                parent = parent.parent
+            stats.depth(depth)
             for hint, cost in self.generate_hints(node.state):
                 new_state = self.apply_hint(node.state.copy(), hint)
                 child = HintNode(
@@ -678,7 +697,10 @@ class LabyrinthGame:
                     heuristic=heuristic(new_state)
                 )
                 heapq.heappush(frontier, child)
+                stats.nodes_generated += 1
+            stats.frontier(len(frontier))
 
+        self.search_stats.add(stats.finish("exhausted"))
         return ["Consider the puzzle carefully..."]  # Fallback
 
     def get_optimal_hint(self):
@@ -1420,6 +1442,8 @@ class LabyrinthGame:
             pygame.display.flip()
             self.clock.tick(FPS)
 
+        if self.search_stats_path:
+            self.search_stats.dump(self.search_stats_path)
         pygame.quit()
         sys.exit()
 
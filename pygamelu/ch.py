@@ -0,0 +1,395 @@
+import hashlib
+import heapq
+import math
+import os
+import random
+import struct
+import sys
+import time
+from array import array
+from typing import Dict, List, Optional, Set, Tuple
+from pathfinding import TravelCost
+from search_stats import SearchStats
+
+# File layout (little endian):
+#   header   magic, graph signature, cost signature, room count, edge counts, name pool size
+#   names    utf-8 room names separated by NUL
+#   rank     int32 contraction order of each room
+#   upward   CSR of edges to higher-ranked rooms: int32 offsets, targets, middles; float64 weights
+#   downward CSR of edges from higher-ranked rooms, indexed by their lower end
+# A middle of -1 marks an original corridor; otherwise the edge is a shortcut
+# through that room and unpacks into two edges.
+MAGIC = b"LCH1"
+HEADER = struct.Struct("<4s8s8sIIII")
+SETTLE_LIMIT = 60  # Witness searches give up after this many rooms
+HIERARCHY_DIR = os.path.dirname(os.path.abspath(__file__))  # Where build_hierarchy writes by default
+
+
+def graph_signature(labyrinth) -> bytes:
+    """Hash of the corridors, locks and hazards that decide edge weights"""
+    digest = hashlib.blake2b(digest_size=8)
+    for name, node in labyrinth.items():
+        digest.update(repr((name, tuple(node.neighbors), tuple(node.required_items),
+                            sorted(node.hazards.items()))).encode("utf-8"))
+    return digest.digest()
+
+
+def route_items(labyrinth, protection_items) -> Set[str]:
+    """Items whose possession changes some weight: door items and protection"""
+    relevant = set(protection_items)
+    for node in labyrinth.values():
+        relevant.update(node.required_items)
+    return relevant
+
+
+def held_signature(inventory, relevant: Set[str]) -> bytes:
+    """cost_signature from route_items worked out beforehand; O(inventory)"""
+    held = sorted(item for item in set(inventory) if item in relevant)
+    return hashlib.blake2b(repr(held).encode("utf-8"), digest_size=8).digest()
+
+
+def cost_signature(labyrinth, inventory, protection_items) -> bytes:
+    """Hash of the held items that change weights: door items and protection"""
+    return held_signature(inventory, route_items(labyrinth, protection_items))
+
+
+def hierarchy_path(graph_sig: bytes, cost_sig: bytes) -> str:
+    return os.path.join(HIERARCHY_DIR, f"routes_{graph_sig.hex()}_{cost_sig.hex()}.lch")
+
+
+
+class ContractionHierarchy:
+    """Shortest-path queries on a preprocessed, static labyrinth.
+
+    Rooms are contracted one at a time, cheapest first, adding
+    a shortcut u -> w through v whenever no witness path avoids v. A query
+    runs Dijkstra upward from both ends and meets at the highest room of
+    the shortest path, so it touches a few hundred rooms instead of a ball
+    around the start. Weights are fixed at build time, so a hierarchy only
+    answers for inventories with the same cost_signature.
+    """
+    def __init__(self, names: List[str], rank, up, down, graph_sig: bytes = b"", cost_sig: bytes = b""):
+        self.names = names
+        self.ids = {name: i for i, name in enumerate(names)}
+        self.rank = rank
+        self.up = up      # (offsets, targets, weights, middles) of edges u -> higher w
+        self.down = down  # (offsets, sources, weights, middles) of edges higher u -> w, indexed by w
+        self.graph_sig = graph_sig
+        self.cost_sig = cost_sig
+
+    @classmethod
+    def build(cls, labyrinth, travel_cost, settle_limit: int = SETTLE_LIMIT) -> "ContractionHierarchy":
+        names = list(labyrinth)
+        ids = {name: i for i, name in enumerate(names)}
+        count = len(names)
+        out: List[Dict[int, float]] = [{} for _ in range(count)]
+        into: List[Dict[int, float]] = [{} for _ in range(count)]
+        for u, node in enumerate(labyrinth.values()):
+            for neighbor, cost in node.neighbors:
+                w = ids[neighbor]
+                weight = travel_cost(neighbor, cost)
+                if w != u and weight < out[u].get(w, math.inf):
+                    out[u][w] = into[w][u] = weight
+        middle: Dict[Tuple[int, int], int] = {}
+
+        def witness_distances(source, skip, limit):
+            dist = {source: 0}
+            frontier = [(0, source)]
+            settled = 0
+            while frontier:
+                d, room = heapq.heappop(frontier)
+                if d > dist[room]:
+                    continue
+                settled += 1
+                if d > limit or settled > settle_limit:
+                    break  # Tentative distances left are still real path lengths
+                for neighbor, weight in out[room].items():
+                    if neighbor != skip and d + weight < dist.get(neighbor, math.inf):
+                        dist[neighbor] = d + weight
+                        heapq.heappush(frontier, (d + weight, neighbor))
+            return dist
+
+        def shortcuts(v):
+            needed = []
+            if not into[v] or not out[v]:
+                return needed
+            max_out = max(out[v].values())
+            for u, to_v in into[v].items():
+                dist = witness_distances(u, v, to_v + max_out)
+                for w, from_v in out[v].items():
+                    if w != u and dist.get(w, math.inf) > to_v + from_v:
+                        needed.append((u, w, to_v + from_v))
+            return needed
+
+        deleted_neighbors = [0] * count
+        level = [0] * count  # Longest chain of contracted rooms below each room
+
+        def priority(v, needed):
+            # Edge difference, spread over the map, kept shallow
+            return len(needed) - len(into[v]) - len(out[v]) + deleted_neighbors[v] + level[v]
+
+        priorities = [priority(v, shortcuts(v)) for v in range(count)]
+        queue = [(p, v) for v, p in enumerate(priorities)]
+        heapq.heapify(queue)
+        contracted = [False] * count
+        rank = array("i", [0] * count)
+        up_edges: List[List[Tuple[int, float, int]]] = [[] for _ in range(count)]
+        down_edges: List[List[Tuple[int, float, int]]] = [[] for _ in range(count)]
+        order = 0
+        while queue:
+            queued, v = heapq.heappop(queue)
+            if contracted[v] or queued != priorities[v]:
+                continue  # Superseded by a later push
+            needed = shortcuts(v)
+            # Lazy update: contract only if v is still the cheapest choice
+            current = priority(v, needed)
+            if queue and current > queue[0][0]:
+                priorities[v] = current
+                heapq.heappush(queue, (current, v))
+                continue
+            contracted[v] = True
+            neighbors = set(into[v]) | set(out[v])
+
+            rank[v] = order
+            order += 1
+            up_edges[v] = [(w, weight, middle.get((v, w), -1)) for w, weight in out[v].items()]
+            down_edges[v] = [(u, weight, middle.get((u, v), -1)) for u, weight in into[v].items()]
+            for u in into[v]:
+                del out[u][v]
+            for w in out[v]:
+                del into[w][v]
+            for u, w, weight in needed:
+                if weight < out[u].get(w, math.inf):
+                    out[u][w] = into[w][u] = weight
+                    middle[u, w] = v
+            out[v] = {}
+            into[v] = {}
+            for x in neighbors:
+                deleted_neighbors[x] += 1
+                level[x] = max(level[x], level[v] + 1)
+
+        return cls(names, rank, pack_edges(up_edges), pack_edges(down_edges))
+
+    def query(self, start: str, goal: str,
+              stats: Optional[SearchStats] = None) -> Tuple[float, List[str]]:
+        """(cost, "Move to X" actions) of the shortest route; (inf, []) if there is none"""
+        stats = stats or SearchStats("path", "ch", {"start": start, "goal": goal})
+        source, target = self.ids[start], self.ids[goal]
+        if source == target:
+            stats.finish("goal")
+            return 0.0, []
+        searches = [(self.up, {source: 0}, {source: -1}, [(0, source)]),
+                    (self.down, {target: 0}, {target: -1}, [(0, target)])]
+        stats.nodes_generated = 2
+        stats.frontier(2)
+        best, meeting = math.inf, -1
+        active = [True, True]
+        while active[0] or active[1]:
+            for side in (0, 1):
+                if not active[side]:
+                    continue
+                (offsets, ends, weights, _), dist, parent, frontier = searches[side]
+                if not frontier or frontier[0][0] >= best:
+                    active[side] = False
+                    continue
+                d, room = heapq.heappop(frontier)
+                if d > dist[room]:
+                    stats.duplicate_pops += 1
+                    continue
+                stats.nodes_expanded += 1
+                other = searches[1 - side][1]
+                if room in other and d + other[room] < best:
+                    best, meeting = d + other[room], room
+                for edge in range(offsets[room], offsets[room + 1]):
+                    neighbor = ends[edge]
+                    next_d = d + weights[edge]
+                    if next_d < dist.get(neighbor, math.inf):
+                        dist[neighbor] = next_d
+                        parent[neighbor] = room
+                        heapq.heappush(frontier, (next_d, neighbor))
+                        stats.nodes_generated += 1
+                stats.frontier(len(searches[0][3]) + len(searches[1][3]))
+        if meeting < 0:
+            stats.finish("exhausted")
+            return math.inf, []
+
+        rooms = [meeting]
+        forward, backward = searches[0][2], searches[1][2]
+        while forward[rooms[-1]] >= 0:
+            rooms.append(forward[rooms[-1]])
+        rooms.reverse()
+        while backward[rooms[-1]] >= 0:
+            rooms.append(backward[rooms[-1]])
+
+        path = []
+        for u, w in zip(rooms, rooms[1:]):
+            self.unpack(u, w, path)
+        stats.depth(len(path))
+        stats.finish("goal")
+        return best, [f"Move to {self.names[room]}" for room in path]
+
+    def route(self, start: str, goal: str, stats: Optional[SearchStats] = None) -> List[str]:
+        return self.query(start, goal, stats)[1]
+
+    def edge_middle(self, u: int, w: int) -> int:
+        """Middle room of the hierarchy edge u -> w (-1 for a corridor)"""
+        if self.rank[u] < self.rank[w]:
+            offsets, ends, _, middles = self.up
+            room, other = u, w
+        else:
+            offsets, ends, _, middles = self.down
+            room, other = w, u
+        for edge in range(offsets[room], offsets[room + 1]):
+            if ends[edge] == other:
+                return middles[edge]
+        raise KeyError(f"No hierarchy edge {self.names[u]} -> {self.names[w]}")
+
+    def unpack(self, u: int, w: int, path: List[int]) -> None:
+        """Append the corridor rooms after u along edge u -> w"""
+        stack = [(u, w)]
+        while stack:
+            u, w = stack.pop()
+            via = self.edge_middle(u, w)
+            if via < 0:
+                path.append(w)
+            else:
+                stack.append((via, w))
+                stack.append((u, via))
+
+    @property
+    def shortcut_count(self) -> int:
+        return sum(1 for middle in self.up[3] if middle >= 0) + sum(1 for middle in self.down[3] if middle >= 0)
+
+    def save(self, path: str) -> None:
+        pool = "\0".join(self.names).encode("utf-8")
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, self.graph_sig, self.cost_sig, len(self.names),
+                                len(self.up[1]), len(self.down[1]), len(pool)))
+            f.write(pool)
+            for data in (self.rank, *self.up, *self.down):
+                little_endian(data).tofile(f)
+
+    @classmethod
+    def load(cls, path: str) -> "ContractionHierarchy":
+        with open(path, "rb") as f:
+            magic, graph_sig, cost_sig, count, up_count, down_count, pool_size = HEADER.unpack(f.read(HEADER.size))
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a route hierarchy")
+            names = f.read(pool_size).decode("utf-8").split("\0") if count else []
+
+            def read(typecode, length):
+                data = array(typecode)
+                data.fromfile(f, length)
+                return little_endian(data)
+
+            rank = read("i", count)
+            up = (read("i", count + 1), read("i", up_count), read("d", up_count), read("i", up_count))
+            down = (read("i", count + 1), read("i", down_count), read("d", down_count), read("i", down_count))
+        return cls(names, rank, up, down, graph_sig, cost_sig)
+
+    @classmethod
+    def load_for(cls, labyrinth, inventory, protection_items, path: str = None,
+                 relevant: Optional[Set[str]] = None) -> Optional["ContractionHierarchy"]:
+        """Load the hierarchy built for this labyrinth and inventory, or None.
+
+        Each signature is worked out once, and the graph is only hashed if
+        a file for this inventory's cost signature exists. Pass relevant
+        (route_items) if the caller already has it.
+        """
+        if path is not None and not os.path.exists(path):
+            return None
+        if relevant is None:
+            relevant = route_items(labyrinth, protection_items)
+        cost_sig = held_signature(inventory, relevant)
+        suffix = f"_{cost_sig.hex()}.lch"
+        if path is None and not any(name.startswith("routes_") and name.endswith(suffix)
+                                    for name in os.listdir(HIERARCHY_DIR)):
+            return None
+        graph_sig = graph_signature(labyrinth)
+        path = path or hierarchy_path(graph_sig, cost_sig)
+        if not os.path.exists(path):
+            return None
+        try:
+            hierarchy = cls.load(path)
+        except (ValueError, EOFError, struct.error):
+            return None
+        if hierarchy.graph_sig != graph_sig or hierarchy.cost_sig != cost_sig:
+            return None
+        return hierarchy
+
+
+def pack_edges(edges: List[List[Tuple[int, float, int]]]):
+    offsets = array("i", [0])
+    ends, weights, middles = array("i"), array("d"), array("i")
+    for room_edges in edges:
+        for end, weight, middle in room_edges:
+            ends.append(end)
+            weights.append(weight)
+            middles.append(middle)
+        offsets.append(len(ends))
+    return offsets, ends, weights, middles
+
+
+def little_endian(data: array) -> array:
+    if sys.byteorder != "little":
+        data = array(data.typecode, data)
+        data.byteswap()
+    return data
+
+
+def build_hierarchy(labyrinth, inventory, protection_items, path: str = None) -> Dict:
+    """Preprocess the labyrinth for one inventory and write it next to the module"""
+    graph_sig = graph_signature(labyrinth)
+    cost_sig = cost_signature(labyrinth, inventory, protection_items)
+    path = path or hierarchy_path(graph_sig, cost_sig)
+    started = time.perf_counter()
+    hierarchy = ContractionHierarchy.build(labyrinth, TravelCost(labyrinth, inventory, protection_items))
+    hierarchy.graph_sig = graph_sig
+    hierarchy.cost_sig = cost_sig
+    build_seconds = time.perf_counter() - started
+    hierarchy.save(path)
+    return {
+        "path": path,
+        "rooms": len(hierarchy.names),
+        "edges": sum(len(node.neighbors) for node in labyrinth.values()),
+        "shortcuts": hierarchy.shortcut_count,
+        "bytes": os.path.getsize(path),
+        "build_seconds": build_seconds,
+        "hierarchy": hierarchy
+    }
+
+
+if __name__ == "__main__":
+    # Build and benchmark: python ch.py [rooms]
+    from explorer import Node
+    from pathfinding import a_star_path, grid_labyrinth, path_cost
+
+    rooms = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    side = math.isqrt(rooms)
+    labyrinth = grid_labyrinth(side, Node, asymmetric=True)
+    protection_items = {"Shield": 50, "Magic Amulet": 75}
+    stats = build_hierarchy(labyrinth, [], protection_items)
+    started = time.perf_counter()
+    hierarchy = ContractionHierarchy.load_for(labyrinth, [], protection_items)
+    load_seconds = time.perf_counter() - started
+    print(f"{stats['rooms']} rooms, {stats['edges']} edges -> {stats['shortcuts']} shortcuts")
+    print(f"  preprocessing: {stats['build_seconds']:.1f}s, file {stats['bytes']} bytes, load {load_seconds:.2f}s")
+
+    travel_cost = TravelCost(labyrinth, [], protection_items)
+    rng = random.Random(0)
+    pairs = [(f"R{rng.randrange(side)}_{rng.randrange(side)}", f"R{rng.randrange(side)}_{rng.randrange(side)}")
+             for _ in range(20)]
+    dijkstra_seconds = query_seconds = 0.0
+    same = True
+    for start, goal in pairs:
+        started = time.perf_counter()
+        expected = a_star_path(labyrinth, start, goal, travel_cost, cost_per_distance=0.0)
+        dijkstra_seconds += time.perf_counter() - started
+        started = time.perf_counter()
+        cost, path = hierarchy.query(start, goal)
+        query_seconds += time.perf_counter() - started
+        same &= math.isclose(cost, path_cost(labyrinth, start, path, travel_cost))
+        same &= math.isclose(cost, path_cost(labyrinth, start, expected, travel_cost))
+    print(f"  dijkstra: {dijkstra_seconds / len(pairs) * 1e3:.1f} ms/query")
+    print(f"  hierarchy: {query_seconds / len(pairs) * 1e3:.2f} ms/query "
+          f"({dijkstra_seconds / query_seconds:.0f}x faster, same costs: {same})")
\ No newline at end of file
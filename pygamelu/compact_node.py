@@ -0,0 +1,193 @@
+import sys
+import time
+import tracemalloc
+from types import MappingProxyType
+from typing import Dict, List, Optional, Tuple
+
+# Flag bits
+VISITED = 1
+LOCKED = 2
+
+# Substring of the room name -> map colour; engine.py's Node uses the same table
+NAME_COLORS = [("Ancient", (255, 165, 0)), ("Crystal", (100, 149, 237)), ("Shadow", (72, 61, 139)),
+               ("Elemental", (0, 255, 0)), ("Time", (128, 0, 128))]
+DEFAULT_COLOR = (0, 0, 255)
+EMPTY = MappingProxyType({})  # Stands in for an absent puzzle, boss, hazards or puzzles dict
+
+
+class NodeTable:
+    """Interned room names and their integer ids, shared by the CompactNodes of one labyrinth"""
+    def __init__(self):
+        self.names: List[str] = []
+        self.ids: Dict[str, int] = {}
+        self.nodes: List[Optional["CompactNode"]] = []  # By id; None until the room itself is built
+
+    def id_of(self, name: str) -> int:
+        room = self.ids.get(name)
+        if room is None:
+            room = self.ids[name] = len(self.names)
+            self.names.append(sys.intern(name))
+            self.nodes.append(None)
+        return room
+
+    def node(self, name, description, neighbors, puzzle=None, items=None, boss=None, required_items=None,
+             hazards=None, puzzles=None, position=(0, 0)) -> "CompactNode":
+        """Build a room; takes the arguments of either Node flavour, so it can stand in for the class"""
+        node = CompactNode(self, name, description, neighbors, puzzle, items, boss, required_items,
+                           hazards, puzzles, position)
+        self.nodes[node.id] = node
+        return node
+
+
+class CompactNode:
+    """A room in __slots__, with an integer id and neighbours as (id, cost) tuples.
+
+    Names and descriptions are interned, empty lists share one empty tuple,
+    visited and locked are bits of flags, and the rarely set puzzle, boss,
+    hazards, puzzles and puzzle_solved live in one optional dict. Properties
+    give back the attributes of engine.py's and u.py's Node, so existing code
+    reads and writes a CompactNode the same way; neighbors is rebuilt as
+    (name, cost) pairs on each read, and hot loops can use edges instead.
+    """
+    __slots__ = ("id", "table", "description", "edges", "_items", "_required_items", "x", "y", "flags",
+                 "puzzle_attempts", "stuck_count", "extra")
+
+    def __init__(self, table: NodeTable, name: str, description: str, neighbors: List[Tuple[str, int]],
+                 puzzle=None, items=None, boss=None, required_items=None, hazards=None, puzzles=None,
+                 position=(0, 0)):
+        self.table = table
+        self.id = table.id_of(name)
+        self.description = sys.intern(description)
+        self.edges = tuple((table.id_of(neighbor), cost) for neighbor, cost in neighbors)
+        self.items = items
+        self.required_items = required_items
+        self.x, self.y = position
+        self.flags = LOCKED if required_items else 0
+        self.puzzle_attempts = 0
+        self.stuck_count = 0
+        self.extra = None
+        for field, value in (("puzzle", puzzle), ("boss", boss), ("hazards", hazards), ("puzzles", puzzles)):
+            if value:
+                self._extra()[field] = value
+
+    def _extra(self) -> Dict:
+        if self.extra is None:
+            self.extra = {}
+        return self.extra
+
+    @property
+    def name(self) -> str:
+        return self.table.names[self.id]
+
+    @property
+    def neighbors(self) -> List[Tuple[str, int]]:
+        names = self.table.names
+        return [(names[room], cost) for room, cost in self.edges]
+
+    @neighbors.setter
+    def neighbors(self, neighbors) -> None:
+        self.edges = tuple((self.table.id_of(neighbor), cost) for neighbor, cost in neighbors)
+
+    # Non-empty item lists stay lists so they can be edited in place (u.py takes items out of rooms)
+    @property
+    def items(self):
+        return self._items
+
+    @items.setter
+    def items(self, items) -> None:
+        self._items = [sys.intern(item) for item in items] if items else ()
+
+    @property
+    def required_items(self):
+        return self._required_items
+
+    @required_items.setter
+    def required_items(self, items) -> None:
+        self._required_items = [sys.intern(item) for item in items] if items else ()
+
+    @property
+    def position(self) -> Tuple[float, float]:
+        return self.x, self.y
+
+    @position.setter
+    def position(self, position) -> None:
+        self.x, self.y = position
+
+    def _flag(bit: int):
+        def get(self) -> bool:
+            return bool(self.flags & bit)
+
+        def set(self, value: bool) -> None:
+            self.flags = self.flags | bit if value else self.flags & ~bit
+        return property(get, set)
+
+    visited = _flag(VISITED)
+    locked = _flag(LOCKED)
+
+    # Absent dicts read as a shared read-only empty mapping, so a write to one fails instead of being lost
+    def _optional(field: str):
+        def get(self):
+            return self.extra.get(field, EMPTY) if self.extra else EMPTY
+
+        def set(self, value) -> None:
+            if value:
+                self._extra()[field] = value
+            elif self.extra:
+                self.extra.pop(field, None)
+        return property(get, set)
+
+    puzzle = _optional("puzzle")
+    boss = _optional("boss")
+    hazards = _optional("hazards")
+    puzzles = _optional("puzzles")
+    del _flag, _optional
+
+    @property
+    def puzzle_solved(self) -> set:
+        """u.py's solved puzzle names, created the first time they are asked for"""
+        return self._extra().setdefault("puzzle_solved", set())
+
+    @puzzle_solved.setter
+    def puzzle_solved(self, solved) -> None:
+        self._extra()["puzzle_solved"] = set(solved)
+
+    @property
+    def color(self) -> Tuple[int, int, int]:
+        """Worked out from the name when drawn rather than stored on every room"""
+        name = self.name
+        return next((color for part, color in NAME_COLORS if part in name), DEFAULT_COLOR)
+
+    def get_color_for_node(self) -> Tuple[int, int, int]:
+        return self.color
+
+
+def benchmark(rooms: int, seed: int = 0) -> None:
+    """Memory per room of a generated labyrinth, for each Node flavour and CompactNode"""
+    import engine
+    import explorer
+    from worldgen import generate_labyrinth
+
+    print(f"{rooms} generated rooms:")
+    for label, make in (("explorer.Node", lambda: explorer.Node), ("engine.Node", lambda: engine.Node),
+                        ("CompactNode", lambda: NodeTable().node)):
+        node_cls = make()
+        tracemalloc.start()
+        started = time.perf_counter()
+        labyrinth = generate_labyrinth(rooms, node_cls, seed)
+        seconds = time.perf_counter() - started
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        started = time.perf_counter()
+        visited = 0
+        for node in labyrinth.values():
+            node.visited = len(node.neighbors) > 2
+            visited += node.visited
+        sweep_seconds = time.perf_counter() - started
+        print(f"  {label:<13} {current / rooms:7.0f} bytes/room  built in {seconds:5.1f}s  "
+              f"neighbour sweep {sweep_seconds * 1000:6.0f} ms")
+        del labyrinth, node_cls
+
+
+if __name__ == "__main__":
+    # Benchmark: python compact_node.py [rooms]
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
\ No newline at end of file
@@ -0,0 +1,318 @@
+import heapq
+import math
+import os
+import sys
+import time
+from typing import Dict, List, Optional
+import numpy as np
+from search_stats import SearchStats
+
+# Compact backend for large labyrinths: rooms are integer ids and adjacency is
+# stored as CSR arrays, so the neighbors of room i are
+#   targets[offsets[i]:offsets[i + 1]] with costs weights[offsets[i]:offsets[i + 1]]
+
+
+class CSRGraph:
+    """Integer-id, NumPy CSR copy of a labyrinth of Node objects"""
+    def __init__(self, names: List[str], offsets, targets, weights, positions,
+                 required: Dict[int, frozenset], items: Dict[int, List[str]], hazard_cost):
+        self.names = names
+        self.ids = {name: i for i, name in enumerate(names)}
+        self.offsets = offsets        # int64, one more than the room count
+        self.targets = targets        # int32 room id per edge
+        self.weights = weights        # float64 base cost per edge
+        self.positions = positions    # float64 (rooms, 2) map positions, 0-100
+        self.required = required      # room id -> items needed to enter (locked rooms only)
+        self.items = items            # room id -> items lying there (rooms with items only)
+        self.hazard_cost = hazard_cost  # float64 half the hazard damage per room
+        self._longest_edge = None
+
+    @classmethod
+    def from_labyrinth(cls, labyrinth) -> "CSRGraph":
+        names = list(labyrinth)
+        ids = {name: i for i, name in enumerate(names)}
+        offsets = [0]
+        targets = []
+        weights = []
+        hazard_cost = []
+        required = {}
+        items = {}
+        for i, node in enumerate(labyrinth.values()):
+            for neighbor, cost in node.neighbors:
+                targets.append(ids[neighbor])
+                weights.append(cost)
+            offsets.append(len(targets))
+            hazard_cost.append(sum(node.hazards.values()) / 2)
+            if node.required_items:
+                required[i] = frozenset(node.required_items)
+            if node.items:
+                items[i] = list(node.items)
+        positions = np.array([node.position for node in labyrinth.values()], dtype=np.float64).reshape(-1, 2)
+        return cls(names, np.array(offsets, dtype=np.int64), np.array(targets, dtype=np.int32),
+                   np.array(weights, dtype=np.float64), positions, required, items,
+                   np.array(hazard_cost, dtype=np.float64))
+
+    @property
+    def room_count(self) -> int:
+        return len(self.names)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.targets)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the adjacency and per-room arrays"""
+        return (self.offsets.nbytes + self.targets.nbytes + self.weights.nbytes
+                + self.positions.nbytes + self.hazard_cost.nbytes)
+
+    def locked(self, inventory) -> np.ndarray:
+        """Rooms whose required items are not all held"""
+        held = set(inventory)
+        locked = np.zeros(self.room_count, dtype=bool)
+        for room, needed in self.required.items():
+            locked[room] = not needed <= held
+        return locked
+
+    def edge_costs(self, inventory, protection_items) -> np.ndarray:
+        """Every edge's cost as uniform_cost_search prices it, in one array pass"""
+        costs = self.weights * np.where(self.locked(inventory)[self.targets], 3, 1)
+        if not any(item in protection_items for item in inventory):
+            costs += self.hazard_cost[self.targets]
+        return costs
+
+    def uniform_cost_search(self, start: str, goal: str, inventory, protection_items,
+                            stats: Optional[SearchStats] = None) -> List[str]:
+        """Dijkstra on the arrays; returns "Move to X" actions like ExplorerEngine.uniform_cost_search"""
+        stats = stats or SearchStats("path", "csr-ucs", {"start": start, "goal": goal})
+        source, target = self.ids[start], self.ids[goal]
+        # Plain lists index far faster than NumPy scalars inside the heap loop
+        offsets = self.offsets.tolist()
+        targets = self.targets.tolist()
+        costs = self.edge_costs(inventory, protection_items).tolist()
+        best = [math.inf] * self.room_count
+        parent = [-1] * self.room_count
+        best[source] = 0
+        frontier = [(0, source)]
+        stats.nodes_generated = 1
+
+        while frontier:
+            g, room = heapq.heappop(frontier)
+            if g > best[room]:
+                stats.duplicate_pops += 1
+                continue
+            if room == target:
+                path = []
+                while room != source:
+                    path.append(f"Move to {self.names[room]}")
+                    room = parent[room]
+                stats.depth(len(path))
+                stats.finish("goal")
+                return list(reversed(path))
+            stats.nodes_expanded += 1
+            for edge in range(offsets[room], offsets[room + 1]):
+                neighbor = targets[edge]
+                next_g = g + costs[edge]
+                if next_g < best[neighbor]:
+                    best[neighbor] = next_g
+                    parent[neighbor] = room
+                    heapq.heappush(frontier, (next_g, neighbor))
+                    stats.nodes_generated += 1
+            stats.frontier(len(frontier))
+
+        stats.finish("exhausted")
+        return []
+
+    def reachable(self, start: str, inventory=(), doors: bool = True) -> np.ndarray:
+        """Level-synchronous BFS; returns a bool mask of rooms reachable from start.
+
+        With doors on, locked rooms can't be entered without their items.
+        """
+        visited = np.zeros(self.room_count, dtype=bool)
+        enterable = ~self.locked(inventory) if doors else np.ones(self.room_count, dtype=bool)
+        frontier = np.array([self.ids[start]], dtype=np.int64)
+        visited[frontier] = True
+        while frontier.size:
+            starts = self.offsets[frontier]
+            lengths = self.offsets[frontier + 1] - starts
+            # Edge index of every out-edge of the frontier, without a Python loop
+            firsts = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+            neighbors = self.targets[firsts + np.arange(lengths.sum())]
+            neighbors = neighbors[enterable[neighbors] & ~visited[neighbors]]
+            frontier = np.unique(neighbors).astype(np.int64)
+            visited[frontier] = True
+        return visited
+
+    def solvable(self, start: str, goal: str, inventory=()) -> bool:
+        """Whether goal can be reached, picking up items to open doors on the way.
+
+        Items are never lost, so reachability only grows: BFS with the current
+        inventory, add every item lying in reached rooms, repeat until the
+        inventory stops growing.
+        """
+        held = set(inventory)
+        while True:
+            reached = self.reachable(start, held)
+            if reached[self.ids[goal]]:
+                return True
+            found = {item for room, items in self.items.items() if reached[room] for item in items}
+            if found <= held:
+                return False
+            held |= found
+
+    @property
+    def longest_edge(self) -> float:
+        """Map length of the longest corridor: rooms further than this from a view have no edge in it"""
+        if self._longest_edge is None:
+            sources = np.repeat(np.arange(self.room_count), np.diff(self.offsets))
+            lengths = np.abs(self.positions[sources] - self.positions[self.targets]).max(axis=1)
+            self._longest_edge = float(lengths.max()) if len(lengths) else 0.0
+        return self._longest_edge
+
+    def room_ids(self, names) -> np.ndarray:
+        ids = self.ids
+        return np.array([ids[name] for name in names if name in ids], dtype=np.int64)
+
+    def minimap_segments(self, discovered: np.ndarray, rect, view=(0.0, 0.0, 100.0, 100.0),
+                         rooms: Optional[np.ndarray] = None) -> np.ndarray:
+        """(k, 4) array of x1, y1, x2, y2 lines between discovered rooms crossing view, scaled to rect.
+
+        rooms limits the pass to the corridors leaving those room ids, e.g.
+        the rooms within longest_edge of the view.
+        """
+        if rooms is None:
+            sources = np.repeat(np.arange(self.room_count), np.diff(self.offsets))
+            targets = self.targets
+        else:
+            counts = self.offsets[rooms + 1] - self.offsets[rooms]
+            sources = np.repeat(rooms, counts)
+            # Edge index of each (room, k): the room's first edge plus k
+            edges = self.offsets[sources] + np.arange(len(sources)) - np.repeat(np.cumsum(counts) - counts, counts)
+            targets = self.targets[edges]
+        keep = discovered[sources] & discovered[targets]
+        start = self.positions[sources[keep]]
+        end = self.positions[targets[keep]]
+        left, top, right, bottom = view
+        low, high = np.minimum(start, end), np.maximum(start, end)
+        inside = (low[:, 0] <= right) & (high[:, 0] >= left) & (low[:, 1] <= bottom) & (high[:, 1] >= top)
+        scale = np.array([rect.width / (right - left), rect.height / (bottom - top)])
+        origin = np.array([rect.x, rect.y]) - np.array([left, top]) * scale
+        return np.hstack([origin + start[inside] * scale, origin + end[inside] * scale])
+
+    def discovered_mask(self, discovered_locations) -> np.ndarray:
+        mask = np.zeros(self.room_count, dtype=bool)
+        mask[[self.ids[name] for name in discovered_locations if name in self.ids]] = True
+        return mask
+
+
+def dict_dijkstra(labyrinth, start: str, goal: str, travel_cost) -> List[str]:
+    """The dict-of-Node equivalent of CSRGraph.uniform_cost_search, for benchmarking"""
+    best = {start: 0}
+    parent = {start: None}
+    frontier = [(0, start)]
+    while frontier:
+        g, room = heapq.heappop(frontier)
+        if g > best[room]:
+            continue
+        if room == goal:
+            path = []
+            while parent[room] is not None:
+                path.append(f"Move to {room}")
+                room = parent[room]
+            return list(reversed(path))
+        for neighbor, cost in labyrinth[room].neighbors:
+            next_g = g + travel_cost(neighbor, cost)
+            if next_g < best.get(neighbor, math.inf):
+                best[neighbor] = next_g
+                parent[neighbor] = room
+                heapq.heappush(frontier, (next_g, neighbor))
+    return []
+
+
+def dict_reachable(labyrinth, start: str, inventory=()) -> set:
+    held = set(inventory)
+    visited = {start}
+    queue = [start]
+    for room in queue:
+        for neighbor, _ in labyrinth[room].neighbors:
+            if neighbor not in visited and all(item in held for item in labyrinth[neighbor].required_items):
+                visited.add(neighbor)
+                queue.append(neighbor)
+    return visited
+
+
+def dict_minimap_segments(labyrinth, discovered_locations, rect) -> List:
+    """MiniMap.draw's connection pass without the drawing"""
+    segments = []
+    for location_name, node in labyrinth.items():
+        if location_name in discovered_locations:
+            for neighbor_name, _ in node.neighbors:
+                if neighbor_name in discovered_locations:
+                    neighbor = labyrinth[neighbor_name]
+                    segments.append((rect.x + ((node.position[0] / 100) * rect.width),
+                                     rect.y + ((node.position[1] / 100) * rect.height),
+                                     rect.x + ((neighbor.position[0] / 100) * rect.width),
+                                     rect.y + ((neighbor.position[1] / 100) * rect.height)))
+    return segments
+
+
+def benchmark(sizes: List[int]) -> None:
+    """Memory per edge and search throughput, dict of Nodes versus CSR arrays"""
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import pygame
+    from explorer import ExplorerEngine, Node
+    from pathfinding import TravelCost, grid_labyrinth, path_cost
+
+    game = ExplorerEngine()
+    rect = pygame.Rect(660, 100, 340, 150)
+    for size in sizes:
+        side = math.isqrt(size)
+        labyrinth = grid_labyrinth(side, Node)
+        edges = sum(len(node.neighbors) for node in labyrinth.values())
+
+        # Neighbor lists and their tuples; room name strings are shared either way
+        dict_bytes = sum(sys.getsizeof(node.neighbors) + sum(sys.getsizeof(edge) for edge in node.neighbors)
+                         for node in labyrinth.values())
+        started = time.perf_counter()
+        graph = CSRGraph.from_labyrinth(labyrinth)
+        build_seconds = time.perf_counter() - started
+
+        start, goal = "R0_0", f"R{side - 1}_{side - 1}"
+        travel_cost = TravelCost(labyrinth, game.inventory, game.protection_items)
+        timings = {}
+
+        started = time.perf_counter()
+        dict_path = dict_dijkstra(labyrinth, start, goal, travel_cost)
+        timings["dijkstra"] = [time.perf_counter() - started]
+        stats = SearchStats("path", "csr-ucs")
+        csr_path = graph.uniform_cost_search(start, goal, game.inventory, game.protection_items, stats)
+        timings["dijkstra"].append(stats.wall_time)
+        same = math.isclose(path_cost(labyrinth, start, dict_path, travel_cost),
+                            path_cost(labyrinth, start, csr_path, travel_cost))
+
+        started = time.perf_counter()
+        dict_rooms = dict_reachable(labyrinth, start)
+        timings["bfs"] = [time.perf_counter() - started]
+        started = time.perf_counter()
+        csr_rooms = graph.reachable(start)
+        timings["bfs"].append(time.perf_counter() - started)
+        same &= len(dict_rooms) == int(csr_rooms.sum())
+
+        discovered = set(list(labyrinth)[::2])
+        started = time.perf_counter()
+        dict_segments = dict_minimap_segments(labyrinth, discovered, rect)
+        timings["minimap"] = [time.perf_counter() - started]
+        started = time.perf_counter()
+        csr_segments = graph.minimap_segments(graph.discovered_mask(discovered), rect)
+        timings["minimap"].append(time.perf_counter() - started)
+        same &= len(dict_segments) == len(csr_segments)
+
+        print(f"{side * side} rooms, {edges} edges (built in {build_seconds:.2f}s, results match: {same})")
+        print(f"  bytes/edge  dict {dict_bytes / edges:6.1f}   csr {graph.nbytes / edges:6.1f}")
+        for name, (dict_seconds, csr_seconds) in timings.items():
+            print(f"  {name:<9}   dict {dict_seconds * 1000:8.1f} ms   csr {csr_seconds * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    # Benchmark: python csr_graph.py [rooms ...]
+    benchmark([int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 1_000_000])
\ No newline at end of file
@@ -0,0 +1,222 @@
+import heapq
+import math
+import random
+import sys
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from pathfinding import TravelCost, distance, reverse_neighbors
+from search_stats import SearchStats
+
+INFINITE_KEY = (math.inf, math.inf)
+
+
+def changed_rooms(labyrinth, old_inventory, new_inventory, protection_items) -> List[str]:
+    """Rooms whose entry cost differs between the two inventories"""
+    old, new = set(old_inventory), set(new_inventory)
+    old_protected = any(item in protection_items for item in old)
+    new_protected = any(item in protection_items for item in new)
+    rooms = []
+    for name, node in labyrinth.items():
+        if node.required_items and (all(item in old for item in node.required_items)
+                                    != all(item in new for item in node.required_items)):
+            rooms.append(name)
+        elif node.hazards and old_protected != new_protected:
+            rooms.append(name)
+    return rooms
+
+
+class DStarLite:
+    """Shortest route to a fixed goal that is repaired, not recomputed, when costs change.
+
+    The search runs backward from the goal, so g[room] is the cost from
+    room to the goal and stays valid as the player walks along the route.
+    Entering a room costs what travel_cost says, so a change to one room's
+    locks or hazards only touches the edges into it; rooms_changed puts
+    their tails back on the queue and the next route() settles only the
+    rooms whose cost to the goal actually moved.
+    """
+    def __init__(self, labyrinth, start: str, goal: str, travel_cost: Callable[[str, float], float],
+                 cost_per_distance: float = 0.0, reverse: Optional[Dict[str, List]] = None):
+        self.labyrinth = labyrinth
+        self.start = start
+        self.goal = goal
+        self.travel_cost = travel_cost
+        self.cost_per_distance = cost_per_distance
+        self.reverse = reverse if reverse is not None else reverse_neighbors(labyrinth)
+        self.g: Dict[str, float] = {}
+        self.rhs: Dict[str, float] = {goal: 0.0}
+        self.keys: Dict[str, Tuple[float, float]] = {}  # Current key of every queued room
+        self.queue: List[Tuple[float, float, str]] = []
+        self.km = 0.0  # Heuristic drift since the first search, as the start moves
+        self._push(goal)
+
+    def heuristic(self, room: str) -> float:
+        if not self.cost_per_distance:
+            return 0.0
+        return distance(self.labyrinth[self.start].position, self.labyrinth[room].position) * self.cost_per_distance
+
+    def key(self, room: str) -> Tuple[float, float]:
+        best = min(self.g.get(room, math.inf), self.rhs.get(room, math.inf))
+        return best + self.heuristic(room) + self.km, best
+
+    def _push(self, room: str) -> None:
+        key = self.key(room)
+        self.keys[room] = key
+        heapq.heappush(self.queue, (key[0], key[1], room))
+
+    def _top(self) -> Tuple[float, float]:
+        """Smallest live key, dropping entries superseded by a later push"""
+        while self.queue:
+            k1, k2, room = self.queue[0]
+            if self.keys.get(room) == (k1, k2):
+                return k1, k2
+            heapq.heappop(self.queue)
+        return INFINITE_KEY
+
+    def _update(self, room: str) -> None:
+        """Recompute rhs from the room's successors and (de)queue it"""
+        if room != self.goal:
+            self.rhs[room] = min((self.travel_cost(neighbor, cost) + self.g.get(neighbor, math.inf)
+                                  for neighbor, cost in self.labyrinth[room].neighbors), default=math.inf)
+        if self.g.get(room, math.inf) != self.rhs.get(room, math.inf):
+            self._push(room)
+        else:
+            self.keys.pop(room, None)
+
+    def compute(self, stats: Optional[SearchStats] = None) -> None:
+        """Settle rooms until the start's cost to the goal is final"""
+        while (self._top() < self.key(self.start)
+               or self.rhs.get(self.start, math.inf) != self.g.get(self.start, math.inf)):
+            if not self.queue:
+                break
+            k1, k2, room = heapq.heappop(self.queue)
+            if stats:
+                stats.nodes_expanded += 1
+            new_key = self.key(room)
+            if (k1, k2) < new_key:
+                self._push(room)  # Key went stale as the start moved
+                continue
+            del self.keys[room]
+            g, rhs = self.g.get(room, math.inf), self.rhs.get(room, math.inf)
+            if g > rhs:
+                self.g[room] = rhs
+                for predecessor, cost in self.reverse[room]:
+                    # Only this successor got cheaper, so no full recompute is needed
+                    if predecessor != self.goal:
+                        via = self.travel_cost(room, cost) + rhs
+                        if via < self.rhs.get(predecessor, math.inf):
+                            self.rhs[predecessor] = via
+                    if self.g.get(predecessor, math.inf) != self.rhs.get(predecessor, math.inf):
+                        self._push(predecessor)
+                    else:
+                        self.keys.pop(predecessor, None)
+            else:
+                self.g[room] = math.inf
+                self._update(room)
+                for predecessor, _ in self.reverse[room]:
+                    self._update(predecessor)
+            if stats:
+                stats.frontier(len(self.keys))
+
+    def move_to(self, room: str) -> None:
+        """The player moved: keep the search tree, shift the heuristic instead"""
+        if room != self.start:
+            self.km += self.heuristic(room)
+            self.start = room
+
+    def rooms_changed(self, rooms: Iterable[str], travel_cost: Optional[Callable[[str, float], float]] = None) -> None:
+        """Repair after the entry cost of these rooms changed (locks, hazards, protection)"""
+        if travel_cost is not None:
+            self.travel_cost = travel_cost
+        tails = {predecessor for room in rooms for predecessor, _ in self.reverse[room]}
+        for room in tails:
+            self._update(room)
+
+    def cost(self) -> float:
+        return self.g.get(self.start, math.inf)
+
+    def route(self, stats: Optional[SearchStats] = None) -> List[str]:
+        """"Move to X" actions from the start to the goal, or [] if unreachable"""
+        stats = stats or SearchStats("path", "dstar-lite", {"start": self.start, "goal": self.goal})
+        self.compute(stats)
+        path = []
+        room = self.start
+        if self.cost() < math.inf:
+            while room != self.goal and len(path) < len(self.labyrinth):
+                room = min(self.labyrinth[room].neighbors,
+                           key=lambda edge: self.travel_cost(edge[0], edge[1]) + self.g.get(edge[0], math.inf))[0]
+                path.append(f"Move to {room}")
+        stats.depth(len(path))
+        stats.finish("goal" if path or room == self.goal else "exhausted")
+        return path
+
+
+def benchmark(rooms: int, events: int = 20, seed: int = 0) -> None:
+    """Replan versus recompute-from-scratch as the player walks and the labyrinth changes"""
+    from explorer import Node
+    from pathfinding import a_star_path, grid_labyrinth, min_cost_per_distance, path_cost
+
+    side = math.isqrt(rooms)
+    labyrinth = grid_labyrinth(side, Node, seed, asymmetric=True)
+    protection_items = {"Shield": 50, "Magic Amulet": 75}
+    ratio = min_cost_per_distance(labyrinth)
+    start, goal = "R0_0", f"R{side - 1}_{side - 1}"
+    travel_cost = TravelCost(labyrinth, [], protection_items)
+
+    started = time.perf_counter()
+    planner = DStarLite(labyrinth, start, goal, travel_cost, ratio)
+    path = planner.route()
+    print(f"{side * side} rooms: first plan {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    rng = random.Random(seed)
+    inventory = []
+    totals: Dict[str, List[float]] = {}
+    same = True
+    for event in range(events):
+        # Walk a few rooms, then something changes near the route ahead
+        for action in path[:3]:
+            planner.move_to(action[len("Move to "):])
+        ahead = [action[len("Move to "):] for action in path[3:12]] or [goal]
+        if event == events // 2:
+            kind, old = "shield", list(inventory)
+            inventory.append("Shield")
+            rooms = changed_rooms(labyrinth, old, inventory, protection_items)
+        elif event % 2:
+            kind, room = "hazard", rng.choice(ahead)
+            node = labyrinth[room]
+            node.hazards = {} if node.hazards else {"Spikes": rng.randint(20, 40)}
+            rooms = [room]
+        else:
+            kind, room = "door", rng.choice(ahead)
+            node = labyrinth[room]
+            node.required_items = [] if node.required_items else ["Golden Key"]
+            rooms = [room]
+        travel_cost = TravelCost(labyrinth, inventory, protection_items)
+
+        started = time.perf_counter()
+        planner.rooms_changed(rooms, travel_cost)
+        replan_stats = SearchStats("path", "dstar-lite")
+        path = planner.route(replan_stats)
+        replan_seconds = time.perf_counter() - started
+        full_stats = SearchStats("path", "astar")
+        full = a_star_path(labyrinth, planner.start, goal, travel_cost, ratio, full_stats)
+        same &= math.isclose(path_cost(labyrinth, planner.start, path, travel_cost),
+                             path_cost(labyrinth, planner.start, full, travel_cost))
+        total = totals.setdefault(kind, [0, 0.0, 0.0, 0, 0])
+        total[0] += 1
+        total[1] += replan_seconds
+        total[2] += full_stats.wall_time
+        total[3] += replan_stats.nodes_expanded
+        total[4] += full_stats.nodes_expanded
+
+    print(f"  {'change':<7} {'events':>6} {'replan ms':>10} {'full A* ms':>11} {'replan exp':>11} {'full exp':>9}")
+    for kind, (count, replan, full, replan_expanded, full_expanded) in totals.items():
+        print(f"  {kind:<7} {count:>6} {replan / count * 1000:>10.1f} {full / count * 1000:>11.1f} "
+              f"{replan_expanded // count:>11} {full_expanded // count:>9}")
+    print(f"  same costs: {same}")
+
+
+if __name__ == "__main__":
+    # Benchmark: python dstar.py [rooms ...]
+    for rooms in [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000]:
+        benchmark(rooms)
\ No newline at end of file
@@ -0,0 +1,1319 @@
+import copy
+import json
+import os
+import random
+import sys
+import time
+from typing import Dict, List, Tuple, Union
+try:
+    import numpy as np
+except ImportError:  # Batch heuristics fall back to plain Python
+    np = None
+from compact_node import NAME_COLORS, DEFAULT_COLOR
+from hint_table import HintTable
+from hint_search import AStar, HintProblem, TranspositionTable
+from search_stats import SessionStats
+from world_stream import ChunkedLabyrinth
+from levelfile import LevelFile, ITEM_HELD, ITEM_NEEDED
+from world_state import WorldState, unbound_copy
+from inventory import Inventory
+from event_log import (EventLog, LoggedGame, PUZZLE_ATTEMPT, PUZZLE_SOLVED, BOSS_DEFEATED, BOSS_HEALTH, COMPLEXITY,
+                       VISITED, STUCK, HINT)
+
+REDUNDANCY_WEIGHT = 5  # Heuristic penalty per repetition of a hint
+FINISHED_SCREENS = ("game_over", "win")
+
+# An action is a name, or a (name, argument) pair for the ones that need one
+Action = Union[str, Tuple[str, object]]
+
+class LUMOS:
+    """LUMOS - Labyrinth Unity Master Operating System"""
+    def __init__(self):
+        self.personality_traits = ["wise", "helpful", "playful"]
+        self.greetings = ["Welcome, seeker! I am LUMOS.", "Greetings! Let me illuminate your path."]
+        self.encouragements = ["You're doing well!", "Every challenge makes you stronger!"]
+        self.hints = {
+            "Ancient Entrance": {"general": "Ancient secrets hide in plain sight...",
+                               "puzzle": "The answer lies in what you use every day.",
+                               "combat": "Stone can be worn down with persistence."},
+            "Crystal Caverns": {"general": "Listen to the crystals' song...",
+                              "puzzle": "Patterns repeat in nature.",
+                              "combat": "Crystals amplify energy."},
+            "Shadow Maze": {"general": "Not all shadows are feared...",
+                          "puzzle": "Consider natural opposites.",
+                          "combat": "Light and shadow dance."},
+            "Elemental Chambers": {"general": "Elements seek balance...",
+                                 "puzzle": "Life gives and takes equally.",
+                                 "combat": "Each element has its counter."},
+            "Time-Lost Library": {"general": "Time flows differently here...",
+                                "puzzle": "Some things constantly move.",
+                                "combat": "Time can be manipulated."}
+        }
+
+    def greet(self): return random.choice(self.greetings)
+    def encourage(self): return random.choice(self.encouragements)
+    def give_hint(self, location, context=None):
+        if context and location in self.hints:
+            return self.hints[location].get(context, self.hints[location]["general"])
+        return "Trust your instincts..."
+
+class RandomEncounter:
+    """Handles random encounters"""
+    def __init__(self):
+        self.encounters = {
+            "Crystal Guardian": {
+                "description": "A crystalline figure materializes!",
+                "options": [
+                    ("Use sonic resonance", "The crystal shatters harmlessly!", 20),
+                    ("Physical attack", "Your attack bounces off!", -10),
+                    ("Use water", "The crystal grows stronger!", -15),
+                    ("Dodge and observe", "You learn its pattern.", 5)
+                ]
+            },
+            "Shadow Wisp": {
+                "description": "A dark form circles you...",
+                "options": [
+                    ("Use light source", "The shadow dissipates!", 25),
+                    ("Use wind", "The wisp scatters briefly...", 10),
+                    ("Physical attack", "Your attack passes through!", -10),
+                    ("Stand still", "The wisp loses interest.", 5)
+                ]
+            },
+            "Time Anomaly": {
+                "description": "Reality warps around you!",
+                "options": [
+                    ("Use time crystal", "You stabilize the anomaly!", 30),
+                    ("Run away", "Time catches up to you!", -15),
+                    ("Stand ground", "You resist the temporal pull.", 10),
+                    ("Use any item", "The item gets lost in time.", -5)
+                ]
+            }
+        }
+
+    def get_random_encounter(self): return random.choice(list(self.encounters.items()))[1]
+
+class Node:
+    def __init__(self, name, description, neighbors, puzzle=None, items=None, boss=None, required_items=None, position=(0, 0)):
+        self.name = name
+        self.description = description
+        self.neighbors = neighbors
+        self.puzzle = puzzle or {}
+        self.items = items or []
+        self.boss = boss or {}
+        self.required_items = required_items or []
+        self.visited = False
+        self.locked = bool(required_items)
+        self.puzzle_attempts = 0
+        self.stuck_count = 0
+        self.position = position  # (x, y) position for map drawing
+        self.color = self.get_color_for_node()
+
+    def get_color_for_node(self):
+        return next((color for part, color in NAME_COLORS if part in self.name), DEFAULT_COLOR)
+
+
+def _room_copy(node: Node) -> Node:
+    """A room with its own puzzle, boss and item lists, and none of the WorldState's arrays"""
+    room = unbound_copy(node)
+    room.puzzle = node.puzzle.copy()
+    room.boss = node.boss.copy()
+    room.items = list(node.items)
+    room.required_items = list(node.required_items)
+    return room
+
+
+class RoomSnapshot:
+    """Copy-on-read view of a labyrinth for a hint search on another thread.
+
+    The rooms named up front are copied on the calling thread; any other
+    room is copied the first time the search reads it, so a level file
+    only builds the rooms the search actually looks at.
+    """
+    def __init__(self, labyrinth, rooms):
+        self.labyrinth = labyrinth
+        self.rooms = {name: _room_copy(labyrinth[name]) for name in rooms}
+
+    def __getitem__(self, name):
+        room = self.rooms.get(name)
+        if room is None:
+            room = self.rooms[name] = _room_copy(self.labyrinth[name])
+        return room
+
+    def __contains__(self, name) -> bool:
+        return name in self.rooms or name in self.labyrinth
+
+    def __iter__(self):
+        return iter(self.labyrinth)
+
+    def __len__(self) -> int:
+        return len(self.labyrinth)
+
+    def get(self, name, default=None):
+        return self[name] if name in self else default
+
+    def keys(self):
+        return iter(self)
+
+    def values(self):
+        return (self[name] for name in self)
+
+    def items(self):
+        return ((name, self[name]) for name in self)
+
+
+class GameEngine(LoggedGame):
+    """The rules of the LUMOS labyrinth, without pygame.
+
+    Holds the world, inventory, puzzles, boss fight, encounters, hints and
+    score, and moves between the same screens as the window (main_menu,
+    game, puzzle, boss, encounter, result, inventory, game_over, win).
+    step() applies one player action and returns an observation, so games
+    can be simulated headless; a.py's LabyrinthGame holds one, draws it and
+    turns clicks into actions. With a hint_worker (hint_worker.py), hint
+    searches run on it and poll_hint_request() applies them; restart()
+    keeps the worker.
+    """
+    def __init__(self, hint_worker=None):
+        # Game state lives in the event log, whose fold also makes room changes; LUMOS_EVENT_LOG appends it to a file
+        self.events = EventLog(os.environ.get("LUMOS_EVENT_LOG"))
+
+        # Game state
+        self.levels = {1: "Ancient Entrance", 2: "Crystal Caverns", 3: "Shadow Maze",
+                      4: "Elemental Chambers", 5: "Time-Lost Library"}
+        self.current_level = 1
+        self.current_location = self.levels[1]
+        self.inventory = Inventory()
+        self.health = 100
+        self.score = 0
+        # LUMOS_WORLD names a world directory (see world_stream.py) streamed in chunks around the player
+        world_path = os.environ.get("LUMOS_WORLD")
+        self.world = ChunkedLabyrinth(world_path, Node) if world_path else None
+        self.level_file = None  # The LevelFile behind self.labyrinth, if any: it answers item questions from its index
+        if self.world is not None:
+            self.labyrinth = self.world
+            self.levels = dict(self.world.levels)
+            self.current_location = self.world.start
+            self.world.focus(self.current_location)
+        elif os.environ.get("LUMOS_LEVEL"):
+            # A level file (python levelfile.py export a) instead of the built-in rooms
+            self.labyrinth = self.level_file = LevelFile(os.environ["LUMOS_LEVEL"], Node)
+            self.current_location = self.labyrinth.start
+        else:
+            self.labyrinth = self._create_labyrinth()
+        # LUMOS_WORLD_STATE=1 keeps room state in NumPy arrays (not for streamed worlds)
+        self.world_state = None
+        if os.environ.get("LUMOS_WORLD_STATE") and np is not None and self.world is None:
+            self.world_state = WorldState(self.labyrinth)
+            self.world_state.attach()
+        self.hint_history = []
+        self.lumos = LUMOS()
+        self.encounter_generator = RandomEncounter()
+        self.last_encounter_location = None
+        if self.world_state is not None:
+            self.total_puzzles = self.world_state.total_puzzles()
+        elif isinstance(self.labyrinth, (ChunkedLabyrinth, LevelFile)):
+            self.total_puzzles = self.labyrinth.puzzle_count  # From the file header: most rooms are on disk
+        else:
+            self.total_puzzles = sum(1 for node in self.labyrinth.values() if node.puzzle)
+        self.solved_puzzles = 0
+        self.player_turns = 0
+        self.location_visits = {}
+        self.hint_effectiveness = {}
+
+        # Precomputed best hints (built with hint_table.py), if available
+        self.hint_table = HintTable.load_for(self.labyrinth)
+
+        # Search strategy behind a_star_search (see hint_search.py for others)
+        self.hint_strategy = AStar()
+        self.last_search_result = None
+        # Evaluated hint states shared by successive LUMOS requests
+        self.hint_cache = TranspositionTable()
+        # Background hint searches, when a worker is given; None answers hints on the spot
+        self.hint_worker = hint_worker
+        self.pending_hint = None
+        # Set LUMOS_HINT_CORPUS to record hint requests for benchmarking
+        self.hint_corpus_path = os.environ.get("LUMOS_HINT_CORPUS")
+        # Per-session search histograms, written to LUMOS_SEARCH_STATS (.json or .csv) on quit
+        self.search_stats = SessionStats()
+        self.search_stats_path = os.environ.get("LUMOS_SEARCH_STATS")
+
+        # Game screens
+        self.current_screen = "main_menu"  # main_menu, game, puzzle, boss, encounter, game_over, win
+        self.current_message = ""
+        self.message_queue = []
+        self.lumos_message = self.lumos.greet()
+        self.encounter_result = ""
+
+        # Current encounter/puzzle/boss data
+        self.current_encounter = None
+        self.selected_puzzle_option = None
+        self.boss_battle_state = {"player_health": 0, "boss_health": 0}
+
+    def _create_labyrinth(self) -> Dict[str, Node]:
+        # Create labyrinth with position data for map visualization
+        return {
+            "Ancient Entrance": Node(
+                "Ancient Entrance", "(Level 1: Starting point)",
+                [("Crystal Caverns", 2)],
+                puzzle={"type": "riddle", "question": "What has keys but no locks, space but no room?",
+                       "options": ["A Keyboard", "A Map", "A Phone", "A Book"],
+                       "correct_option": 0, "hint": "Think about computer peripherals",
+                       "solved": False, "complexity": 1},
+                items=["Bronze Key"],
+                position=(150, 350)
+            ),
+            "Crystal Caverns": Node(
+                "Crystal Caverns", "(Level 2: Glittering crystals)",
+                [("Shadow Maze", 3), ("Ancient Entrance", 1)],
+                puzzle={"type": "pattern", "question": "What comes next: Triangle, Square, Pentagon, ?",
+                       "options": ["Circle", "Hexagon", "Octagon", "Triangle"],
+                       "correct_option": 1, "hint": "Count the sides",
+                       "solved": False, "complexity": 2},
+                items=["Crystal Shard"],
+                position=(300, 200)
+            ),
+            "Shadow Maze": Node(
+                "Shadow Maze", "(Level 3: Shifting shadows)",
+                [("Elemental Chambers", 4), ("Crystal Caverns", 2)],
+                puzzle={"type": "riddle", "question": "I grow without life, need air but no lungs, water kills me. What am I?",
+                       "options": ["Tree", "Fire", "Shadow", "Echo"],
+                       "correct_option": 1, "hint": "I bring warmth",
+                       "solved": False, "complexity": 3},
+                items=["Shadow Essence"],
+                required_items=["Bronze Key"],
+                position=(500, 350)
+            ),
+            "Elemental Chambers": Node(
+                "Elemental Chambers", "(Level 4: Four elements)",
+                [("Time-Lost Library", 5), ("Shadow Maze", 3)],
+                puzzle={"type": "elements", "question": "When elements balance, what's at center?",
+                       "options": ["Spirit", "Void", "Life", "Harmony"],
+                       "correct_option": 2, "hint": "What does balance create?",
+                       "solved": False, "complexity": 4},
+                items=["Elemental Key"],
+                required_items=["Crystal Shard", "Shadow Essence"],
+                position=(650, 200)
+            ),
+            "Time-Lost Library": Node(
+                "Time-Lost Library", "(Level 5: Final chamber)",
+                [("Elemental Chambers", 4)],
+                boss={"name": "Chronos Guardian", "health": 100,
+                     "attacks": ["Time Reversal", "Age Acceleration", "Temporal Freeze"],
+                     "weakness": "Elemental Key", "defeated": False},
+                required_items=["Elemental Key"],
+                position=(800, 350)
+            )
+        }
+
+    def handle_random_encounter(self):
+        """Handle a random encounter event"""
+        if random.random() < 0.3 and self.current_location != self.last_encounter_location:
+            self.last_encounter_location = self.current_location
+            self.current_encounter = self.encounter_generator.get_random_encounter()
+            self.current_screen = "encounter"
+            return True
+        return False
+
+    def determine_hint_difficulty(self):
+        progress_percentage = (self.solved_puzzles / self.total_puzzles) * 100 if self.total_puzzles > 0 else 0
+        game_stage = 1 + int(progress_percentage / 20)  # 1-5 stages based on progress
+        current_node = self.labyrinth[self.current_location]
+        stuck_count = current_node.stuck_count
+
+        # Base difficulty adjustments
+        if progress_percentage < 30:
+            base_difficulty = 1  # Easy
+        elif progress_percentage < 70:
+            base_difficulty = 2  # Medium
+        else:
+            base_difficulty = 3  # Hard
+
+        # Stuck count adjustments
+        stuck_adjustment = min(2, stuck_count // 3)  # Increase difficulty for every 3 turns stuck
+
+        # Final difficulty level
+        final_difficulty = min(3, max(1, base_difficulty + stuck_adjustment))
+
+        # Scale random encounter chance
+        encounter_chance = 0.1  # Default chance
+        encounter_chance += (game_stage - 1) * 0.05  # Increase with game stage
+        encounter_chance = min(0.3, encounter_chance) #cap the chance
+
+        # Scale boss health
+        if current_node.boss and not current_node.boss.get("defeated", False):
+            boss = current_node.boss
+            base_health = boss.get("health", 100)
+            scaled_health = base_health + (game_stage - 1) * 20 # Increase with game stage
+            self.events.record(BOSS_HEALTH, self.current_location, value=int(scaled_health)) #update the health
+
+        # Return difficulty string
+        if final_difficulty == 1:
+            return "Easy"
+        elif final_difficulty == 2:
+            return "Medium"
+        else:
+            return "Hard"
+        
+    def adjust_dynamic_difficulty(self):
+
+        progress_percentage = (self.solved_puzzles / self.total_puzzles) * 100 if self.total_puzzles > 0 else 0
+        game_stage = 1 + int(progress_percentage / 20)  # 1-5 stages based on progress
+        current_node = self.labyrinth[self.current_location]
+
+        # Adjust encounter chance
+        encounter_chance = 0.1  # Base chance
+        encounter_chance += (game_stage - 1) * 0.05  # Increase with game stage
+        self.encounter_chance = min(0.3, encounter_chance) #cap the chance
+
+        # Adjust boss difficulty
+        if current_node.boss and not current_node.boss.get("defeated", False):
+            boss = current_node.boss
+            base_health = boss.get("health", 100)
+            scaled_health = base_health + (game_stage - 1) * 20
+            self.events.record(BOSS_HEALTH, self.current_location, value=int(scaled_health))
+
+            # Scale boss attack and damage
+            self.boss_attack_multiplier = 1 + (game_stage - 1) * 0.2
+            self.boss_damage_multiplier = 1 + (game_stage - 1) * 0.15
+
+        # Adjust puzzle complexity (example)
+        if current_node.puzzle and not current_node.puzzle.get("solved", False):
+            complexity = current_node.puzzle.get("complexity", 1)
+            scaled_complexity = complexity + (game_stage - 1) * 0.5 #increase complexity with game stage
+            self.events.record(COMPLEXITY, self.current_location, value=min(5, scaled_complexity)) #cap complexity
+
+        # Adjust heuristic weights (example)
+        self.puzzle_weight = 5 + (game_stage - 1) * 1 #increase puzzle weight
+        self.urgency_weight = 15 + (game_stage - 1) * 2 #increase urgency weight    
+    
+    def update_hint_effectiveness(self, hint, was_helpful):
+    
+        if hint not in self.hint_effectiveness:
+            self.hint_effectiveness[hint] = []
+        
+        self.hint_effectiveness[hint].append(was_helpful)
+        
+        # Adjust stuck count based on hint effectiveness
+        current_node = self.labyrinth[self.current_location]
+        if was_helpful:
+            stuck_count = max(0, current_node.stuck_count - 1)
+        else:
+            stuck_count = current_node.stuck_count + 1
+        self.events.record(STUCK, self.current_location, value=stuck_count)
+
+    def generate_hints(self, state):
+        location = state.get("location", self.current_location)
+        inventory = state.get("inventory", self.inventory)
+        past_hints = state.get("past_hints", self.hint_history)
+        solved_puzzles = state.get("solved_puzzles", self.solved_puzzles)
+
+        node = self.labyrinth[location]
+        hints = []
+
+        level_num = 1
+        for lvl, loc in self.levels.items():
+            if loc == location:
+                level_num = lvl
+                break
+
+        difficulty = state.get("difficulty") or self.determine_hint_difficulty()
+
+        # Puzzle hints
+        if node.puzzle and not node.puzzle.get("solved", False):
+            if "Ancient Entrance" in location:
+                general = "The answer is something common you use daily."
+                specific = "Think about things with keys and spaces..."
+                very_specific = "It's a device you're likely using right now."
+
+            elif "Crystal Caverns" in location:
+                general = "Look for a mathematical pattern in shapes."
+                specific = "Count the sides of each shape and see what changes."
+                very_specific = "Each shape has one more side than the previous."
+
+            elif "Shadow Maze" in location:
+                general = "Think about what grows without being alive."
+                specific = "What needs air but has no lungs, and water extinguishes it?"
+                very_specific = "It brings light and warmth but can be dangerous."
+
+            elif "Elemental Chambers" in location:
+                general = "Consider what elements create when they're in balance."
+                specific = "When earth, air, fire, and water come together, what emerges?"
+                very_specific = "What emerges from a perfect balance of opposing forces?"
+
+            elif "Time-Lost Library" in location:
+                general = "The guardian's weakness is tied to the elements."
+                specific = f"Use what you found in the Elemental Chambers."
+                very_specific = f"The {node.boss['weakness']} is key to victory."
+            else:
+                general = f"Focus on the puzzle in {location}."
+                specific = node.puzzle.get("hint", "Look at the options.")
+                if 'correct_option' in node.puzzle:
+                    try:
+                        correct_answer = node.puzzle['options'][node.puzzle['correct_option']]
+                        very_specific = f"The answer is {correct_answer}."
+                    except IndexError:
+                        very_specific = "The correct answer is not available."
+                else:
+                    very_specific = "The correct answer is not available."
+
+            if difficulty == "Easy":
+                hints.append((very_specific, 1))
+                hints.append((specific, 3))
+            elif difficulty == "Medium":
+                hints.append((specific, 1))
+                hints.append((general, 3))
+            else:
+                hints.append((general, 1))
+
+        # Required items hints
+        if node.locked:
+            for item in node.required_items:
+                if item not in inventory:
+                    for ploc in self.item_rooms(item):
+                        if level_num <= 3:
+                            hint = f"You need to find the {item} in the {ploc}."
+                        else:
+                            hint = f"A key from {ploc} will unlock this path."
+                        hints.append((hint, 2))
+
+        # Boss hints
+        if node.boss and not node.boss.get("defeated", False):
+            if "weakness" in node.boss:
+                weakness = node.boss["weakness"]
+                if weakness in inventory:
+                    if level_num <= 3:
+                        hint = f"Use the {weakness} against {node.boss['name']}!"
+                    else:
+                        hint = f"Your elemental treasure will be effective here."
+                    hints.append((hint, 2))
+                else:
+                    if level_num <= 3:
+                        hint = f"{node.boss['name']} has a weakness to something elemental."
+                    else:
+                        hint = f"Balance the elements to defeat what lies ahead."
+                    hints.append((hint, 4))
+
+        # Navigation hints
+        for next_loc, diff in node.neighbors:
+            if next_loc not in [v["location"] for v in state.get("visited_locations", [])]:
+                if level_num <= 2:
+                    hint = f"You should explore the {next_loc} next."
+                else:
+                    hint = f"An unexplored path leads to new discoveries."
+                hints.append((hint, 3))
+
+        # Health hints
+        if state.get("player_health", self.health) < 30:
+            hints.append(("Consider finding a way to restore your health.", 1))
+            hints.append(("Some items or locations might offer healing.", 2))
+
+        # Player history analysis (example)
+        player_history = state.get("player_history", [])  # Assume we track this
+        if player_history.count("skipped_puzzle") > 2:
+            hints.append(("Don't avoid challenges. Facing them is key.", 4))
+
+        # Apply redundancy penalties
+        final_hints = []
+        for hint, cost in hints:
+            adjusted_cost = cost
+
+            repetition_count = past_hints.count(hint)
+            if repetition_count > 0:
+                adjusted_cost += 5 * repetition_count
+
+            final_hints.append((hint, adjusted_cost))
+
+        return final_hints
+        
+    def analyze_player_history(self, state):
+
+        player_history = state.get("player_history",)  # Get player history from state
+        analysis = {}  # Dictionary to store analysis results
+
+        # Example: Count skipped puzzles
+        skipped_puzzle_count = player_history.count("skipped_puzzle")
+        analysis["skipped_puzzle_count"] = skipped_puzzle_count
+
+        # Example: Count repeated locations
+        location_counts = {}
+        for action in player_history:
+            if action.startswith("moved_to:"):
+                location = action.split(":")[1]
+                location_counts[location] = location_counts.get(location, 0) + 1
+        analysis["location_counts"] = location_counts
+
+        # Example: Count combat actions
+        combat_action_count = 0
+        for action in player_history:
+            if action in ["attack", "defend", "run_away", "use_weakness"]:
+                combat_action_count += 1
+        analysis["combat_action_count"] = combat_action_count
+
+        # Example: Check if player frequently uses hints
+        hint_request_count = player_history.count("asked_for_hint")
+        analysis["hint_request_count"] = hint_request_count
+
+        # Example: Check if player has low health encounters.
+        low_health_encounters = player_history.count("low_health_encounter")
+        analysis["low_health_encounters"] = low_health_encounters
+
+        return analysis
+    
+    def increment_player_turn(self):
+   
+        self.player_turns += 1
+        
+        # Track location visits
+        if self.current_location not in self.location_visits:
+            self.location_visits[self.current_location] = 0
+        self.location_visits[self.current_location] += 1
+        
+        # Update stuck count if player stays in same location
+        if self.player_turns > 3 and self.location_visits.get(self.current_location, 0) > 2:
+            current_node = self.labyrinth[self.current_location]
+            if not current_node.visited or (current_node.puzzle and not current_node.puzzle.get("solved", False)):
+                self.events.record(STUCK, self.current_location, value=current_node.stuck_count + 1)
+
+    def apply_hint(self, state, hint):
+        """Apply a hint to current state"""
+        new_state = state.copy()
+        new_state["last_hint"] = hint
+        new_state.pop("cache_key", None)
+
+        # Copy the list so sibling states don't share one history
+        new_state["past_hints"] = list(new_state.get("past_hints", []))
+        if hint not in new_state["past_hints"]:
+            new_state["past_hints"].append(hint)
+
+        return new_state
+
+    def calculate_heuristic(self, state):
+        return self.calculate_static_heuristic(state) + self.calculate_time_factor(state)
+
+    def calculate_heuristic_batch(self, states):
+        """calculate_heuristic for many states at once, e.g. every child of one expansion"""
+        static = self.calculate_static_heuristic_batch(states)
+        if np is None:
+            return [h + self.calculate_time_factor(state) for h, state in zip(static, states)]
+        turns = np.fromiter((state.get("player_turns", self.player_turns) for state in states),
+                            dtype=float, count=len(states))
+        return (np.asarray(static) + np.minimum(20, turns)).tolist()
+
+    def calculate_time_factor(self, state):
+        """Time factor - prioritize helpful hints as player spends more turns.
+
+        It is the same for every state in one search, so the hint cache
+        stores heuristic values without it.
+        """
+        player_turns = state.get("player_turns", self.player_turns)
+        time_weight = 1
+        return min(20, player_turns / time_weight)
+
+    def calculate_static_heuristic(self, state):
+        return self.calculate_shared_heuristic(state) + REDUNDANCY_WEIGHT * self.hint_repetitions(state)
+
+    def calculate_static_heuristic_batch(self, states):
+        """calculate_static_heuristic for many states.
+
+        Sibling states differ only in their hint history, so the shared terms
+        are computed once per group of states with the same position, items,
+        progress and health; the redundancy penalty is one array operation.
+        """
+        shared = {}
+        base = []
+        for state in states:
+            group = (state.get("location", self.current_location),
+                     tuple(state.get("inventory", self.inventory)),
+                     state.get("solved_puzzles", self.solved_puzzles),
+                     state.get("player_health", self.health))
+            if group not in shared:
+                shared[group] = self.calculate_shared_heuristic(state)
+            base.append(shared[group])
+
+        repetitions = [self.hint_repetitions(state) for state in states]
+        if np is None:
+            return [h + REDUNDANCY_WEIGHT * count for h, count in zip(base, repetitions)]
+        return (np.asarray(base, dtype=float) + REDUNDANCY_WEIGHT * np.asarray(repetitions)).tolist()
+
+    def hint_repetitions(self, state):
+        """How often the state's last hint was already given (0 if it is new)"""
+        last_hint = state.get("last_hint", "")
+        past_hints = state.get("past_hints", [])
+        if last_hint in past_hints[:-1]:
+            return past_hints.count(last_hint)
+        return 0
+
+    def calculate_shared_heuristic(self, state):
+        """Heuristic terms that don't depend on the hint history"""
+        location = state.get("location", self.current_location)
+        inventory = state.get("inventory", self.inventory)
+        solved_puzzles = state.get("solved_puzzles", self.solved_puzzles)
+        total_puzzles = self.total_puzzles
+        player_health = state.get("player_health", self.health)
+
+        node = self.labyrinth[location]
+
+        # Weights for heuristic factors (adjustable)
+        puzzle_weight = 5
+        urgency_weight = 15
+        stuck_weight = 2
+        inventory_weight = 3
+        health_weight = 10
+
+        # Progress factors
+        progress_percentage = (solved_puzzles / total_puzzles) * 100 if total_puzzles > 0 else 0
+        game_stage = 1 + int(progress_percentage / 20)  # 1-5 stages based on progress
+
+        # Puzzle-specific value - more complex puzzles need better hints
+        puzzle_value = 0
+        if node.puzzle and not node.puzzle.get("solved", False):
+            complexity = node.puzzle.get("complexity", 1)
+            attempts = node.puzzle_attempts
+
+            # Scale based on attempts and complexity
+            puzzle_value = complexity * puzzle_weight * (1 + attempts * 0.5)
+
+        # Stuck factor - higher priority for locations where player is stuck
+        stuck_penalty = node.stuck_count * stuck_weight * game_stage  # Scales with game stage
+
+        # Inventory progress value - having more items means better progress
+        inventory_progress = len(inventory) * inventory_weight
+
+        # Urgency factor - prioritize hints for immediate obstacles
+        urgency = 0
+        if node.locked and any(item not in inventory for item in node.required_items):
+            urgency += urgency_weight
+        if node.boss and not node.boss.get("defeated", False):
+            urgency += 2 * urgency_weight * game_stage  # Higher priority in later stages
+
+        # Health factor - prioritize health hints when low
+        health_factor = 0
+        if player_health < 30:
+            health_factor = health_weight * (30 - player_health)
+
+        # Final calculation
+        return (
+            puzzle_value
+            + urgency
+            + stuck_penalty
+            + health_factor
+        ) - inventory_progress
+
+    def hint_cache_key(self, state):
+        """Everything generate_hints and calculate_static_heuristic read for a state.
+
+        The key is remembered in the state itself since every search step
+        asks for it several times; apply_hint drops it from child states.
+        """
+        if "cache_key" in state:
+            return state["cache_key"]
+        location = state.get("location", self.current_location)
+        node = self.labyrinth[location]
+        past_hints = state.get("past_hints", [])
+        health = state.get("player_health", self.health)
+        state["cache_key"] = (
+            location,
+            frozenset(state.get("inventory", self.inventory)),
+            state.get("solved_puzzles", self.solved_puzzles),
+            state.get("difficulty"),
+            min(30, health),  # Health only matters below 30
+            node.stuck_count,
+            node.puzzle_attempts,
+            tuple(sorted(v["location"] for v in state.get("visited_locations", []))),
+            tuple(sorted(past_hints)),
+            state.get("last_hint", ""),
+            tuple(past_hints[-1:])
+        )
+        return state["cache_key"]
+
+    def cached_heuristic(self, state):
+        """calculate_heuristic, reusing values from earlier searches"""
+        if self.hint_cache is None:
+            return self.calculate_heuristic(state)
+        entry = self.hint_cache.entry(self.hint_cache_key(state), state.get("location", self.current_location))
+        if entry.h is None:
+            entry.h = self.calculate_static_heuristic(state)
+        return entry.h + self.calculate_time_factor(state)
+
+    def cached_heuristic_batch(self, states):
+        """calculate_heuristic_batch, reusing values from earlier searches"""
+        if self.hint_cache is None:
+            return self.calculate_heuristic_batch(states)
+        entries = [self.hint_cache.entry(self.hint_cache_key(state), state.get("location", self.current_location))
+                   for state in states]
+        missing = [i for i, entry in enumerate(entries) if entry.h is None]
+        if missing:
+            values = self.calculate_static_heuristic_batch([states[i] for i in missing])
+            for i, h in zip(missing, values):
+                entries[i].h = h
+        return [entry.h + self.calculate_time_factor(state) for entry, state in zip(entries, states)]
+
+    def expand_hint_state(self, state):
+        """Children of a hint-search state: one per hint LUMOS could give"""
+        if self.hint_cache is None:
+            return [(hint, cost, self.apply_hint(state.copy(), hint))
+                    for hint, cost in self.generate_hints(state)]
+
+        entry = self.hint_cache.entry(self.hint_cache_key(state), state.get("location", self.current_location))
+        if entry.hints is None:
+            entry.hints = self.generate_hints(state)
+        return [(hint, cost, self.apply_hint(state.copy(), hint)) for hint, cost in entry.hints]
+
+    def item_rooms(self, item):
+        """Rooms holding item; a streamed world answers from its manifest, a level file from its index"""
+        if self.world is not None:
+            return self.world.item_rooms.get(item, [])
+        if self.level_file is not None:
+            return self.level_file.indexed_rooms(item, ITEM_HELD)
+        return [name for name, node in self.labyrinth.items() if item in node.items]
+
+    def loaded_rooms(self):
+        """(name, room) of every room built so far; a level file's other rooms are untouched"""
+        if self.level_file is not None:
+            return [(node.name, node) for node in list(self.level_file.nodes.values())]
+        return self.labyrinth.items()
+
+    def invalidate_hint_cache(self, location=None, item=None):
+        """Drop cached hint states a world change may have made stale"""
+        if self.hint_cache is None:
+            return
+        if location:
+            self.hint_cache.invalidate_location(location)
+        if item:
+            # Rooms whose hints mention the item: locks that need it and bosses weak to it
+            if self.level_file is not None:
+                for name in self.level_file.indexed_rooms(item, ITEM_NEEDED):
+                    self.hint_cache.invalidate_location(name)
+                return
+            for name, node in self.labyrinth.items():
+                if item in node.required_items or node.boss.get("weakness") == item:
+                    self.hint_cache.invalidate_location(name)
+
+    def hint_problem(self, initial_state, goal_test=None, heuristic=None, cancel_event=None):
+        heuristic = heuristic or self.calculate_heuristic
+        # Score all children of an expansion together when a batch form exists
+        batch_heuristics = {
+            self.calculate_heuristic: self.calculate_heuristic_batch,
+            self.cached_heuristic: self.cached_heuristic_batch
+        }
+        problem = HintProblem(
+            initial_state,
+            expand=self.expand_hint_state,
+            heuristic=heuristic,
+            goal_test=goal_test or (lambda state: False),
+            should_stop=cancel_event.is_set if cancel_event is not None else None,
+            batch_heuristic=batch_heuristics.get(heuristic)
+        )
+        if self.hint_cache is not None:
+            # States that differ only in the order of past hints are transpositions
+            problem.state_key = self.hint_cache_key
+        return problem
+
+    def a_star_search(self, initial_state, goal_test, heuristic, cancel_event=None):
+        """Search for a hint plan with self.hint_strategy (A* unless configured otherwise)"""
+        problem = self.hint_problem(initial_state, goal_test, heuristic, cancel_event)
+        result = self.hint_strategy.search(problem)
+        self.last_search_result = result
+        self.search_stats.add(result.stats)
+
+        if result.termination == "cancelled":
+            return []
+        return result.plan or ["Consider the puzzle carefully..."]  # Fallback
+
+    def get_hint_state(self):
+        """Snapshot the current state for a hint search"""
+        return {
+            "location": self.current_location,
+            "inventory": self.inventory.copy(),
+            "past_hints": self.hint_history.copy(),
+            "solved_puzzles": self.solved_puzzles,
+            "player_turns": self.player_turns,
+            "visited_locations": [{"location": loc, "count": count}
+                                 for loc, count in self.location_visits.items()]
+        }
+
+    def hint_snapshot(self) -> "GameEngine":
+        """A copy of the engine for a hint search on another thread.
+
+        Player fields and hint history are copied, and the current room and
+        its neighbours (all the search reads) are copied into a
+        RoomSnapshot, so moves, pickups and chunk evictions on the main
+        thread can't change a search in progress. The hint cache and search
+        stats stay shared; both take updates from the worker.
+        """
+        snapshot = copy.copy(self)
+        snapshot.events = EventLog()  # In memory, never written to the game's log file
+        for field, value in self.events.state.values.items():
+            snapshot.events.set(field, value)
+        snapshot.current_location = self.current_location
+        snapshot.inventory = self.inventory.copy()
+        snapshot.levels = dict(self.levels)
+        snapshot.hint_history = list(self.hint_history)
+        snapshot.location_visits = dict(self.location_visits)
+        # Neighbours in chunks that aren't resident are left to copy-on-read rather than loaded here
+        neighbors = [name for name, _ in self.labyrinth[self.current_location].neighbors
+                     if self.world is None or name in self.world.nodes]
+        snapshot.labyrinth = RoomSnapshot(self.labyrinth, [self.current_location] + neighbors)
+        return snapshot
+
+    def search_optimal_hint(self, current_state, cancel_event=None):
+        """Use A* to find the optimal hint; returns None if cancelled"""
+        # Goal test function (always False for hint-finding)
+        def is_goal(state):
+            return False
+
+        # Get best hint using A*
+        hints = self.a_star_search(
+            initial_state=current_state,
+            goal_test=is_goal,
+            heuristic=self.cached_heuristic,
+            cancel_event=cancel_event
+        )
+
+        if cancel_event is not None and cancel_event.is_set():
+            return None
+        if hints:
+            return hints[0]
+        return "Trust your intuition..."
+
+    def lookup_precomputed_hint(self):
+        """Look the current state up in the hint table; None means search live"""
+        if not self.hint_table or self.health < 30:
+            return None
+
+        if self.world_state is not None:
+            solved_rooms = self.world_state.solved_rooms()
+        else:
+            solved_rooms = {name for name, node in self.loaded_rooms()
+                            if node.puzzle and node.puzzle.get("solved", False)}
+        hint = self.hint_table.lookup(self.current_location, self.inventory, solved_rooms,
+                                      self.determine_hint_difficulty(), self.location_visits)
+
+        # Repeating a hint changes its cost, so only trust the table for new ones
+        if hint is None or hint in self.hint_history:
+            return None
+        return hint
+
+    def record_hint_state(self, state):
+        """Append a hint request to the benchmark corpus (hint_search.py)"""
+        if not self.hint_corpus_path:
+            return
+        record = {
+            "state": state,
+            "health": self.health,
+            "rooms": {name: {"solved": node.puzzle.get("solved", False),
+                             "stuck_count": node.stuck_count,
+                             "puzzle_attempts": node.puzzle_attempts}
+                      for name, node in self.loaded_rooms()}
+        }
+        with open(self.hint_corpus_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+
+    def get_optimal_hint(self):
+        """Use the hint table, falling back to A*, to find the optimal hint"""
+        best_hint = self.lookup_precomputed_hint()
+        if best_hint is None:
+            state = self.get_hint_state()
+            self.record_hint_state(state)
+            best_hint = self.search_optimal_hint(state)
+        self.hint_history.append(best_hint)
+        self.events.record(HINT, self.current_location, str(best_hint))
+        return best_hint
+
+    def request_optimal_hint(self):
+        """Ask LUMOS for the best hint; with a hint worker the search runs there and poll_hint_request applies it"""
+        if self.hint_worker is None:
+            self.lumos_message = self.get_optimal_hint()
+            return
+        self.cancel_hint_request()
+
+        best_hint = self.lookup_precomputed_hint()
+        if best_hint is not None:
+            self.hint_history.append(best_hint)
+            self.events.record(HINT, self.current_location, str(best_hint))
+            self.lumos_message = best_hint
+            return
+
+        state = self.get_hint_state()
+        self.record_hint_state(state)
+        self.pending_hint = self.hint_worker.submit(self.hint_snapshot().search_optimal_hint, state,
+                                                    self.current_location)
+        self.lumos_message = "LUMOS is thinking..."
+
+    def cancel_hint_request(self):
+        """Drop a hint still being worked out on the hint worker"""
+        if self.pending_hint:
+            self.pending_hint.cancel()
+            self.pending_hint = None
+
+    def poll_hint_request(self):
+        """Apply a finished hint search, dropping it if the player moved away"""
+        if not self.pending_hint or not self.pending_hint.done():
+            return
+
+        request = self.pending_hint
+        self.pending_hint = None
+        hint = request.result()
+        if request.location != self.current_location:
+            return
+        if hint is None:
+            # The search failed: fall back to LUMOS's general advice for the room
+            self.lumos_message = self.lumos.give_hint(self.current_location, "general")
+            return
+
+        self.hint_history.append(hint)
+        self.events.record(HINT, self.current_location, str(hint))
+        self.lumos_message = hint
+
+    def solve_puzzle(self, option_index):
+        """Attempt to solve the current puzzle"""
+        node = self.labyrinth[self.current_location]
+        puzzle = node.puzzle
+
+        if not puzzle or puzzle.get("solved", False):
+            return True
+
+        self.events.record(PUZZLE_ATTEMPT, self.current_location)
+
+        if option_index == puzzle['correct_option']:
+            self.current_message = "✅ Correct!"
+            self.score += 50
+            self.events.record(PUZZLE_SOLVED, self.current_location)
+            self.solved_puzzles += 1
+            self.invalidate_hint_cache(location=self.current_location)
+
+            # Track hint effectiveness
+            if puzzle.get("hint", "") in self.hint_history[-1:]:
+                self.hint_effectiveness[self.hint_history[-1]] = True
+
+            return True
+        else:
+            self.current_message = "❌ Incorrect. Try again."
+            self.score -= 10
+
+            # Track hint ineffectiveness
+            if puzzle.get("hint", "") in self.hint_history[-1:]:
+                self.hint_effectiveness[self.hint_history[-1]] = False
+
+            return False
+
+    def fight_boss(self, action):
+        node = self.labyrinth[self.current_location]
+        boss = node.boss
+
+        if not boss or boss.get("defeated", False):
+            return True
+
+        boss_health = self.boss_battle_state["boss_health"]
+        player_health = self.boss_battle_state["player_health"]
+
+        # Check if player has weakness item
+        has_weakness = boss.get("weakness", "") in self.inventory
+
+        # Scale boss attack and damage based on game stage
+        progress_percentage = (self.solved_puzzles / self.total_puzzles) * 100 if self.total_puzzles > 0 else 0
+        game_stage = 1 + int(progress_percentage / 20)  # 1-5 stages based on progress
+        boss_attack_multiplier = 1 + (game_stage - 1) * 0.2  # Increase attack with game stage
+        boss_damage_multiplier = 1 + (game_stage - 1) * 0.15 # Increase damage with game stage
+
+        # Handle action
+        if action == "Attack":
+            damage = random.randint(10, 20)
+            if has_weakness:
+                damage += 5
+            boss_health -= damage
+            self.message_queue.append(f"You attack for {damage} damage!")
+
+            # Boss attacks back
+            boss_attack = random.choice(boss["attacks"])
+            player_damage = int(random.randint(15, 25) * boss_damage_multiplier) #damage is now scaled
+            player_health -= player_damage
+            self.message_queue.append(f"The {boss['name']} uses {boss_attack} for {player_damage} damage!")
+
+        elif action == "Defend":
+            # Defend reduces damage
+            boss_attack = random.choice(boss["attacks"])
+            player_damage = int(random.randint(5, 15) * boss_damage_multiplier) #damage is now scaled
+            player_health -= player_damage
+            self.message_queue.append(f"You defend!")
+            self.message_queue.append(f"The {boss['name']} uses {boss_attack} for {player_damage} damage!")
+
+        elif action == f"Use {boss['weakness']}" and has_weakness:
+            # Use weakness
+            damage = random.randint(30, 50)
+            boss_health -= damage
+            self.message_queue.append(f"You use the {boss['weakness']} for {damage} damage!")
+            self.message_queue.append(f"The {boss['name']} is weakened!")
+
+        elif action == "Run away":
+            # Run attempt
+            if random.random() < 0.3:
+                self.current_message = "You escaped!"
+                self.current_screen = "game"
+                return False
+            else:
+                self.message_queue.append("Couldn't escape!")
+                boss_attack = random.choice(boss["attacks"])
+                player_damage = int(random.randint(20, 30) * boss_damage_multiplier) #damage is now scaled
+                player_health -= player_damage
+                self.message_queue.append(f"The {boss['name']} uses {boss_attack} for {player_damage} damage!")
+
+        # Update battle state
+        self.boss_battle_state["boss_health"] = boss_health
+        self.boss_battle_state["player_health"] = player_health
+
+        # Check battle outcome
+        if boss_health <= 0:
+            self.current_message = f"🎉 You defeated the {boss['name']}!"
+            self.events.record(BOSS_DEFEATED, self.current_location)
+            self.invalidate_hint_cache(location=self.current_location)
+            self.score += 100
+            self.health = player_health
+            self.current_screen = "result"
+            return True
+        elif player_health <= 0:
+            self.current_message = f"💀 You were defeated by the {boss['name']}!"
+            self.health = 0
+            self.current_screen = "game_over"
+            return False
+
+        # Continue battle
+        return "continue"
+
+    def handle_encounter_choice(self, choice_index):
+        """Handle the player's choice in an encounter"""
+        if not self.current_encounter:
+            return
+
+        action, result, points = self.current_encounter['options'][choice_index]
+        self.encounter_result = result
+        self.score += points
+
+        self.current_message = f"{result}\nScore change: {points:+d}"
+        self.current_screen = "result"
+
+    def check_node_first_visit(self):
+        current = self.labyrinth[self.current_location]
+
+        if not current.visited:
+            # Scale random encounter chance based on game stage
+            progress_percentage = (self.solved_puzzles / self.total_puzzles) * 100 if self.total_puzzles > 0 else 0
+            game_stage = 1 + int(progress_percentage / 20)  # 1-5 stages based on progress
+            encounter_chance = 0.1  # Base chance
+            encounter_chance += (game_stage - 1) * 0.05  # Increase with game stage
+            encounter_chance = min(0.3, encounter_chance) #cap the chance
+
+            # Handle random encounter (will change screen if encounter happens)
+            if random.random() < encounter_chance: #use the scaled chance
+                if self.handle_random_encounter():
+                    return
+
+            # Check for puzzle
+            if current.puzzle and not current.puzzle.get("solved", False):
+                self.current_screen = "puzzle"
+                return
+
+            # Check for boss
+            if current.boss and not current.boss.get("defeated", False):
+                self.current_screen = "boss"
+                self.boss_battle_state = {
+                    "boss_health": current.boss.get("health", 100),
+                    "player_health": self.health
+                }
+                return
+
+            # Collect items
+            if current.items:
+                items_text = ", ".join(current.items)
+                self.current_message = f"Found items: {items_text}"
+                for item in current.items:
+                    if item not in self.inventory:
+                        self.inventory.append(item)
+                        self.invalidate_hint_cache(item=item)
+                self.current_screen = "result"
+
+                self.events.record(VISITED, self.current_location)
+
+        # Update location visit counter
+        self.location_visits[self.current_location] = self.location_visits.get(self.current_location, 0) + 1
+
+    def navigate_to(self, destination):
+        """Navigate to a new location"""
+        if destination not in self.labyrinth:
+            return False
+
+        # Check if destination is locked
+        node = self.labyrinth[destination]
+        if node.locked:
+            has_all_items = self.inventory.has_all(node.required_items)
+            if not has_all_items:
+                required = ", ".join(node.required_items)
+                self.current_message = f"You need: {required} to enter."
+                self.current_screen = "result"
+                self.lumos_message = f"Find the required items: {required}"
+                return False
+
+        # Move to new location; any hint for the old one is now stale
+        self.cancel_hint_request()
+        self.current_location = destination
+        self.current_level = next((level for level, location in self.levels.items() if location == destination),
+                                  self.current_level)
+        if self.world is not None:
+            self.world.focus(destination)
+
+        # Check if this is a win condition
+        if self.current_location == "Time-Lost Library" and self.labyrinth["Time-Lost Library"].boss.get("defeated", False):
+            self.current_screen = "win"
+            self.score += 200  # Bonus for completing the game
+            return True
+
+        # Check if we should handle a first visit
+        self.check_node_first_visit()
+
+        # Update LUMOS message
+        self.lumos_message = self.lumos.give_hint(self.current_location, "general")
+
+        return True
+
+    def boss_actions(self) -> List[str]:
+        """Moves open to the player in the current boss fight"""
+        boss = self.labyrinth[self.current_location].boss
+        actions = ["Attack", "Defend"]
+        if boss.get("weakness", "") in self.inventory:
+            actions.append(f"Use {boss['weakness']}")
+        actions.append("Run away")
+        return actions
+
+    def legal_actions(self) -> List[Action]:
+        """Every action step() accepts on the current screen"""
+        screen = self.current_screen
+        if screen == "main_menu":
+            return ["start"]
+        if screen == "game":
+            return [("move", location) for location, _ in self.labyrinth[self.current_location].neighbors] + \
+                ["inventory", "hint"]
+        if screen == "puzzle":
+            options = self.labyrinth[self.current_location].puzzle['options']
+            return [("answer", i) for i in range(len(options))] + ["back"]
+        if screen == "boss":
+            return [("fight", action) for action in self.boss_actions()]
+        if screen == "encounter":
+            return [("choose", i) for i in range(len(self.current_encounter['options']))]
+        if screen == "result":
+            return ["continue"]
+        if screen == "inventory":
+            return ["back"]
+        return ["menu"]
+
+    def step(self, action: Action) -> Dict:
+        """Apply one player action and return the observation after it.
+
+        Actions, by screen: main_menu "start"; game ("move", room),
+        "inventory" and "hint"; puzzle ("answer", option index) and "back";
+        boss ("fight", one of boss_actions()); encounter ("choose", option
+        index); result "continue"; inventory "back"; game_over and win
+        "menu", which starts a new game. Anything else raises ValueError.
+        """
+        name, argument = (action, None) if isinstance(action, str) else action
+        screen = self.current_screen
+        if name == "start" and screen == "main_menu":
+            self.current_screen = "game"
+            self.check_node_first_visit()
+        elif name == "move" and screen == "game":
+            if not any(location == argument for location, _ in self.labyrinth[self.current_location].neighbors):
+                raise ValueError(f"{argument} is not next to {self.current_location}")
+            self.navigate_to(argument)
+        elif name == "inventory" and screen == "game":
+            self.current_screen = "inventory"
+        elif name == "hint" and screen == "game":
+            self.request_optimal_hint()
+            self.player_turns += 1
+        elif name == "answer" and screen == "puzzle":
+            self.selected_puzzle_option = argument
+            if self.solve_puzzle(argument):  # Puzzle solved
+                self.current_screen = "result"
+        elif name == "back" and screen in ("puzzle", "inventory"):
+            self.current_screen = "game"
+        elif name == "fight" and screen == "boss":
+            self.fight_boss(argument)
+        elif name == "choose" and screen == "encounter":
+            self.handle_encounter_choice(argument)
+        elif name == "continue" and screen == "result":
+            self.current_screen = "game"
+            self.message_queue = []
+        elif name == "menu" and screen in FINISHED_SCREENS:
+            self.restart()
+        else:
+            raise ValueError(f"{action!r} is not an action on the {screen} screen")
+        return self.observe()
+
+    def observe(self) -> Dict:
+        """What the player sees: the screen, their status and the choices on offer"""
+        node = self.labyrinth[self.current_location]
+        observation = {
+            "screen": self.current_screen,
+            "location": self.current_location,
+            "level": self.current_level,
+            "health": self.health,
+            "score": self.score,
+            "inventory": self.inventory.copy(),
+            "exits": [location for location, _ in node.neighbors],
+            "message": self.current_message,
+            "lumos": self.lumos_message,
+            "turns": self.player_turns,
+            "solved_puzzles": self.solved_puzzles,
+            "done": self.current_screen in FINISHED_SCREENS
+        }
+        if self.current_screen == "puzzle":
+            observation["question"] = node.puzzle["question"]
+            observation["options"] = list(node.puzzle["options"])
+        elif self.current_screen == "boss":
+            observation["boss"] = node.boss["name"]
+            observation["boss_health"] = self.boss_battle_state["boss_health"]
+            observation["player_health"] = self.boss_battle_state["player_health"]
+            observation["battle_log"] = list(self.message_queue)
+        elif self.current_screen == "encounter":
+            observation["encounter"] = self.current_encounter["description"]
+            observation["options"] = [option for option, _, _ in self.current_encounter["options"]]
+        return observation
+
+    def close(self):
+        """Release the streamed world and flush the event log"""
+        self.cancel_hint_request()
+        if self.world is not None:
+            self.world.close()
+        self.events.close()
+
+    def restart(self):
+        """A new game from the main menu, on the same hint worker"""
+        self.close()
+        self.__init__(self.hint_worker)
+
+
+def benchmark(steps: int, hint_share: float = 0.0, seed: int = 0) -> None:
+    """Random play through step(): steps per second, and how the games ended"""
+    random.seed(seed)
+    engine = GameEngine()
+    engine.hint_table = None  # Hints, when asked for, come from the live search
+    agent = random.Random(seed)
+    counts = {"win": 0, "game_over": 0}
+    hints = 0
+    started = time.perf_counter()
+    for _ in range(steps):
+        actions = engine.legal_actions()
+        if engine.current_screen == "game" and agent.random() >= hint_share:
+            actions.remove("hint")
+        action = agent.choice(actions)
+        if action == "menu":
+            counts[engine.current_screen] += 1
+        hints += action == "hint"
+        engine.step(action)
+    seconds = time.perf_counter() - started
+    engine.close()
+    print(f"{steps} random steps ({hints} hints) in {seconds:.2f}s: {steps / seconds:,.0f} steps/s, "
+          f"{counts['win']} wins, {counts['game_over']} games lost")
+
+
+if __name__ == "__main__":
+    # Benchmark: python engine.py [steps] [share of game-screen steps that ask for a hint]
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000, float(sys.argv[2]) if len(sys.argv) > 2 else 0.0)
\ No newline at end of file
@@ -0,0 +1,410 @@
+import os
+import struct
+import sys
+import time
+from collections import Counter
+from typing import Dict, Iterator, List, Optional, Tuple
+from inventory import Inventory
+
+# File layout (little endian): one or more sessions, each MAGIC followed by
+# records of RECORD: kind, room string id, detail string id, value. A STRING
+# record (room and detail 0, value = byte length) is followed by that many
+# utf-8 bytes and defines the next string id; id 0 is the empty string and
+# ids start over with each session. Records and sessions are only ever
+# appended, so a restarted game continues the same file.
+MAGIC = b"LEV1"
+RECORD = struct.Struct("<BIId")
+BUFFER_BYTES = 64 * 1024  # Flushed to the file once the buffer grows past this
+
+# Event kinds
+STRING = 0
+SET_INT = 1        # detail = player field, value = new int value
+SET_FLOAT = 2      # detail = player field, value = new float value
+MOVE = 3           # room = new location
+ITEM_GAINED = 4    # detail = item
+ITEM_LOST = 5      # detail = item
+ITEMS_CLEARED = 6
+VISITED = 7        # room
+DISCOVERED = 8     # room
+PUZZLE_ATTEMPT = 9  # room
+PUZZLE_SOLVED = 10  # room, detail = puzzle name (u.py) or ""
+BOSS_DEFEATED = 11  # room
+STUCK = 12         # room, value = new stuck count
+ROOM_ITEM_TAKEN = 13  # room, detail = item
+HINT = 14          # room, detail = hint text
+SESSION = 15       # Start of a session (MAGIC in the file): a new game, state starts over
+BOSS_HEALTH = 16   # room, value = new boss health
+COMPLEXITY = 17    # room, value = new puzzle complexity (a float)
+UNLOCKED = 18      # room
+FLOAT_KINDS = (SET_FLOAT, COMPLEXITY)  # Kinds whose value is read back as a float
+KIND_NAMES = {value: name for name, value in list(globals().items())
+              if name.isupper() and isinstance(value, int) and name not in ("BUFFER_BYTES",)}
+
+Event = Tuple[int, str, str, float]  # kind, room, detail, value
+# Kinds the fold also makes on the rooms, when it has them
+ROOM_KINDS = frozenset((VISITED, PUZZLE_ATTEMPT, PUZZLE_SOLVED, BOSS_DEFEATED, BOSS_HEALTH, COMPLEXITY, STUCK,
+                        UNLOCKED, ROOM_ITEM_TAKEN))
+
+
+class GameState:
+    """Everything the event log records, rebuilt by folding the current session's events.
+
+    With rooms (a labyrinth), room events are also made on the rooms
+    themselves: visits, stuck counts, puzzle attempts and solves, boss
+    health and defeats, puzzle complexity, unlocks and items taken.
+    """
+    def __init__(self, inventory: Optional[Inventory] = None, rooms=None):
+        self.rooms = rooms
+        self.values: Dict[str, object] = {}  # Player fields: health, score, hint_tokens...
+        self.location: Optional[str] = None
+        self.inventory = inventory if inventory is not None else Inventory()
+        self.visited = set()
+        self.discovered = set()
+        self.attempts: Counter = Counter()
+        self.solved = set()  # (room, puzzle)
+        self.defeated = set()
+        self.stuck: Dict[str, int] = {}
+        self.boss_health: Dict[str, int] = {}
+        self.complexity: Dict[str, float] = {}
+        self.taken = set()  # (room, item) picked up out of a room
+        self.hints: List[Tuple[str, str]] = []
+        self.events = 0
+
+    def apply(self, kind: int, room: str, detail: str, value) -> None:
+        self.events += 1
+        if kind == SESSION:
+            events = self.events
+            self.__init__(rooms=self.rooms)
+            self.events = events
+        elif kind == SET_INT or kind == SET_FLOAT:
+            self.values[detail] = value
+        elif kind == MOVE:
+            self.location = room
+        elif kind == ITEM_GAINED:
+            Inventory.append(self.inventory, detail)
+        elif kind == ITEM_LOST:
+            Inventory.remove(self.inventory, detail)
+        elif kind == ITEMS_CLEARED:
+            Inventory.clear(self.inventory)
+        elif kind == VISITED:
+            self.visited.add(room)
+        elif kind == DISCOVERED:
+            self.discovered.add(room)
+        elif kind == PUZZLE_ATTEMPT:
+            self.attempts[room] += 1
+        elif kind == PUZZLE_SOLVED:
+            self.solved.add((room, detail))
+        elif kind == BOSS_DEFEATED:
+            self.defeated.add(room)
+        elif kind == STUCK:
+            self.stuck[room] = int(value)
+        elif kind == ROOM_ITEM_TAKEN:
+            self.taken.add((room, detail))
+        elif kind == HINT:
+            self.hints.append((room, detail))
+        elif kind == BOSS_HEALTH:
+            self.boss_health[room] = int(value)
+        elif kind == COMPLEXITY:
+            self.complexity[room] = value
+        if self.rooms is not None and kind in ROOM_KINDS:
+            self.apply_to_room(kind, self.rooms[room], detail, value)
+
+    @staticmethod
+    def apply_to_room(kind: int, node, detail: str, value) -> None:
+        """Make a room event's change on the room"""
+        if kind == VISITED:
+            node.visited = True
+        elif kind == PUZZLE_ATTEMPT:
+            node.puzzle_attempts += 1
+        elif kind == PUZZLE_SOLVED:
+            if detail:
+                node.puzzle_solved.add(detail)  # u.py rooms hold several named puzzles
+            else:
+                node.puzzle["solved"] = True
+        elif kind == BOSS_DEFEATED:
+            node.boss["defeated"] = True
+        elif kind == BOSS_HEALTH:
+            node.boss["health"] = int(value)
+        elif kind == COMPLEXITY:
+            node.puzzle["complexity"] = value
+        elif kind == STUCK:
+            node.stuck_count = int(value)
+        elif kind == UNLOCKED:
+            node.locked = False
+        elif kind == ROOM_ITEM_TAKEN:
+            node.items.remove(detail)
+
+    def summary(self) -> Dict:
+        return {"events": self.events, "location": self.location, **self.values, "inventory": list(self.inventory),
+                "visited": len(self.visited), "discovered": len(self.discovered), "solved": len(self.solved),
+                "defeated": sorted(self.defeated), "hints": len(self.hints)}
+
+
+class LoggedInventory(Inventory):
+    """The game's inventory: edits are recorded as events, and the fold makes them"""
+    def __init__(self, log: "EventLog"):
+        super().__init__()
+        self.log = log
+
+    def append(self, item: str) -> None:
+        self.log.record(ITEM_GAINED, detail=item)
+
+    def remove(self, item: str) -> None:
+        if item not in self.counts:
+            raise ValueError(f"{item} is not in the inventory")
+        self.log.record(ITEM_LOST, detail=item)
+
+    def clear(self) -> None:
+        self.log.record(ITEMS_CLEARED)
+
+
+class EventLog:
+    """Append-only binary log of player state and room events, folded into state as it is written.
+
+    Records are packed into a buffer that is flushed to path (if given)
+    once it passes BUFFER_BYTES and on close; without a path the log stays
+    in memory. Each log is one session appended to the file, so earlier
+    games in it are kept. replay() rebuilds the state after any number of
+    this session's events.
+    """
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.buffer = bytearray(MAGIC)
+        self.start = 0  # Where this session begins in the file
+        self.written = 0  # Bytes of this session already flushed to path
+        self.strings: Dict[str, int] = {"": 0}
+        self.state = GameState(LoggedInventory(self))
+        self.file = None
+        if path:
+            self.file = open(path, "ab")
+            self.start = self.file.tell()
+
+    def string_id(self, text: str) -> int:
+        string_id = self.strings.get(text)
+        if string_id is None:
+            data = text.encode("utf-8")
+            string_id = self.strings[text] = len(self.strings)
+            self.buffer += RECORD.pack(STRING, 0, 0, len(data))
+            self.buffer += data
+        return string_id
+
+    def record(self, kind: int, room: str = "", detail: str = "", value=0) -> None:
+        """Append one event and apply it to the current state"""
+        strings = self.strings
+        room_id = strings.get(room)
+        if room_id is None:
+            room_id = self.string_id(room)
+        detail_id = strings.get(detail)
+        if detail_id is None:
+            detail_id = self.string_id(detail)
+        self.buffer += RECORD.pack(kind, room_id, detail_id, value)
+        self.state.apply(kind, room, detail, value)
+        if self.file is not None and len(self.buffer) >= BUFFER_BYTES:
+            self.flush()
+
+    def set(self, field: str, value) -> None:
+        self.record(SET_FLOAT if isinstance(value, float) else SET_INT, detail=field, value=value)
+
+    def flush(self) -> None:
+        if self.file is None:
+            return
+        self.file.write(self.buffer)
+        self.file.flush()
+        self.written += len(self.buffer)
+        self.buffer.clear()
+
+    def close(self) -> None:
+        if self.file is not None:
+            self.flush()
+            self.file.close()
+            self.file = None
+
+    def data(self) -> bytes:
+        """This session's log so far"""
+        if self.path and self.written:
+            with open(self.path, "rb") as f:
+                f.seek(self.start)
+                return f.read(self.written) + bytes(self.buffer)
+        return bytes(self.buffer)
+
+    def replay(self, upto: Optional[int] = None, rooms=None) -> GameState:
+        return replay(self.data(), upto, rooms)
+
+
+def read_events(data: bytes) -> Iterator[Event]:
+    """Decode a log, yielding (kind, room, detail, value) for every event.
+
+    Every session after the first starts with a SESSION event.
+    """
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError("Not an event log")
+    strings = [""]
+    offset = len(MAGIC)
+    size = RECORD.size
+    unpack = RECORD.unpack_from
+    while offset + size <= len(data):
+        if data[offset:offset + len(MAGIC)] == MAGIC:  # No event kind is the first byte of MAGIC
+            strings = [""]
+            offset += len(MAGIC)
+            yield SESSION, "", "", 0
+            continue
+        kind, room, detail, value = unpack(data, offset)
+        offset += size
+        if kind == STRING:
+            length = int(value)
+            strings.append(data[offset:offset + length].decode("utf-8"))
+            offset += length
+            continue
+        yield kind, strings[room], strings[detail], value if kind in FLOAT_KINDS else int(value)
+
+
+def stream_file(path: str) -> Iterator[Event]:
+    """read_events over a log file, e.g. one the game is still writing"""
+    with open(path, "rb") as f:
+        yield from read_events(f.read())
+
+
+def replay(data: bytes, upto: Optional[int] = None, rooms=None) -> GameState:
+    """The state after the first upto events (all of them by default), in the session they fall in.
+
+    With rooms (the labyrinth as that session's game started), the room
+    events of that session are made on them too.
+    """
+    start = 0  # First event of the session upto falls in
+    if rooms is not None:
+        for event, (kind, _, _, _) in enumerate(read_events(data)):
+            if upto is not None and event >= upto:
+                break
+            if kind == SESSION:
+                start = event
+    state = GameState()
+    for kind, room, detail, value in read_events(data):
+        if upto is not None and state.events >= upto:
+            break
+        if state.events == start:
+            state.rooms = rooms
+        state.apply(kind, room, detail, value)
+    return state
+
+
+def logged(field: str) -> property:
+    """A game attribute whose writes go through the event log and whose reads come from its fold"""
+    def get(self):
+        return self.events.state.values[field]
+
+    def set(self, value) -> None:
+        self.events.set(field, value)
+    return property(get, set)
+
+
+class LoggedGame:
+    """Base for engine.GameEngine and explorer.ExplorerEngine: game state lives in self.events.
+
+    Assigning health, score, hint_tokens, solved_puzzles, player_turns,
+    current_level, current_location or inventory records an event, and
+    reads come from the fold. Assigning labyrinth hands the rooms to the
+    fold, and room state (visits, stuck counts, puzzle attempts, solves
+    and complexity, boss health and defeats, unlocks, items taken) is
+    changed only by recording its event, so replay(data, rooms=...) over
+    the starting labyrinth rebuilds the rooms as well as the player. The
+    boss battle and per-room visit counts belong to the engine and are
+    not logged.
+    """
+    health = logged("health")
+    score = logged("score")
+    hint_tokens = logged("hint_tokens")
+    solved_puzzles = logged("solved_puzzles")
+    player_turns = logged("player_turns")
+    current_level = logged("current_level")
+
+    @property
+    def current_location(self) -> str:
+        return self.events.state.location
+
+    @current_location.setter
+    def current_location(self, room: str) -> None:
+        self.events.record(MOVE, room)
+
+    @property
+    def labyrinth(self):
+        return self.events.state.rooms
+
+    @labyrinth.setter
+    def labyrinth(self, rooms) -> None:
+        self.events.state.rooms = rooms
+
+    @property
+    def inventory(self) -> Inventory:
+        return self.events.state.inventory
+
+    @inventory.setter
+    def inventory(self, items) -> None:
+        self.events.record(ITEMS_CLEARED)
+        for item in items:
+            self.events.record(ITEM_GAINED, detail=item)
+
+
+def benchmark(events: int = 1_000_000) -> None:
+    """Cost per event of writing the log, against plain attribute writes, and of replaying it"""
+    rooms = [f"R{i}" for i in range(1000)]
+    items = [f"Item {i}" for i in range(50)]
+
+    class Plain:
+        pass
+
+    plain = Plain()
+    started = time.perf_counter()
+    for i in range(events):
+        plain.health = i % 100
+    plain_seconds = time.perf_counter() - started
+
+    results = {}
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_events.lev")
+    if os.path.exists(path):
+        os.remove(path)  # Left by an interrupted run; the log would append to it
+    for label, log_path in (("memory", None), ("file", path)):
+        log = EventLog(log_path)
+        log.set("health", 100)
+        started = time.perf_counter()
+        for i in range(events):
+            step = i % 10
+            if step < 6:
+                log.set("health", i % 100)
+            elif step < 8:
+                log.record(MOVE, rooms[i % len(rooms)])
+            elif step == 8:
+                log.record(ITEM_GAINED, detail=items[i % len(items)])
+            else:
+                log.record(VISITED, rooms[i % len(rooms)])
+        log.close()
+        results[label] = time.perf_counter() - started
+    size = os.path.getsize(path)
+    data = open(path, "rb").read()
+    started = time.perf_counter()
+    state = replay(data)
+    replay_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    middle = replay(data, events // 2)
+    os.remove(path)
+    print(f"{events} events, {size / events:.1f} bytes/event on disk")
+    print(f"  plain attribute write {plain_seconds / events * 1e9:7.0f} ns")
+    print(f"  logged, in memory     {results['memory'] / events * 1e9:7.0f} ns")
+    print(f"  logged, to file       {results['file'] / events * 1e9:7.0f} ns")
+    print(f"  replay                {replay_seconds / (events + 1) * 1e9:7.0f} ns/event "
+          f"(final state matches: {state.summary() == log.state.summary()}, "
+          f"halfway: {middle.events} events, {len(middle.inventory)} items)")
+
+
+if __name__ == "__main__":
+    # python event_log.py replay game.lev [events]  -- state after the first events
+    # python event_log.py stats game.lev            -- counts per event kind
+    # python event_log.py [events]                  -- benchmark
+    if len(sys.argv) > 2 and sys.argv[1] == "replay":
+        with open(sys.argv[2], "rb") as f:
+            print(replay(f.read(), int(sys.argv[3]) if len(sys.argv) > 3 else None).summary())
+    elif len(sys.argv) > 2 and sys.argv[1] == "stats":
+        kinds = Counter(KIND_NAMES[kind] for kind, _, _, _ in stream_file(sys.argv[2]))
+        for name, count in kinds.most_common():
+            print(f"{name:<16} {count}")
+    else:
+        benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
\ No newline at end of file
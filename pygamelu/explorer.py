@@ -0,0 +1,753 @@
+import heapq
+import os
+import random
+import sys
+import time
+from typing import Dict, List, Optional, Tuple, Union
+from search_stats import SearchStats, SessionStats
+from pathfinding import (RoutePlanner, TravelCost, a_star_path, bidirectional_path,
+                         min_cost_per_distance, reverse_neighbors)
+from route_cache import RouteCache
+from ch import ContractionHierarchy, held_signature, route_items
+from dstar import DStarLite, changed_rooms
+from hpa import RegionRouter, level_regions
+from worldgen import generate_labyrinth, generated_levels
+from compact_node import NodeTable
+from inventory import Inventory
+from event_log import EventLog, LoggedGame, DISCOVERED, PUZZLE_SOLVED, ROOM_ITEM_TAKEN, UNLOCKED, HINT
+try:
+    from csr_graph import CSRGraph
+except ImportError:  # NumPy missing: large labyrinths stay on the Node dicts
+    CSRGraph = None
+
+CSR_MIN_ROOMS = 1000  # Labyrinths this large also get a compact CSR graph
+HINT_LEVELS = ["vague", "moderate", "specific", "explicit"]
+
+# An action is a name, or a (name, argument) pair for the ones that need one
+Action = Union[str, Tuple[str, object]]
+
+class LUMOS:
+    """LUMOS - Labyrinth Unity Master Operating System with cost-based hint system"""
+    def __init__(self):
+        self.greetings = ["Greetings, brave adventurer! I am LUMOS, your magical guide."]
+        self.encouragements = ["Your progress is remarkable!", "You're on the right path!",
+                             "Trust in your abilities!", "The way forward becomes clearer!"]
+        # Hint levels with costs
+        self.hint_costs = {
+            "vague": 1,     # Very cryptic hint
+            "moderate": 3,  # Somewhat helpful hint
+            "specific": 5,  # Very direct hint
+            "explicit": 10  # Almost gives the answer away
+        }
+
+    def greet(self) -> str:
+        return self.greetings[0]
+
+    def encourage(self) -> str:
+        return random.choice(self.encouragements)
+
+    def give_hint(self, location: str, context: str = None, hint_level: str = "vague") -> Tuple[str, int]:
+        """Returns a hint based on location, context, and hint level with its cost."""
+        # Enhanced hint database with multiple detail levels
+        hints = {
+            "Ancient Entrance": {
+                "general": {
+                    "vague": "Ancient wisdom lies dormant in these halls...",
+                    "moderate": "The symbols here hold ancient wisdom...",
+                    "specific": "Look carefully at the arrangement of the symbols.",
+                    "explicit": "Match the symbols in order of size, smallest to largest."
+                },
+                "puzzle": {
+                    "vague": "Patterns reveal themselves to the patient observer...",
+                    "moderate": "Symbols can have multiple meanings.",
+                    "specific": "The order matters as much as the symbols themselves.",
+                    "explicit": "Arrange the stone tiles to match the ceiling pattern."
+                }
+            },
+            "Crystal Caverns": {
+                "general": {
+                    "vague": "Light and crystal dance together in harmony...",
+                    "moderate": "The crystals react to your presence in subtle ways.",
+                    "specific": "Your light source affects how the crystals behave.",
+                    "explicit": "Use the torch to activate the central crystal formation."
+                },
+                "puzzle": {
+                    "vague": "Reflections hold more than meets the eye...",
+                    "moderate": "The angle of light reveals hidden truths.",
+                    "specific": "Direct your torch at the largest crystal to reveal a path.",
+                    "explicit": "Shine your torch at the northwest crystal to open the secret passage."
+                }
+            },
+            "Shadow Corridor": {
+                "general": {
+                    "vague": "Darkness hides both danger and opportunity...",
+                    "moderate": "The shadows move in peculiar ways here.",
+                    "specific": "Some shadows are more solid than they appear.",
+                    "explicit": "Avoid the moving shadows, they will drain your health."
+                },
+                "puzzle": {
+                    "vague": "Light creates shadow, but shadow can also create light...",
+                    "moderate": "The pattern of shadows tells a story.",
+                    "specific": "Project shadows onto the wall markings to reveal the code.",
+                    "explicit": "Use your torch to cast specific shadow shapes on the three wall symbols."
+                }
+            }
+        }
+
+        # Default hints if location or context not found
+        default_hints = {
+            "vague": "Trust your instincts, brave one...",
+            "moderate": "The path forward is not always clear, but it exists.",
+            "specific": "Your current situation demands careful observation.",
+            "explicit": "Look for the unusual pattern - that's your next step."
+        }
+
+        # Use default hint level if invalid level provided
+        if hint_level not in self.hint_costs:
+            hint_level = "vague"
+
+        # Get the appropriate hint
+        if location in hints and context in hints[location]:
+            hint = hints[location][context].get(hint_level, hints[location][context]["vague"])
+        else:
+            hint = default_hints.get(hint_level, default_hints["vague"])
+
+        return hint, self.hint_costs[hint_level]
+
+
+class Node:
+    def __init__(self, name: str, description: str, neighbors: List[Tuple[str, int]],
+                 items: List[str] = None, required_items: List[str] = None,
+                 hazards: Dict[str, int] = None, puzzles: Dict[str, int] = None,
+                 position: Tuple[int, int] = (0, 0)):
+        self.name = name
+        self.description = description
+        self.neighbors = neighbors
+        self.items = items or []
+        self.required_items = required_items or []
+        self.visited = False
+        self.locked = True if required_items else False
+        self.hazards = hazards or {}  # Dict of hazard_name: damage_value
+        self.puzzles = puzzles or {}  # Dict of puzzle_name: reward_value
+        self.puzzle_solved = set()    # Track which puzzles have been solved
+        self.position = position      # For map rendering (x, y) coordinates
+
+
+class PathNode:
+    """Node class for UCS pathfinding"""
+    def __init__(self, state: str, parent=None, action=None, path_cost=0):
+        self.state = state
+        self.parent = parent
+        self.action = action
+        self.path_cost = path_cost
+        self.depth = parent.depth + 1 if parent else 0
+
+    def __lt__(self, other):
+        return self.path_cost < other.path_cost
+
+
+class ExplorerEngine(LoggedGame):
+    """The rules of u.py's labyrinth (hazards, paid hints, route planning), without pygame.
+
+    The same step/legal_actions/observe interface as engine.GameEngine,
+    over the intro, game, hint_selection and game_over screens. What the
+    player is told goes to self.messages as (text, tone) pairs, tone being
+    info, good, bad, notice or lumos; u.py's LabyrinthGame shows them in
+    its message box and turns clicks into actions.
+    """
+    def __init__(self):
+        # Game state lives in the event log, whose fold also makes room changes; LUMOS_EVENT_LOG appends it to a file
+        self.events = EventLog(os.environ.get("LUMOS_EVENT_LOG"))
+
+        # Game state
+        self.levels = {1: "Ancient Entrance", 2: "Crystal Caverns", 3: "Shadow Corridor"}
+        # LUMOS_ROOMS=n plays a generated labyrinth of n rooms (seeded by LUMOS_SEED)
+        generated_rooms = int(os.environ.get("LUMOS_ROOMS", 0))
+        if generated_rooms:
+            self.levels = generated_levels(generated_rooms)
+        self.current_location = self.levels[1]
+        self.inventory = Inventory()
+        self.health = 100
+        self.score = 0
+        if generated_rooms:
+            # LUMOS_COMPACT_NODES=1 builds the generated rooms as slotted CompactNodes
+            node_cls = NodeTable().node if os.environ.get("LUMOS_COMPACT_NODES") else Node
+            self.labyrinth = generate_labyrinth(generated_rooms, node_cls, int(os.environ.get("LUMOS_SEED", 0)))
+        else:
+            self.labyrinth = self._create_labyrinth()
+        self.cost_per_distance = min_cost_per_distance(self.labyrinth)  # Scales the A* heuristic
+        self.graph = None
+        self.build_graph()
+        self.reverse_neighbors = None  # Built on the first bidirectional query
+        self.replanner = None  # DStarLite kept between replan_route calls to the same goal
+        self.replanner_inventory = []
+        self.region_router = None  # RegionRouter over self.levels, built on the first region_route
+        self.region_router_inventory = []
+        self.hint_history = []
+        self.lumos = LUMOS()
+        self.current_screen = "intro"  # intro, game, hint_selection, game_over
+        self.messages: List[Tuple[str, str]] = []  # What the last step told the player
+
+        # Hint system mechanics
+        self.hint_tokens = 3  # Player starts with 3 free hint tokens
+        self.hint_requests = {}  # Track how many hints requested per location
+        self.hint_penalty_threshold = 3  # After this many hints, penalties apply
+        self.consecutive_hint_count = 0  # Track consecutive hint requests
+        self.hint_context = "general"  # Default hint context
+
+        # Combat & health mechanics
+        self.healing_items = {"Health Potion": 20, "Magic Elixir": 50}
+        self.protection_items = {"Shield": 50, "Magic Amulet": 75}
+
+        # Shortest-path trees reused by route questions until the inventory changes edge weights
+        self.route_cache = RouteCache(self.labyrinth, self.protection_items)
+        self.route_cache.inventory_changed(self.inventory)
+        # Preprocessed by ch.build_hierarchy, if a file exists for this labyrinth and inventory
+        self.route_items = route_items(self.labyrinth, self.protection_items)  # Held items that change route costs
+        self.route_hierarchy = ContractionHierarchy.load_for(self.labyrinth, self.inventory, self.protection_items,
+                                                             relevant=self.route_items)
+
+        # Score mechanics - track progress
+        self.discovered_locations = set()
+        self.completed_puzzles = set()
+
+        # Per-session search histograms, written to LUMOS_SEARCH_STATS (.json or .csv) on quit
+        self.search_stats = SessionStats()
+        self.search_stats_path = os.environ.get("LUMOS_SEARCH_STATS")
+        self.last_search_stats = None
+
+    def _create_labyrinth(self):
+        """Create a labyrinth structure with hazards, puzzles, and rewards"""
+        return {
+            "Ancient Entrance": Node(
+                name="Ancient Entrance",
+                description="A mysterious entrance with ancient symbols carved into the walls.",
+                neighbors=[("Crystal Caverns", 5), ("Shadow Corridor", 8)],
+                items=["Torch"],
+                puzzles={"Symbol Alignment": 15},  # Solving gives 15 points
+                position=(20, 50)  # Position for map display
+            ),
+            "Crystal Caverns": Node(
+                name="Crystal Caverns",
+                description="Glowing crystals illuminate this beautiful cavern.",
+                neighbors=[("Ancient Entrance", 5), ("Shadow Corridor", 3)],
+                items=["Light Crystal"],
+                required_items=["Torch"],
+                hazards={"Crystal Shards": 5},  # 5 health damage if not careful
+                puzzles={"Crystal Alignment": 20},  # Solving gives 20 points
+                position=(60, 20)  # Position for map display
+            ),
+            "Shadow Corridor": Node(
+                name="Shadow Corridor",
+                description="A dark corridor where shadows seem to move on their own.",
+                neighbors=[("Ancient Entrance", 8), ("Crystal Caverns", 3)],
+                items=["Health Potion", "Shield"],
+                hazards={"Living Shadows": 15},  # 15 health damage per turn if not solved
+                puzzles={"Shadow Projection": 25},  # Solving gives 25 points
+                position=(80, 70)  # Position for map display
+            )
+        }
+
+    def say(self, text: str, tone: str = "info") -> None:
+        """Tell the player something; the window shows it in its message box"""
+        self.messages.append((text, tone))
+
+    def build_graph(self) -> None:
+        """Keep a CSR copy of large labyrinths for the array-based searches"""
+        if CSRGraph is not None and len(self.labyrinth) >= CSR_MIN_ROOMS:
+            self.graph = CSRGraph.from_labyrinth(self.labyrinth)
+        else:
+            self.graph = None
+
+    def uniform_cost_search(self, start: str, goal: str) -> List[str]:
+        """Implement UCS to find the optimal path through the labyrinth"""
+        if self.graph is not None:
+            stats = SearchStats("path", "csr-ucs", {"start": start, "goal": goal})
+            path = self.graph.uniform_cost_search(start, goal, self.inventory, self.protection_items, stats)
+            self.last_search_stats = stats
+            self.search_stats.add(stats)
+            return path
+
+        frontier = []
+        explored = set()
+        start_node = PathNode(state=start)
+        heapq.heappush(frontier, start_node)
+        stats = SearchStats("path", "ucs", {"start": start, "goal": goal})
+        self.last_search_stats = stats
+        stats.nodes_generated = 1
+        stats.frontier(1)
+        protected = self.inventory.has_any(self.protection_items)
+
+        while frontier:
+            node = heapq.heappop(frontier)
+            if node.state == goal:
+                self.search_stats.add(stats.finish("goal"))
+                path = []
+                while node.parent:
+                    path.append(node.action)
+                    node = node.parent
+                return list(reversed(path))
+
+            if node.state in explored:
+                stats.duplicate_pops += 1
+                continue
+            explored.add(node.state)
+            stats.nodes_expanded += 1
+            stats.depth(node.depth)
+
+            current_room = self.labyrinth[node.state]
+            for next_location, cost in current_room.neighbors:
+                if next_location not in explored:
+                    # Consider inventory requirements in pathfinding
+                    next_room = self.labyrinth[next_location]
+                    if next_room.required_items and not self.inventory.has_all(next_room.required_items):
+                        # Increase cost for locked rooms
+                        adjusted_cost = cost * 3
+                    else:
+                        adjusted_cost = cost
+
+                    # Consider hazards in pathfinding
+                    if next_room.hazards and not protected:
+                        # Increase cost for dangerous rooms without protection
+                        hazard_penalty = sum(damage for damage in next_room.hazards.values())
+                        adjusted_cost += hazard_penalty / 2
+
+                    child = PathNode(
+                        state=next_location,
+                        parent=node,
+                        action=f"Move to {next_location}",
+                        path_cost=node.path_cost + adjusted_cost
+                    )
+                    heapq.heappush(frontier, child)
+                    stats.nodes_generated += 1
+            stats.frontier(len(frontier))
+
+        self.search_stats.add(stats.finish("exhausted"))
+        return []
+
+    def find_path(self, start: str, goal: str, method: str = "astar") -> List[str]:
+        """Shortest path with the same costs as uniform_cost_search.
+
+        method is "ucs", "astar" (map-distance heuristic), "bidirectional"
+        (Dijkstra from both ends), "bidirectional-astar" or "ch" (the
+        preprocessed route hierarchy, falling back to "astar" when there is
+        none for the current inventory); the bidirectional searches pay off
+        on long routes through large labyrinths.
+        """
+        if method == "ucs":
+            return self.uniform_cost_search(start, goal)
+        if method == "ch":
+            hierarchy = self.route_hierarchy
+            if hierarchy is not None and hierarchy.cost_sig == held_signature(self.inventory, self.route_items):
+                stats = SearchStats("path", "ch", {"start": start, "goal": goal})
+                path = hierarchy.route(start, goal, stats)
+                self.last_search_stats = stats
+                self.search_stats.add(stats)
+                return path
+            method = "astar"
+        travel_cost = TravelCost(self.labyrinth, self.inventory, self.protection_items)
+        stats = SearchStats("path", method, {"start": start, "goal": goal})
+        if method == "astar":
+            path = a_star_path(self.labyrinth, start, goal, travel_cost, self.cost_per_distance, stats)
+        elif method in ("bidirectional", "bidirectional-astar"):
+            if self.reverse_neighbors is None:
+                self.reverse_neighbors = reverse_neighbors(self.labyrinth)
+            ratio = self.cost_per_distance if method == "bidirectional-astar" else 0.0
+            path = bidirectional_path(self.labyrinth, start, goal, travel_cost, ratio, self.reverse_neighbors, stats)
+        else:
+            raise ValueError(f"Unknown path search method: {method}")
+        self.last_search_stats = stats
+        self.search_stats.add(stats)
+        return path
+
+    def route_to(self, goal: str, start: Optional[str] = None) -> List[str]:
+        """Cached uniform_cost_search route, answered from a shortest-path tree"""
+        return self.route_cache.route(start or self.current_location, goal, self.inventory)
+
+    def plan_route(self, goal: str, start: Optional[str] = None) -> List[str]:
+        """Cheapest route that picks up the items each door on the way needs"""
+        start = start or self.current_location
+        planner = RoutePlanner(self.labyrinth, self.protection_items, self.cost_per_distance)
+        stats = SearchStats("route", "item-route", {"start": start, "goal": goal})
+        path = planner.plan(start, [goal], self.inventory, stats)
+        self.last_search_stats = stats
+        self.search_stats.add(stats)
+        return path
+
+    def replan_route(self, goal: str, start: Optional[str] = None) -> List[str]:
+        """Route to goal that repairs the previous one instead of searching again.
+
+        Moving and inventory changes are picked up here; code that edits a
+        room's required_items or hazards should also call
+        self.replanner.rooms_changed with that room.
+        """
+        start = start or self.current_location
+        travel_cost = TravelCost(self.labyrinth, self.inventory, self.protection_items)
+        replanner = self.replanner
+        if replanner is None or replanner.goal != goal or replanner.labyrinth is not self.labyrinth:
+            if self.reverse_neighbors is None:
+                self.reverse_neighbors = reverse_neighbors(self.labyrinth)
+            replanner = self.replanner = DStarLite(self.labyrinth, start, goal, travel_cost,
+                                                   self.cost_per_distance, self.reverse_neighbors)
+        else:
+            replanner.move_to(start)
+            rooms = changed_rooms(self.labyrinth, self.replanner_inventory, self.inventory, self.protection_items)
+            if rooms:
+                replanner.rooms_changed(rooms, travel_cost)
+        self.replanner_inventory = list(self.inventory)
+        stats = SearchStats("path", "dstar-lite", {"start": start, "goal": goal})
+        path = replanner.route(stats)
+        self.last_search_stats = stats
+        self.search_stats.add(stats)
+        return path
+
+    def region_route(self, goal: str, start: Optional[str] = None) -> List[str]:
+        """Route planned level by level; only levels whose rooms changed cost are rebuilt"""
+        start = start or self.current_location
+        travel_cost = TravelCost(self.labyrinth, self.inventory, self.protection_items)
+        router = self.region_router
+        if router is None or router.labyrinth is not self.labyrinth:
+            router = self.region_router = RegionRouter(self.labyrinth, level_regions(self.labyrinth, self.levels),
+                                                       travel_cost)
+        else:
+            rooms = changed_rooms(self.labyrinth, self.region_router_inventory, self.inventory, self.protection_items)
+            router.rooms_changed(rooms, travel_cost)
+        self.region_router_inventory = list(self.inventory)
+        stats = SearchStats("path", "region", {"start": start, "goal": goal})
+        path = router.route(start, goal, stats)
+        self.last_search_stats = stats
+        self.search_stats.add(stats)
+        return path
+
+    def get_hint_options(self) -> List[str]:
+        """Get available hint options based on current tokens and costs"""
+        hint_options = []
+
+        # Add free hint if player has tokens
+        if self.hint_tokens > 0:
+            hint_options.append(f"1. Vague hint (Free - {self.hint_tokens} tokens left)")
+        else:
+            hint_options.append(f"1. Vague hint (Cost: {self.lumos.hint_costs['vague']} points)")
+
+        # Add paid hint options
+        hint_options.append(f"2. Moderate hint (Cost: {self.lumos.hint_costs['moderate']} points)")
+        hint_options.append(f"3. Specific hint (Cost: {self.lumos.hint_costs['specific']} points)")
+        hint_options.append(f"4. Explicit hint (Cost: {self.lumos.hint_costs['explicit']} points)")
+
+        return hint_options
+
+    def request_hint(self, choice: int) -> None:
+        """Handle player hint requests with cost system and consequences"""
+        # Track hint requests for this location
+        self.hint_requests[self.current_location] = self.hint_requests.get(self.current_location, 0) + 1
+        self.consecutive_hint_count += 1
+
+        if isinstance(choice, int) and 1 <= choice <= 4:
+            selected_level = HINT_LEVELS[choice-1]
+
+            # Calculate cost with penalties
+            base_cost = self.lumos.hint_costs[selected_level]
+            penalty_multiplier = 1.0
+
+            # Apply penalties for excessive hints at this location
+            if self.hint_requests[self.current_location] > self.hint_penalty_threshold:
+                penalty_multiplier = 1.5
+                self.say("\n💫 LUMOS: The magic here grows weaker with repeated questions...", "lumos")
+
+            # Apply penalty for consecutive hints anywhere
+            if self.consecutive_hint_count > 2:
+                penalty_multiplier += 0.5
+                self.say("\n💫 LUMOS: My energy drains with so many questions in succession...", "lumos")
+
+            final_cost = round(base_cost * penalty_multiplier)
+
+            # Check if player has tokens for vague hints
+            if choice == 1 and self.hint_tokens > 0:
+                self.hint_tokens -= 1
+                self.say(f"\n💫 LUMOS is using one of your hint tokens. {self.hint_tokens} tokens remaining.", "notice")
+                cost_applied = 0
+            else:
+                # Apply the cost
+                if self.score >= final_cost:
+                    self.score -= final_cost
+                    cost_applied = final_cost
+                    if penalty_multiplier > 1.0:
+                        self.say("\n💫 LUMOS: The magic requires more energy due to repeated inquiries...", "lumos")
+                else:
+                    self.say("\n💫 LUMOS: You do not have enough points for this level of insight.", "bad")
+                    self.say(f"Cost: {final_cost} points. Your score: {self.score} points.", "bad")
+                    return
+
+            # Add health penalty for explicit hints - Conversation has consequences!
+            if selected_level == "explicit" and choice != 1:
+                health_cost = 5
+                self.health -= health_cost
+                self.say(f"\n💫 LUMOS: Warning - such direct knowledge taxes your life force! (-{health_cost} health)", "bad")
+
+            # Deliver the hint
+# Deliver the hint
+            hint, _ = self.lumos.give_hint(self.current_location, self.hint_context, selected_level)
+            
+            # Add hint to history
+            self.hint_history.append({
+                "location": self.current_location,
+                "level": selected_level,
+                "text": hint,
+                "cost": cost_applied
+            })
+            self.events.record(HINT, self.current_location, hint)
+            
+            self.say(f"\n💫 LUMOS: {hint}", "lumos")
+            if cost_applied > 0:
+                self.say(f"Cost: {cost_applied} points deducted.", "notice")
+            
+            # Small chance (20%) for bonus encouragement from LUMOS
+            if random.random() < 0.2:
+                self.say(f"\n💫 LUMOS: {self.lumos.encourage()}", "lumos")
+                
+        elif choice == "cancel":
+            self.say("\nHint request canceled.", "info")
+            self.consecutive_hint_count -= 1  # Don't count canceled requests
+            
+        # Reset game state
+        self.current_screen = "game"
+            
+    def process_location(self) -> None:
+        """Process arrival at a new location"""
+        current = self.labyrinth[self.current_location]
+        
+        # Add location to discovered locations
+        if self.current_location not in self.discovered_locations:
+            self.discovered_locations.add(self.current_location)
+            self.events.record(DISCOVERED, self.current_location)
+            self.score += 10  # Points for discovering new location
+            self.say(f"\n🏆 +10 points for discovering {self.current_location}!", "good")
+            
+        # Apply hazards if present
+        for hazard, damage in current.hazards.items():
+            # Check for protection items
+            protected = False
+            for item in self.inventory:
+                if item in self.protection_items:
+                    protected = True
+                    protection_value = self.protection_items[item]
+                    reduced_damage = max(0, damage - (damage * protection_value / 100))
+                    if reduced_damage > 0:
+                        self.health -= reduced_damage
+                        self.say(f"\n⚠️ {hazard} causes {reduced_damage:.1f} damage (reduced by {item})!", "notice")
+                    else:
+                        self.say(f"\n🛡️ Your {item} completely protects you from {hazard}!", "good")
+                    break
+                    
+            if not protected:
+                self.health -= damage
+                self.say(f"\n⚠️ {hazard} causes {damage} damage!", "bad")
+                
+        # Handle death
+        if self.health <= 0:
+            self.health = 0
+            self.say("\n💀 You have fallen in the labyrinth! Game over.", "bad")
+            self.current_screen = "game_over"
+            return
+            
+        # Check for items to collect
+        if current.items:
+            self.say("\nYou find the following items:", "info")
+            for item in current.items[:]:  # Create a copy to iterate while removing
+                self.say(f"- {item}", "good")
+                self.inventory.append(item)
+                self.events.record(ROOM_ITEM_TAKEN, self.current_location, item)
+                
+            self.route_cache.inventory_changed(self.inventory)
+            
+        # Reset consecutive hint count when moving
+        self.consecutive_hint_count = 0
+            
+    def solve_puzzle(self) -> None:
+        """Handle puzzle solving"""
+        current = self.labyrinth[self.current_location]
+        unsolved_puzzles = set(current.puzzles.keys()) - current.puzzle_solved
+        
+        if not unsolved_puzzles:
+            self.say("\nThere are no puzzles to solve here.", "info")
+            return
+            
+        puzzle = next(iter(unsolved_puzzles))
+        reward = current.puzzles[puzzle]
+        
+        # Set hint context to puzzle for more relevant hints
+        self.hint_context = "puzzle"
+        
+        self.say(f"\nYou attempt to solve the {puzzle} puzzle...", "info")
+        
+        # Simulate puzzle solving with higher chance of success if player has received hints
+        received_hints = sum(1 for h in self.hint_history if h["location"] == self.current_location and h["level"] in ["specific", "explicit"])
+        
+        success_chance = 0.3 + (received_hints * 0.2)  # Base 30% + 20% per relevant hint
+        
+        if random.random() < success_chance:
+            self.say("\n🎮 Success! You solved the puzzle!", "good")
+            self.say(f"🏆 +{reward} points awarded!", "good")
+            self.score += reward
+            self.events.record(PUZZLE_SOLVED, self.current_location, puzzle)
+            self.completed_puzzles.add(f"{self.current_location}: {puzzle}")
+            
+            # Bonus reward: hint token for puzzle completion
+            if random.random() < 0.5:
+                self.hint_tokens += 1
+                self.say("💫 You've earned a hint token as a bonus reward!", "notice")
+                
+            # Check if room was locked and now can be unlocked
+            if current.locked and not current.required_items:
+                self.events.record(UNLOCKED, self.current_location)
+                self.say("\n🔓 This room is now fully accessible!", "good")
+        else:
+            self.say("\n❌ You failed to solve the puzzle. Try again or use a hint.", "bad")
+            
+            # Small health penalty for failed puzzle attempts
+            damage = 5
+            self.health -= damage
+            self.say(f"😵 The failed attempt cost you {damage} health!", "bad")
+            
+        # Reset hint context
+        self.hint_context = "general"
+        
+    def use_item(self, item: str) -> None:
+        """Handle item usage"""
+        if item in self.healing_items:
+            # Apply healing effect
+            heal_amount = self.healing_items[item]
+            self.health = min(100, self.health + heal_amount)
+            self.say(f"\n💊 You used {item} and recovered {heal_amount} health!", "good")
+            self.inventory.remove(item)
+            self.route_cache.inventory_changed(self.inventory)
+        elif "Torch" in item and "Crystal" in self.current_location:
+            # Special interaction in crystal caverns
+            self.say("\n✨ Your torch causes the crystals to glow brightly!", "lumos")
+            self.say("The path becomes clearer, and you feel energized.", "lumos")
+            self.score += 5
+            self.say("🏆 +5 points for clever item usage!", "good")
+        else:
+            self.say(f"\nYou cannot use {item} here effectively.", "notice")
+            
+    def travel_to(self, destination: str) -> None:
+        """Move to a neighboring room if its required items are held"""
+        next_room = self.labyrinth[destination]
+        if next_room.required_items and not self.inventory.has_all(next_room.required_items):
+            self.say(f"\n🔒 You need {', '.join(next_room.required_items)} to enter {destination}.", "bad")
+        else:
+            self.current_location = destination
+            self.say(f"\n🚶 You move to {destination}.", "info")
+            self.say(next_room.description, "info")
+            self.process_location()
+
+    def legal_actions(self) -> List[Action]:
+        """Every action step() accepts on the current screen"""
+        screen = self.current_screen
+        if screen == "intro":
+            return ["start"]
+        if screen == "game":
+            current = self.labyrinth[self.current_location]
+            actions = [("move", location) for location, _ in current.neighbors] + ["use_item"]
+            if set(current.puzzles) - current.puzzle_solved:
+                actions.append("solve_puzzle")
+            actions.append("hint")
+            return actions + [("use", item) for item in dict.fromkeys(self.inventory)]
+        if screen == "hint_selection":
+            return [("hint", level) for level in range(1, len(HINT_LEVELS) + 1)] + ["cancel"]
+        return ["menu"]
+
+    def step(self, action: Action) -> Dict:
+        """Apply one player action and return the observation after it.
+
+        Actions, by screen: intro "start"; game ("move", room),
+        "use_item", "solve_puzzle" (while a puzzle here is unsolved),
+        "hint" and ("use", item); hint_selection ("hint", level 1-4) and
+        "cancel"; game_over "menu", which starts a new game. Anything else
+        raises ValueError. Locked rooms can be tried; the move fails with a
+        message. self.messages holds what this step told the player.
+        """
+        name, argument = (action, None) if isinstance(action, str) else action
+        screen = self.current_screen
+        self.messages = []
+        if name == "start" and screen == "intro":
+            self.current_screen = "game"
+            self.say("\n🚪 Your adventure begins! Where would you like to go?")
+        elif name == "move" and screen == "game":
+            if not any(location == argument for location, _ in self.labyrinth[self.current_location].neighbors):
+                raise ValueError(f"{argument} is not next to {self.current_location}")
+            self.travel_to(argument)
+        elif name == "use_item" and screen == "game":
+            if not self.inventory:
+                self.say("\nYour inventory is empty.", "bad")
+        elif name == "solve_puzzle" and screen == "game":
+            self.solve_puzzle()
+        elif name == "hint" and screen == "game":
+            self.current_screen = "hint_selection"
+            self.say("\n💫 LUMOS: What level of guidance do you seek?", "lumos")
+        elif name == "use" and screen == "game":
+            if argument not in self.inventory:
+                raise ValueError(f"{argument} is not in the inventory")
+            self.use_item(argument)
+        elif name == "hint" and screen == "hint_selection" and argument in range(1, len(HINT_LEVELS) + 1):
+            self.request_hint(argument)
+        elif name == "cancel" and screen == "hint_selection":
+            self.request_hint("cancel")
+        elif name == "menu" and screen == "game_over":
+            self.restart()
+        else:
+            raise ValueError(f"{action!r} is not an action on the {screen} screen")
+        return self.observe()
+
+    def observe(self) -> Dict:
+        """What the player sees: the screen, their status and the choices on offer"""
+        node = self.labyrinth[self.current_location]
+        observation = {
+            "screen": self.current_screen,
+            "location": self.current_location,
+            "health": self.health,
+            "score": self.score,
+            "hint_tokens": self.hint_tokens,
+            "inventory": self.inventory.copy(),
+            "exits": [location for location, _ in node.neighbors],
+            "unsolved": sorted(set(node.puzzles) - node.puzzle_solved),
+            "discovered": len(self.discovered_locations),
+            "messages": [text for text, _ in self.messages],
+            "done": self.current_screen == "game_over"
+        }
+        if self.current_screen == "hint_selection":
+            observation["options"] = self.get_hint_options()
+        return observation
+
+    def close(self):
+        """Write the search statistics (with LUMOS_SEARCH_STATS) and flush the event log"""
+        if self.search_stats_path:
+            self.search_stats.dump(self.search_stats_path)
+        self.events.close()
+
+    def restart(self):
+        """A new game from the intro screen"""
+        self.close()
+        self.__init__()
+
+
+def benchmark(steps: int, seed: int = 0) -> None:
+    """Random play through step(): steps per second, and how the games ended"""
+    random.seed(seed)
+    engine = ExplorerEngine()
+    agent = random.Random(seed)
+    games = 0
+    started = time.perf_counter()
+    for _ in range(steps):
+        action = agent.choice(engine.legal_actions())
+        games += action == "menu"
+        engine.step(action)
+    seconds = time.perf_counter() - started
+    engine.close()
+    print(f"{steps} random steps in {seconds:.2f}s: {steps / seconds:,.0f} steps/s, {games} games lost, "
+          f"{len(engine.discovered_locations)} rooms discovered in the last one")
+
+
+if __name__ == "__main__":
+    # Benchmark: python explorer.py [steps]  (LUMOS_ROOMS=n for a generated labyrinth)
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
\ No newline at end of file
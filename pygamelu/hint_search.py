@@ -0,0 +1,481 @@
+import heapq
+import itertools
+import json
+import math
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+from search_stats import SearchStats
+
+MAX_DEPTH = 50    # Longest hint plan considered
+MAX_NODES = 1000  # Node budget per search
+
+
+def default_state_key(state: Dict) -> str:
+    return str(sorted(state.items()))
+
+
+class HintProblem:
+    """The LUMOS hint model as seen by a search strategy.
+
+    expand(state) returns (hint, cost, child_state) tuples; heuristic and
+    goal_test are the game's calculate_heuristic and goal function. The
+    optional batch_heuristic scores a list of states in one call and is
+    used for the children of each expansion.
+    """
+    def __init__(self, initial_state: Dict, expand: Callable, heuristic: Callable,
+                 goal_test: Callable, state_key: Callable = default_state_key,
+                 should_stop: Optional[Callable[[], bool]] = None,
+                 batch_heuristic: Optional[Callable[[List[Dict]], List[float]]] = None):
+        self.initial_state = initial_state
+        self.expand = expand
+        self.heuristic = heuristic
+        self.goal_test = goal_test
+        self.state_key = state_key
+        self.should_stop = should_stop or (lambda: False)
+        self.batch_heuristic = batch_heuristic
+
+    def heuristics(self, states: List[Dict]) -> List[float]:
+        if self.batch_heuristic is not None and len(states) > 1:
+            return self.batch_heuristic(states)
+        return [self.heuristic(state) for state in states]
+
+
+class SearchNode:
+    __slots__ = ("state", "parent", "action", "g", "h", "depth")
+
+    def __init__(self, state, parent=None, action=None, g=0, h=0):
+        self.state = state
+        self.parent = parent
+        self.action = action
+        self.g = g
+        self.h = h
+        self.depth = parent.depth + 1 if parent else 0
+
+    @property
+    def f(self):
+        return self.g + self.h
+
+    def path(self) -> List[str]:
+        path = []
+        node = self
+        while node.parent:
+            path.append(node.action)
+            node = node.parent
+        return list(reversed(path))
+
+
+class SearchResult:
+    """Plan found by a strategy plus what it cost to find it"""
+    def __init__(self, plan: List[str], stats: SearchStats, best: Optional[SearchNode]):
+        self.plan = plan
+        self.stats = stats
+        self.best = best
+
+    @property
+    def termination(self) -> str:
+        return self.stats.termination  # goal, budget, exhausted or cancelled
+
+
+class SearchStrategy:
+    """Base class for hint-search strategies"""
+    name = "strategy"
+
+    def __init__(self, max_depth: int = MAX_DEPTH, max_nodes: int = MAX_NODES):
+        self.max_depth = max_depth
+        self.max_nodes = max_nodes
+
+    def search(self, problem: HintProblem) -> SearchResult:
+        raise NotImplementedError
+
+    def start(self, problem: HintProblem) -> Tuple[SearchNode, SearchStats]:
+        stats = SearchStats("hint", self.name, {"location": problem.initial_state.get("location")})
+        root = SearchNode(problem.initial_state, h=problem.heuristic(problem.initial_state))
+        stats.nodes_generated = 1
+        stats.frontier(1)
+        return root, stats
+
+    def children(self, problem: HintProblem, node: SearchNode, stats: SearchStats) -> List[SearchNode]:
+        stats.nodes_expanded += 1
+        stats.depth(node.depth)
+        expanded = problem.expand(node.state)
+        values = problem.heuristics([child for _, _, child in expanded])
+        children = [SearchNode(child, node, hint, node.g + cost, h)
+                    for (hint, cost, child), h in zip(expanded, values)]
+        stats.nodes_generated += len(children)
+        return children
+
+    @staticmethod
+    def better(node: SearchNode, best: Optional[SearchNode]) -> bool:
+        """Whether node is a more promising plan than best (lowest f wins)"""
+        return node.parent is not None and (best is None or node.f < best.f)
+
+    @staticmethod
+    def result(termination: str, stats: SearchStats, best: Optional[SearchNode],
+               goal: Optional[SearchNode] = None) -> SearchResult:
+        # Without a goal, follow the most promising plan found so far
+        node = goal or best
+        return SearchResult(node.path() if node else [], stats.finish(termination), node)
+
+
+class BestFirstSearch(SearchStrategy):
+    """Best-first search over priority(node); subclasses choose the priority"""
+    def priority(self, node: SearchNode) -> float:
+        raise NotImplementedError
+
+    def search(self, problem: HintProblem) -> SearchResult:
+        root, stats = self.start(problem)
+        counter = itertools.count()  # Tie-breaker so states are never compared
+        frontier = [(self.priority(root), next(counter), root)]
+        explored = set()
+        pops = 0
+        best = None
+
+        while frontier:
+            if problem.should_stop():
+                return self.result("cancelled", stats, best)
+
+            _, _, node = heapq.heappop(frontier)
+            pops += 1
+            if problem.goal_test(node.state):
+                return self.result("goal", stats, best, goal=node)
+
+            key = problem.state_key(node.state)
+            if key in explored:
+                stats.duplicate_pops += 1
+                continue
+            explored.add(key)
+
+            if node.depth >= self.max_depth or pops > self.max_nodes:
+                return self.result("budget", stats, best)
+            if self.better(node, best):
+                best = node
+
+            entries = [(self.priority(child), next(counter), child)
+                       for child in self.children(problem, node, stats)]
+            if len(entries) > len(frontier):
+                # Re-heapifying is cheaper than pushing a wide expansion one by one
+                frontier.extend(entries)
+                heapq.heapify(frontier)
+            else:
+                for entry in entries:
+                    heapq.heappush(frontier, entry)
+            stats.frontier(len(frontier))
+
+        return self.result("exhausted", stats, best)
+
+
+class WeightedAStar(BestFirstSearch):
+    """A* with f = g + weight * h; weight 1 is plain A*"""
+    def __init__(self, weight: float = 1.0, **budget):
+        super().__init__(**budget)
+        self.weight = weight
+        self.name = "astar" if weight == 1.0 else f"wastar-{weight:g}"
+
+    def priority(self, node: SearchNode) -> float:
+        return node.g + self.weight * node.h
+
+
+class AStar(WeightedAStar):
+    def __init__(self, **budget):
+        super().__init__(1.0, **budget)
+
+
+class GreedyBestFirst(BestFirstSearch):
+    """Expands the node with the lowest h, ignoring the cost so far"""
+    name = "greedy"
+
+    def priority(self, node: SearchNode) -> float:
+        return node.h
+
+
+class BeamSearch(SearchStrategy):
+    """Breadth-wise search keeping only the `width` lowest-f nodes per depth"""
+    def __init__(self, width: int = 4, **budget):
+        super().__init__(**budget)
+        self.width = width
+        self.name = f"beam-{width}"
+
+    def search(self, problem: HintProblem) -> SearchResult:
+        root, stats = self.start(problem)
+        beam = [root]
+        seen = {problem.state_key(root.state)}
+        best = None
+
+        while beam:
+            layer = []
+            for node in beam:
+                if problem.should_stop():
+                    return self.result("cancelled", stats, best)
+                if problem.goal_test(node.state):
+                    return self.result("goal", stats, best, goal=node)
+                if node.depth >= self.max_depth or stats.nodes_expanded >= self.max_nodes:
+                    return self.result("budget", stats, best)
+                if self.better(node, best):
+                    best = node
+
+                for child in self.children(problem, node, stats):
+                    key = problem.state_key(child.state)
+                    if key in seen:
+                        stats.duplicate_pops += 1
+                    else:
+                        seen.add(key)
+                        layer.append(child)
+
+            stats.frontier(len(layer))
+            layer.sort(key=lambda n: n.f)
+            beam = layer[:self.width]
+
+        return self.result("exhausted", stats, best)
+
+
+class IDAStar(SearchStrategy):
+    """Iterative-deepening A*: depth-first within a rising f bound.
+
+    Memory is bounded by the current path rather than a frontier, at the
+    price of re-expanding shallow nodes on every iteration.
+    """
+    name = "idastar"
+
+    def search(self, problem: HintProblem) -> SearchResult:
+        root, stats = self.start(problem)
+        self.best = None
+        bound = root.f
+
+        while True:
+            outcome, next_bound = self.bounded_search(problem, root, bound, {problem.state_key(root.state)}, stats)
+            if isinstance(outcome, SearchNode):
+                return self.result("goal", stats, self.best, goal=outcome)
+            if outcome in ("cancelled", "budget"):
+                return self.result(outcome, stats, self.best)
+            if next_bound == math.inf:
+                return self.result("exhausted", stats, self.best)
+            bound = next_bound
+
+    def bounded_search(self, problem, node, bound, on_path, stats) -> Tuple[object, float]:
+        if node.f > bound:
+            return None, node.f
+        if problem.should_stop():
+            return "cancelled", bound
+        if problem.goal_test(node.state):
+            return node, bound
+        if node.depth >= self.max_depth or stats.nodes_expanded >= self.max_nodes:
+            return "budget", bound
+        if self.better(node, self.best):
+            self.best = node
+
+        children = sorted(self.children(problem, node, stats), key=lambda n: n.f)
+        # Peak memory is the children held along the current path
+        stats.frontier(len(on_path) + len(children))
+
+        next_bound = math.inf
+        for child in children:
+            key = problem.state_key(child.state)
+            if key in on_path:
+                stats.duplicate_pops += 1
+                continue
+            on_path.add(key)
+            outcome, child_bound = self.bounded_search(problem, child, bound, on_path, stats)
+            on_path.discard(key)
+            if outcome is not None:
+                return outcome, bound
+            next_bound = min(next_bound, child_bound)
+        return None, next_bound
+
+
+class TableEntry:
+    __slots__ = ("location", "h", "hints")
+
+    def __init__(self, location: str):
+        self.location = location
+        self.h = None          # Heuristic value, without terms shared by a whole search
+        self.hints = None      # generate_hints output: (hint, cost) pairs
+
+
+class TranspositionTable:
+    """Bounded LRU cache of evaluated hint-search states shared across searches.
+
+    Entries are indexed by location so world events (an item picked up, a
+    puzzle solved, a room unlocked) can drop just the states they affect.
+    A lock guards the table because searches run on the hint worker thread
+    while events arrive on the main thread.
+    """
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.by_location: Dict[str, set] = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key) -> Optional[TableEntry]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def entry(self, key, location: str) -> TableEntry:
+        """Return the entry for key, creating (and possibly evicting) as needed"""
+        entry = self.get(key)
+        if entry is not None:
+            return entry
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                entry = self.entries[key] = TableEntry(location)
+                self.by_location.setdefault(location, set()).add(key)
+                while len(self.entries) > self.max_entries:
+                    old_key, old_entry = self.entries.popitem(last=False)
+                    self.by_location[old_entry.location].discard(old_key)
+            return entry
+
+    def invalidate_location(self, location: str) -> int:
+        """Drop every cached state at location; returns how many were dropped"""
+        with self.lock:
+            keys = self.by_location.pop(location, set())
+            for key in keys:
+                self.entries.pop(key, None)
+            return len(keys)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+            self.by_location.clear()
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {"entries": len(self.entries), "hits": self.hits, "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0}
+
+
+def default_strategies() -> List[SearchStrategy]:
+    return [AStar(), WeightedAStar(2.0), WeightedAStar(5.0), GreedyBestFirst(),
+            BeamSearch(2), BeamSearch(8), IDAStar()]
+
+
+def load_corpus(path: str) -> List[Dict]:
+    """Read game states recorded by LabyrinthGame.record_hint_state"""
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def synthesize_corpus(game) -> List[Dict]:
+    """Build a corpus from every reachable state when nothing was recorded"""
+    from hint_table import StateIndexer, reachable_states
+
+    indexer = StateIndexer(game.labyrinth)
+    corpus = []
+    for location, inventory_mask, solved_mask in sorted(reachable_states(game.labyrinth, indexer, game.current_location)):
+        corpus.append({
+            "state": {
+                "location": location,
+                "inventory": [item for item in indexer.items if inventory_mask & indexer.item_bits[item]],
+                "past_hints": [],
+                "solved_puzzles": bin(solved_mask).count("1"),
+                "player_turns": 0,
+                "visited_locations": []
+            },
+            "health": 100,
+            "rooms": {room: {"solved": bool(solved_mask & (1 << i))}
+                      for i, room in enumerate(indexer.puzzle_rooms)}
+        })
+    return corpus
+
+
+def restore_recorded_state(game, record: Dict) -> None:
+    """Put the live world back into the recorded state before replaying it"""
+    game.current_location = record["state"]["location"]
+    game.solved_puzzles = record["state"].get("solved_puzzles", 0)
+    game.health = record.get("health", 100)
+    for room, flags in record.get("rooms", {}).items():
+        node = game.labyrinth[room]
+        if node.puzzle:
+            node.puzzle["solved"] = flags.get("solved", False)
+        node.stuck_count = flags.get("stuck_count", 0)
+        node.puzzle_attempts = flags.get("puzzle_attempts", 0)
+
+
+def first_step_value(game, record: Dict, plan: List[str]) -> Optional[float]:
+    """Cost plus heuristic after the plan's first hint, for comparing strategies"""
+    if not plan:
+        return None
+    state = record["state"]
+    for hint, cost in game.generate_hints(state):
+        if hint == plan[0]:
+            return cost + game.calculate_heuristic(game.apply_hint(state.copy(), hint))
+    return None
+
+
+def run_benchmark(game, corpus: List[Dict], strategies: List[SearchStrategy] = None,
+                  repeat: int = 3) -> List[Dict]:
+    """Run every strategy over the corpus and summarise the trade-offs.
+
+    Quality is measured against A*: how often a strategy picks the same first
+    hint, and how much worse its first hint scores when it doesn't.
+    """
+    strategies = strategies or default_strategies()
+    reference = AStar()
+    reference_hints = []
+    for record in corpus:
+        restore_recorded_state(game, record)
+        plan = reference.search(game.hint_problem(dict(record["state"]))).plan
+        reference_hints.append((plan[:1], first_step_value(game, record, plan)))
+
+    rows = []
+    for strategy in strategies:
+        latencies, expanded, peaks, regrets = [], [], [], []
+        agree = 0
+        for record, (reference_plan, reference_value) in zip(corpus, reference_hints):
+            restore_recorded_state(game, record)
+            for _ in range(repeat):
+                started = time.perf_counter()
+                result = strategy.search(game.hint_problem(dict(record["state"])))
+                latencies.append(time.perf_counter() - started)
+            expanded.append(result.stats.nodes_expanded)
+            peaks.append(result.stats.peak_frontier)
+            if result.plan[:1] == reference_plan:
+                agree += 1
+            value = first_step_value(game, record, result.plan)
+            if value is not None and reference_value is not None:
+                regrets.append(value - reference_value)
+
+        latencies.sort()
+        rows.append({
+            "strategy": strategy.name,
+            "mean_ms": 1000 * sum(latencies) / len(latencies),
+            "p95_ms": 1000 * latencies[int(0.95 * (len(latencies) - 1))],
+            "mean_expanded": sum(expanded) / len(expanded),
+            "max_frontier": max(peaks),
+            "agreement": agree / len(corpus),
+            "mean_regret": sum(regrets) / len(regrets) if regrets else 0.0
+        })
+    return rows
+
+
+def print_benchmark(rows: List[Dict]) -> None:
+    print(f"{'strategy':<12}{'mean ms':>10}{'p95 ms':>10}{'expanded':>10}{'frontier':>10}{'agree':>8}{'regret':>9}")
+    for row in rows:
+        print(f"{row['strategy']:<12}{row['mean_ms']:>10.2f}{row['p95_ms']:>10.2f}"
+              f"{row['mean_expanded']:>10.1f}{row['max_frontier']:>10}"
+              f"{row['agreement']:>8.0%}{row['mean_regret']:>9.2f}")
+
+
+if __name__ == "__main__":
+    # Usage: python hint_search.py [recorded_states.jsonl]
+    from engine import GameEngine
+
+    game = GameEngine()
+    game.hint_table = None  # Always exercise the live search
+    game.hint_cache = None  # ...without reusing work between strategies
+    corpus = load_corpus(sys.argv[1]) if len(sys.argv) > 1 else synthesize_corpus(game)
+    print(f"Benchmarking {len(corpus)} game states")
+    print_benchmark(run_benchmark(game, corpus))
\ No newline at end of file
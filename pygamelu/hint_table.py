@@ -0,0 +1,274 @@
+import hashlib
+import mmap
+import os
+import struct
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+# File layout (little endian):
+#   header   magic, labyrinth signature, dimension sizes, hint count, pool size
+#   offsets  uint32 start of each hint in the string pool (plus an end marker)
+#   pool     utf-8 hint strings
+#   slots    uint16 hint id per (location, inventory, solved, difficulty, visited) state
+MAGIC = b"LHT1"
+HEADER = struct.Struct("<4s8s6HI")
+MISSING = 0xFFFF
+DIFFICULTIES = ["Easy", "Medium", "Hard"]
+
+
+def room_signature(name: str, node) -> bytes:
+    """The static layout of one room, as labyrinth_signature hashes it"""
+    puzzle = getattr(node, "puzzle", None) or {}
+    boss = getattr(node, "boss", None) or {}
+    static = (name, tuple(node.neighbors), tuple(node.items), tuple(node.required_items),
+              puzzle.get("question"), boss.get("name"))
+    return repr(static).encode("utf-8")
+
+
+def labyrinth_signature(labyrinth) -> bytes:
+    """Hash of the static world layout; a table is only valid for one layout.
+
+    Labyrinths read from disk carry the hash from their file header as
+    .signature, so large ones are never walked to compute it.
+    """
+    signature = getattr(labyrinth, "signature", None)
+    if signature is not None:
+        return signature
+    digest = hashlib.blake2b(digest_size=8)
+    for name, node in labyrinth.items():
+        digest.update(room_signature(name, node))
+    return digest.digest()
+
+
+def default_table_path(labyrinth) -> str:
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        f"hints_{labyrinth_signature(labyrinth).hex()}.lht")
+
+
+class StateIndexer:
+    """Maps the discrete hint-planner inputs of a labyrinth to a dense slot index"""
+    def __init__(self, labyrinth):
+        self.locations = list(labyrinth)
+        self.items = []
+        for node in labyrinth.values():
+            for item in node.items:
+                if item not in self.items:
+                    self.items.append(item)
+        self.puzzle_rooms = [name for name, node in labyrinth.items() if node.puzzle]
+        self.neighbor_bits = max((len(node.neighbors) for node in labyrinth.values()), default=0)
+        self.location_index = {name: i for i, name in enumerate(self.locations)}
+        self.item_bits = {item: 1 << i for i, item in enumerate(self.items)}
+        self.dims = (len(self.locations), 1 << len(self.items), 1 << len(self.puzzle_rooms),
+                     len(DIFFICULTIES), 1 << self.neighbor_bits)
+
+    @property
+    def size(self) -> int:
+        total = 1
+        for dim in self.dims:
+            total *= dim
+        return total
+
+    def inventory_mask(self, inventory) -> Optional[int]:
+        mask = 0
+        for item in inventory:
+            if item not in self.item_bits:
+                return None  # Item the table was not built for
+            mask |= self.item_bits[item]
+        return mask
+
+    def slot(self, location: str, inventory_mask: int, solved_mask: int,
+             difficulty: str, visited_mask: int) -> int:
+        index = self.location_index[location]
+        index = index * self.dims[1] + inventory_mask
+        index = index * self.dims[2] + solved_mask
+        index = index * self.dims[3] + DIFFICULTIES.index(difficulty)
+        return index * self.dims[4] + visited_mask
+
+
+class HintTable:
+    """Read-only, memory-mapped table of precomputed best hints"""
+    def __init__(self, path: str, labyrinth):
+        self.indexer = StateIndexer(labyrinth)
+        self.labyrinth = labyrinth
+        with open(path, "rb") as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, signature, *dims, hint_count, pool_size = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or signature != labyrinth_signature(labyrinth):
+            raise ValueError(f"{path} was built for a different labyrinth")
+        if tuple(dims[:5]) != (len(self.indexer.locations), len(self.indexer.items),
+                               len(self.indexer.puzzle_rooms), len(DIFFICULTIES),
+                               self.indexer.neighbor_bits):
+            raise ValueError(f"{path} has unexpected dimensions")
+
+        self.hint_count = hint_count
+        self.offsets_start = HEADER.size
+        self.pool_start = self.offsets_start + 4 * (hint_count + 1)
+        self.slots_start = self.pool_start + pool_size
+        self.hint_cache = {}
+
+    @classmethod
+    def load_for(cls, labyrinth, path: str = None) -> Optional["HintTable"]:
+        """Load the table for this labyrinth, or None if it hasn't been built"""
+        path = path or default_table_path(labyrinth)
+        if not os.path.exists(path):
+            return None
+        try:
+            return cls(path, labyrinth)
+        except (ValueError, struct.error):
+            return None
+
+    def hint(self, hint_id: int) -> str:
+        if hint_id not in self.hint_cache:
+            start, end = struct.unpack_from("<2I", self.data, self.offsets_start + 4 * hint_id)
+            self.hint_cache[hint_id] = self.data[self.pool_start + start:self.pool_start + end].decode("utf-8")
+        return self.hint_cache[hint_id]
+
+    def lookup(self, location: str, inventory, solved_rooms, difficulty: str,
+               visited_neighbors) -> Optional[str]:
+        """Return the precomputed hint, or None if the state isn't in the table"""
+        indexer = self.indexer
+        inventory_mask = indexer.inventory_mask(inventory)
+        if inventory_mask is None or location not in indexer.location_index:
+            return None
+        solved_mask = sum(1 << i for i, room in enumerate(indexer.puzzle_rooms) if room in solved_rooms)
+        visited_mask = 0
+        for i, (neighbor, _) in enumerate(self.labyrinth[location].neighbors):
+            if neighbor in visited_neighbors:
+                visited_mask |= 1 << i
+
+        slot = indexer.slot(location, inventory_mask, solved_mask, difficulty, visited_mask)
+        (hint_id,) = struct.unpack_from("<H", self.data, self.slots_start + 2 * slot)
+        if hint_id == MISSING:
+            return None
+        return self.hint(hint_id)
+
+    def close(self) -> None:
+        self.data.close()
+
+
+def reachable_states(labyrinth, indexer: StateIndexer, start: str):
+    """Enumerate reachable (location, inventory mask, solved mask) states.
+
+    The player can move into a room once they hold its required items, solve
+    the puzzle where they stand, and collect a room's items after its puzzle
+    is solved (the same order check_node_first_visit enforces).
+    """
+    puzzle_bits = {room: 1 << i for i, room in enumerate(indexer.puzzle_rooms)}
+    start_state = (start, 0, 0)
+    seen = {start_state}
+    queue = deque([start_state])
+    while queue:
+        location, inventory_mask, solved_mask = queue.popleft()
+        node = labyrinth[location]
+        successors = []
+
+        for neighbor, _ in node.neighbors:
+            required = indexer.inventory_mask(labyrinth[neighbor].required_items)
+            if required is not None and required & inventory_mask == required:
+                successors.append((neighbor, inventory_mask, solved_mask))
+        if location in puzzle_bits:
+            successors.append((location, inventory_mask, solved_mask | puzzle_bits[location]))
+        if location not in puzzle_bits or solved_mask & puzzle_bits[location]:
+            successors.append((location, inventory_mask | indexer.inventory_mask(node.items), solved_mask))
+
+        for state in successors:
+            if state not in seen:
+                seen.add(state)
+                queue.append(state)
+    return seen
+
+
+def build_hint_table(game, path: str = None) -> Dict:
+    """Run the live hint search for every reachable state and write the table.
+
+    Health hints and repeated hints are not tabulated; get_optimal_hint falls
+    back to the live search for those.
+    """
+    started = time.perf_counter()
+    labyrinth = game.labyrinth
+    path = path or default_table_path(labyrinth)
+    indexer = StateIndexer(labyrinth)
+
+    # Remember the mutable world state the search reads so it can be restored
+    saved_location = game.current_location
+    saved_solved = {room: labyrinth[room].puzzle.get("solved", False) for room in indexer.puzzle_rooms}
+    saved_boss_health = {name: node.boss.get("health") for name, node in labyrinth.items() if node.boss}
+
+    slots = [MISSING] * indexer.size
+    hints: List[str] = []
+    hint_ids: Dict[str, int] = {}
+    states = reachable_states(labyrinth, indexer, saved_location)
+    try:
+        for location, inventory_mask, solved_mask in sorted(states):
+            for i, room in enumerate(indexer.puzzle_rooms):
+                labyrinth[room].puzzle["solved"] = bool(solved_mask & (1 << i))
+            game.current_location = location
+            neighbors = labyrinth[location].neighbors
+            for difficulty in DIFFICULTIES:
+                for visited_mask in range(1 << len(neighbors)):
+                    state = {
+                        "location": location,
+                        "inventory": [item for item in indexer.items if inventory_mask & indexer.item_bits[item]],
+                        "past_hints": [],
+                        "solved_puzzles": bin(solved_mask).count("1"),
+                        "player_turns": 0,
+                        "visited_locations": [{"location": neighbor, "count": 1}
+                                              for i, (neighbor, _) in enumerate(neighbors)
+                                              if visited_mask & (1 << i)],
+                        "difficulty": difficulty
+                    }
+                    hint = game.search_optimal_hint(state)
+                    if hint not in hint_ids:
+                        if len(hints) >= MISSING:
+                            raise ValueError("Too many distinct hints for a uint16 table")
+                        hint_ids[hint] = len(hints)
+                        hints.append(hint)
+                    slot = indexer.slot(location, inventory_mask, solved_mask, difficulty, visited_mask)
+                    slots[slot] = hint_ids[hint]
+    finally:
+        game.current_location = saved_location
+        for room, solved in saved_solved.items():
+            labyrinth[room].puzzle["solved"] = solved
+        for name, health in saved_boss_health.items():
+            labyrinth[name].boss["health"] = health
+
+    pool = b""
+    offsets = []
+    for hint in hints:
+        offsets.append(len(pool))
+        pool += hint.encode("utf-8")
+    offsets.append(len(pool))
+
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, labyrinth_signature(labyrinth),
+                            len(indexer.locations), len(indexer.items), len(indexer.puzzle_rooms),
+                            len(DIFFICULTIES), indexer.neighbor_bits, len(hints), len(pool)))
+        f.write(struct.pack(f"<{len(offsets)}I", *offsets))
+        f.write(pool)
+        f.write(struct.pack(f"<{len(slots)}H", *slots))
+
+    return {
+        "path": path,
+        "states": len(states),
+        "slots": len(slots),
+        "filled_slots": sum(1 for slot in slots if slot != MISSING),
+        "distinct_hints": len(hints),
+        "bytes": os.path.getsize(path),
+        "build_seconds": time.perf_counter() - started
+    }
+
+
+if __name__ == "__main__":
+    # Build step: python hint_table.py
+    from engine import GameEngine
+
+    game = GameEngine()
+    stats = build_hint_table(game)
+    print(f"Wrote {stats['path']}")
+    print(f"  reachable states: {stats['states']}")
+    print(f"  slots filled:     {stats['filled_slots']} / {stats['slots']}")
+    print(f"  distinct hints:   {stats['distinct_hints']}")
+    print(f"  table size:       {stats['bytes']} bytes")
+    print(f"  build time:       {stats['build_seconds']:.2f}s")
\ No newline at end of file
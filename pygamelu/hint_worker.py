@@ -0,0 +1,62 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, CancelledError
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class HintRequest:
+    """A LUMOS hint search running on the worker thread"""
+    def __init__(self, future, cancel_event: threading.Event, location: str):
+        self.future = future
+        self.cancel_event = cancel_event
+        self.location = location  # Where the player was when they asked
+
+    def done(self) -> bool:
+        return self.future.done()
+
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    def cancel(self) -> None:
+        """Stop the search; a running search notices at its next expansion"""
+        self.cancel_event.set()
+        self.future.cancel()
+
+    def result(self) -> Optional[str]:
+        """Return the hint, or None if the search was cancelled or failed"""
+        if self.cancelled() or not self.future.done():
+            return None
+        try:
+            return self.future.result()
+        except CancelledError:
+            return None
+        except Exception:
+            # A failed search must not take the render thread down with it
+            logger.exception("Hint search at %s failed", self.location)
+            return None
+
+
+class HintWorker:
+    """Runs hint searches off the render thread with a future-based API.
+
+    The search runs on a snapshot of the game (GameEngine.hint_snapshot)
+    taken on the main thread, so it never reads rooms or items the player is
+    changing. A thread is used rather than a process so the snapshot and the
+    shared transposition table need no pickling. The search checks the
+    request's cancel event on every expansion, so a stale request stops
+    quickly once the player moves on.
+    """
+    def __init__(self, max_workers: int = 1):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="lumos-hint")
+
+    def submit(self, search_fn: Callable[[Dict, threading.Event], Optional[str]],
+               state: Dict, location: str) -> HintRequest:
+        """Start search_fn(state, cancel_event) in the background"""
+        cancel_event = threading.Event()
+        future = self.executor.submit(search_fn, state, cancel_event)
+        return HintRequest(future, cancel_event, location)
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
\ No newline at end of file
@@ -0,0 +1,294 @@
+import heapq
+import math
+import random
+import sys
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from pathfinding import TravelCost, reverse_neighbors
+from search_stats import SearchStats
+
+
+def level_regions(labyrinth, levels: Dict[int, str]) -> Dict[str, int]:
+    """Room -> level, each room joining the level whose entry room is fewest corridors away"""
+    regions = {}
+    queue = []
+    for level, entry in sorted(levels.items()):
+        if entry in labyrinth and entry not in regions:
+            regions[entry] = level
+            queue.append(entry)
+    for room in queue:
+        for neighbor, _ in labyrinth[room].neighbors:
+            if neighbor not in regions:
+                regions[neighbor] = regions[room]
+                queue.append(neighbor)
+    for room in labyrinth:
+        regions.setdefault(room, 0)  # Cut off from every entry
+    return regions
+
+
+class RegionRouter:
+    """Two-level pathfinding in the style of HPA*, with levels as the regions.
+
+    Portals are rooms with a corridor into another region. Each region
+    stores the cheapest in-region cost between its portals, and those
+    tables plus the corridors between regions form a small abstract graph.
+    A query searches the start and goal regions room by room, the abstract
+    graph for everything in between, and expands only the chosen portal
+    hops back into rooms. Every route splits into in-region runs between
+    portals, so costs match a plain Dijkstra search. When a region's rooms
+    change, only that region's table is rebuilt.
+    """
+    def __init__(self, labyrinth, regions: Dict[str, int], travel_cost: Callable[[str, float], float]):
+        self.labyrinth = labyrinth
+        self.regions = regions
+        self.travel_cost = travel_cost
+        self.reverse = reverse_neighbors(labyrinth)
+        self.rooms: Dict[int, List[str]] = {}
+        for room, region in regions.items():
+            self.rooms.setdefault(region, []).append(room)
+        self.portals: Dict[int, List[str]] = {region: [] for region in self.rooms}
+        for room, node in labyrinth.items():
+            if any(regions[neighbor] != regions[room] for neighbor, _ in node.neighbors) or \
+                    any(regions[predecessor] != regions[room] for predecessor, _ in self.reverse[room]):
+                self.portals[regions[room]].append(room)
+        # region -> portal -> [(portal, cost)] over in-region paths
+        self.tables: Dict[int, Dict[str, List[Tuple[str, float]]]] = {}
+        self.segments: Dict[Tuple[str, str], List[str]] = {}  # Refined portal hops, per region
+        self.build_seconds = 0.0
+        for region in self.rooms:
+            self.rebuild(region)
+
+    def search(self, source: str, region: int, backward: bool = False,
+               targets=None) -> Tuple[Dict[str, float], Dict[str, str]]:
+        """Dijkstra from source that never leaves region; backward follows edges in reverse.
+
+        With targets given, stops once all of them are settled.
+        """
+        best = {source: 0.0}
+        parents = {}
+        frontier = [(0.0, source)]
+        regions = self.regions
+        remaining = set(targets) if targets is not None else None
+        while frontier:
+            g, room = heapq.heappop(frontier)
+            if g > best[room]:
+                continue
+            if remaining is not None:
+                remaining.discard(room)
+                if not remaining:
+                    break
+            if backward:
+                edges = ((predecessor, self.travel_cost(room, cost)) for predecessor, cost in self.reverse[room])
+            else:
+                edges = ((neighbor, self.travel_cost(neighbor, cost)) for neighbor, cost in self.labyrinth[room].neighbors)
+            for neighbor, cost in edges:
+                if regions[neighbor] != region:
+                    continue
+                next_g = g + cost
+                if next_g < best.get(neighbor, math.inf):
+                    best[neighbor] = next_g
+                    parents[neighbor] = room
+                    heapq.heappush(frontier, (next_g, neighbor))
+        return best, parents
+
+    def rebuild(self, region: int) -> None:
+        """Recompute the portal-to-portal costs of one region"""
+        started = time.perf_counter()
+        portals = self.portals[region]
+        table = {}
+        for portal in portals:
+            best, _ = self.search(portal, region, targets=portals)
+            table[portal] = [(other, best[other]) for other in portals if other != portal and other in best]
+        self.tables[region] = table
+        self.segments = {hop: rooms for hop, rooms in self.segments.items() if self.regions[hop[0]] != region}
+        self.build_seconds += time.perf_counter() - started
+
+    def rooms_changed(self, rooms: Iterable[str], travel_cost: Optional[Callable[[str, float], float]] = None) -> List[int]:
+        """Rebuild the regions whose in-region costs depend on these rooms"""
+        if travel_cost is not None:
+            self.travel_cost = travel_cost
+        dirty = sorted({self.regions[room] for room in rooms})
+        for region in dirty:
+            self.rebuild(region)
+        return dirty
+
+    def abstract_route(self, start: str, goal: str,
+                       stats: Optional[SearchStats] = None) -> Tuple[float, List[str], Dict, Dict]:
+        """Cost and portal sequence of the shortest route, plus the two end-region trees"""
+        start_region, goal_region = self.regions[start], self.regions[goal]
+        from_start, start_parents = self.search(start, start_region, targets=self.portals[start_region] + [goal])
+        to_goal, goal_parents = self.search(goal, goal_region, backward=True, targets=self.portals[goal_region])
+
+        best_cost = from_start.get(goal, math.inf) if start_region == goal_region else math.inf
+        best_portal = None
+        best = {}
+        parents = {}
+        frontier = []
+        for portal in self.portals[start_region]:
+            if portal in from_start:
+                best[portal] = from_start[portal]
+                parents[portal] = None
+                frontier.append((from_start[portal], portal))
+        heapq.heapify(frontier)
+        while frontier:
+            g, portal = heapq.heappop(frontier)
+            if g >= best_cost:
+                break
+            if g > best[portal]:
+                continue
+            if stats:
+                stats.nodes_expanded += 1
+            region = self.regions[portal]
+            if region == goal_region and portal in to_goal and g + to_goal[portal] < best_cost:
+                best_cost = g + to_goal[portal]
+                best_portal = portal
+            hops = list(self.tables[region].get(portal, ()))
+            hops.extend((neighbor, self.travel_cost(neighbor, cost)) for neighbor, cost in self.labyrinth[portal].neighbors
+                        if self.regions[neighbor] != region)
+            for other, cost in hops:
+                next_g = g + cost
+                if next_g < best.get(other, math.inf):
+                    best[other] = next_g
+                    parents[other] = portal
+                    heapq.heappush(frontier, (next_g, other))
+            if stats:
+                stats.frontier(len(frontier))
+
+        portals = []
+        portal = best_portal
+        while portal is not None:
+            portals.append(portal)
+            portal = parents[portal]
+        portals.reverse()
+        return best_cost, portals, start_parents, goal_parents
+
+    def refine(self, here: str, there: str) -> List[str]:
+        """Rooms after here on the cheapest in-region run to there"""
+        segment = self.segments.get((here, there))
+        if segment is None:
+            _, parents = self.search(here, self.regions[here], targets=[there])
+            segment = []
+            room = there
+            while room != here:
+                segment.append(room)
+                room = parents[room]
+            segment.reverse()
+            self.segments[here, there] = segment
+        return segment
+
+    def route(self, start: str, goal: str, stats: Optional[SearchStats] = None) -> List[str]:
+        """"Move to X" actions from start to goal, or [] if unreachable"""
+        stats = stats or SearchStats("path", "region", {"start": start, "goal": goal})
+        cost, portals, start_parents, goal_parents = self.abstract_route(start, goal, stats)
+        if cost == math.inf or start == goal:
+            stats.finish("exhausted" if cost == math.inf else "goal")
+            return []
+
+        rooms = []
+        if not portals:
+            # Cheapest inside the shared region
+            room = goal
+            while room != start:
+                rooms.append(room)
+                room = start_parents[room]
+            rooms.reverse()
+        else:
+            room = portals[0]
+            while room != start:
+                rooms.append(room)
+                room = start_parents[room]
+            rooms.reverse()
+            for here, there in zip(portals, portals[1:]):
+                if self.regions[here] == self.regions[there]:
+                    rooms.extend(self.refine(here, there))
+                else:
+                    rooms.append(there)
+            room = portals[-1]
+            while room != goal:
+                room = goal_parents[room]
+                rooms.append(room)
+        stats.depth(len(rooms))
+        stats.finish("goal")
+        return [f"Move to {room}" for room in rooms]
+
+
+def levelled_labyrinth(levels: int, side: int, node_cls, seed: int = 0,
+                       corridors: int = 4) -> Tuple[Dict, Dict[str, int], Dict[int, str]]:
+    """levels grids of side x side rooms, each joined to the next by a few corridors.
+
+    Returns the labyrinth, room -> level, and level -> entry room.
+    """
+    rng = random.Random(seed)
+    labyrinth = {}
+    regions = {}
+    for level in range(1, levels + 1):
+        for y in range(side):
+            for x in range(side):
+                neighbors = [(f"L{level}_{nx}_{ny}", rng.randint(1, 9))
+                             for nx, ny in ((x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1))
+                             if 0 <= nx < side and 0 <= ny < side]
+                roll = rng.random()
+                name = f"L{level}_{x}_{y}"
+                labyrinth[name] = node_cls(
+                    name=name,
+                    description="",
+                    neighbors=neighbors,
+                    required_items=["Torch"] if roll < 0.05 else None,
+                    hazards={"Spikes": rng.randint(2, 10)} if 0.05 <= roll < 0.15 else None,
+                    position=(((level - 1) * side + x) * 100 / (levels * side), y * 100 / side)
+                )
+                regions[name] = level
+        if level > 1:
+            for y in rng.sample(range(side), min(corridors, side)):
+                cost = rng.randint(1, 9)
+                labyrinth[f"L{level - 1}_{side - 1}_{y}"].neighbors.append((f"L{level}_0_{y}", cost))
+                labyrinth[f"L{level}_0_{y}"].neighbors.append((f"L{level - 1}_{side - 1}_{y}", cost))
+    return labyrinth, regions, {level: f"L{level}_0_0" for level in range(1, levels + 1)}
+
+
+def benchmark(levels: int, side: int, queries: int = 10, seed: int = 0) -> None:
+    """Preprocessing, query time against Dijkstra, and one-level rebuilds against a full build"""
+    from explorer import Node
+    from pathfinding import a_star_path, path_cost
+
+    labyrinth, regions, _ = levelled_labyrinth(levels, side, Node, seed)
+    travel_cost = TravelCost(labyrinth, [], {"Shield": 50})
+    started = time.perf_counter()
+    router = RegionRouter(labyrinth, regions, travel_cost)
+    build_seconds = time.perf_counter() - started
+    portals = sum(len(portals) for portals in router.portals.values())
+    print(f"{len(labyrinth)} rooms in {levels} levels, {portals} portals: built in {build_seconds:.2f}s")
+
+    rng = random.Random(seed)
+    rooms = list(labyrinth)
+    pairs = [(f"L1_0_0", f"L{levels}_{side - 1}_{side - 1}")]
+    pairs += [(rng.choice(rooms), rng.choice(rooms)) for _ in range(queries - 1)]
+    dijkstra_seconds = 0.0
+    region_seconds = [0.0, 0.0]  # Cold, then with the portal hops already refined
+    same = True
+    for start, goal in pairs:
+        started = time.perf_counter()
+        expected = a_star_path(labyrinth, start, goal, travel_cost, 0.0)
+        dijkstra_seconds += time.perf_counter() - started
+        for run in range(2):
+            started = time.perf_counter()
+            path = router.route(start, goal)
+            region_seconds[run] += time.perf_counter() - started
+        same &= math.isclose(path_cost(labyrinth, start, path, travel_cost),
+                             path_cost(labyrinth, start, expected, travel_cost))
+    print(f"  dijkstra {dijkstra_seconds / len(pairs) * 1000:.1f} ms/query, region "
+          f"{region_seconds[0] / len(pairs) * 1000:.1f} ms/query cold, "
+          f"{region_seconds[1] / len(pairs) * 1000:.1f} warm (same costs: {same})")
+
+    # A door deep inside one level opens
+    room = f"L{levels // 2 + 1}_{side // 2}_{side // 2}"
+    labyrinth[room].required_items = []
+    started = time.perf_counter()
+    router.rooms_changed([room])
+    print(f"  one level rebuilt in {(time.perf_counter() - started) * 1000:.0f} ms "
+          f"(full build {build_seconds * 1000:.0f} ms)")
+
+
+if __name__ == "__main__":
+    # Benchmark: python hpa.py [levels] [rooms per level side]
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 10, int(sys.argv[2]) if len(sys.argv) > 2 else 50)
\ No newline at end of file
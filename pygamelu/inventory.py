@@ -0,0 +1,149 @@
+import random
+import sys
+import time
+from typing import Dict, Iterable, Iterator, List, Optional
+
+
+class ItemRegistry:
+    """Item name <-> bit, shared by the inventories and locks of one game"""
+    def __init__(self, items: Iterable[str] = ()):
+        self.items: List[str] = []
+        self.bits: Dict[str, int] = {}
+        for item in items:
+            self.bit(item)
+
+    def bit(self, item: str) -> int:
+        bit = self.bits.get(item)
+        if bit is None:
+            bit = self.bits[item] = 1 << len(self.items)
+            self.items.append(item)
+        return bit
+
+    def mask(self, items: Iterable[str]) -> int:
+        """Bits of items, registering any not seen before"""
+        mask = 0
+        for item in items:
+            mask |= self.bits.get(item) or self.bit(item)
+        return mask
+
+    def names(self, mask: int) -> List[str]:
+        names = []
+        while mask:
+            low = mask & -mask
+            names.append(self.items[low.bit_length() - 1])
+            mask ^= low
+        return names
+
+
+class Inventory:
+    """The player's items: a list in pickup order over an integer bitmask.
+
+    Membership is a bit test, and has_all / has_any check a lock's items
+    with one AND however much is carried. mask is the set of held items
+    as an int, cheap to hash into search states. Duplicates (two Health
+    Potions) are kept in the list and counted, so a bit is only cleared
+    when the last copy is used. The rest of the list API the game uses
+    (append, remove, indexing, len, iteration, copy) is unchanged.
+    """
+    def __init__(self, items: Iterable[str] = (), registry: Optional[ItemRegistry] = None):
+        self.registry = registry or ItemRegistry()
+        self.items: List[str] = []
+        self.counts: Dict[str, int] = {}
+        self.mask = 0
+        for item in items:
+            self.append(item)
+
+    def __contains__(self, item) -> bool:
+        bit = self.registry.bits.get(item)
+        return bit is not None and bool(self.mask & bit)
+
+    def has_all(self, items: Iterable[str]) -> bool:
+        need = self.registry.mask(items)
+        return self.mask & need == need
+
+    def has_any(self, items: Iterable[str]) -> bool:
+        return bool(self.mask & self.registry.mask(items))
+
+    def append(self, item: str) -> None:
+        self.items.append(item)
+        self.counts[item] = self.counts.get(item, 0) + 1
+        self.mask |= self.registry.bit(item)
+
+    def extend(self, items: Iterable[str]) -> None:
+        for item in items:
+            self.append(item)
+
+    def remove(self, item: str) -> None:
+        self.items.remove(item)  # Raises ValueError like a list if not held
+        count = self.counts[item] - 1
+        if count:
+            self.counts[item] = count
+        else:
+            del self.counts[item]
+            self.mask &= ~self.registry.bits[item]
+
+    def clear(self) -> None:
+        self.items.clear()
+        self.counts.clear()
+        self.mask = 0
+
+    def copy(self) -> List[str]:
+        """A plain list snapshot, as list.copy() gave"""
+        return self.items.copy()
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.items)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def __getitem__(self, index):
+        return self.items[index]
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Inventory):
+            return self.items == other.items
+        return self.items == other
+
+    __hash__ = None  # Mutable; hash mask instead
+
+    def __repr__(self) -> str:
+        return f"Inventory({self.items!r})"
+
+
+def benchmark(sizes: List[int], checks: int = 100_000, seed: int = 0) -> None:
+    """Lock checks, membership and state keys: list against bitset, as inventories grow"""
+    rng = random.Random(seed)
+    print(f"{'items':>7} {'lock list':>10} {'lock bits':>10} {'in list':>9} {'in bits':>9} "
+          f"{'key list':>9} {'key bits':>9}   (ns per operation)")
+    for size in sizes:
+        names = [f"Item {i}" for i in range(size * 2)]
+        held = rng.sample(names, size)
+        listed = list(held)
+        inventory = Inventory(held)
+        # Three-item locks, held about half the time
+        locks = [rng.sample(held, 3) if rng.random() < 0.5 else rng.sample(held, 2) + [rng.choice(names)]
+                 for _ in range(1000)]
+        probes = [rng.choice(names) for _ in range(1000)]
+        rounds = checks // 1000
+
+        def timed(step) -> float:
+            started = time.perf_counter()
+            for _ in range(rounds):
+                step()
+            return (time.perf_counter() - started) / (rounds * 1000) * 1e9
+
+        lock_list = timed(lambda: [all(item in listed for item in lock) for lock in locks])
+        lock_bits = timed(lambda: [inventory.has_all(lock) for lock in locks])
+        in_list = timed(lambda: [item in listed for item in probes])
+        in_bits = timed(lambda: [item in inventory for item in probes])
+        key_list = timed(lambda: [frozenset(listed) for _ in probes]) if size <= 1000 else float("nan")
+        key_bits = timed(lambda: [inventory.mask for _ in probes])
+        same = all(all(item in listed for item in lock) == inventory.has_all(lock) for lock in locks)
+        print(f"{size:>7} {lock_list:>10.0f} {lock_bits:>10.0f} {in_list:>9.0f} {in_bits:>9.0f} "
+              f"{key_list:>9.0f} {key_bits:>9.0f}   same: {same}")
+
+
+if __name__ == "__main__":
+    # Benchmark: python inventory.py [items ...]
+    benchmark([int(arg) for arg in sys.argv[1:]] or [5, 50, 500, 5000])
\ No newline at end of file
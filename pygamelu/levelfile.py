@@ -0,0 +1,362 @@
+import hashlib
+import inspect
+import json
+import mmap
+import os
+import random
+import struct
+import sys
+import time
+import tracemalloc
+from typing import Dict, Iterator, List, Optional, Tuple
+from hint_table import room_signature
+
+# File layout (little endian):
+#   header   magic, room, edge, list entry and string counts, pool size,
+#            layout signature (hint_table.labyrinth_signature), start room id, puzzle count,
+#            item index entry count
+#   rooms    fixed records: name, description and extras string ids, x, y,
+#            first edge, edge count, first list entry, item and required item counts
+#   edges    target room id and cost of every corridor, grouped by room
+#   lists    string id of each item, then each required item, of every room
+#   by_name  room ids sorted by name, for binary search
+#   index    item string id, kind (ITEM_HELD, ITEM_NEEDED) and room id, sorted by
+#            item name: where each item lies, and the locks and bosses that need it
+#   offsets  start of each string in the pool (plus an end marker)
+#   pool     utf-8 strings, each stored once
+# Extras are any other Node constructor arguments (puzzle, boss, hazards,
+# puzzles), stored as one JSON string per room.
+MAGIC = b"LLV3"
+HEADER = struct.Struct("<4s5I8s3I")
+ROOM = struct.Struct("<3I2d5I")
+EDGE = struct.Struct("<Ii")
+INDEX = struct.Struct("<3I")
+ITEM_HELD = 0  # The room holds the item
+ITEM_NEEDED = 1  # The room's lock needs the item, or its boss is weak to it
+FIXED_FIELDS = {"name", "description", "neighbors", "items", "required_items", "position"}
+# The class that builds each game's built-in rooms, by the script that plays it
+BUILTIN_LABYRINTHS = {"a": ("engine", "GameEngine"), "a1": ("a1", "LabyrinthGame"), "u": ("explorer", "ExplorerEngine")}
+
+
+def default_level_path(module: str) -> str:
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), f"{module}_level.llv")
+
+
+def builtin_labyrinth(game: str) -> Dict[str, object]:
+    """The rooms game a, a1 or u starts with when no level file is given"""
+    module, cls = BUILTIN_LABYRINTHS[game]
+    return getattr(__import__(module), cls)._create_labyrinth(None)
+
+
+def _extras(node, params) -> Dict:
+    return {field: getattr(node, field) for field in params
+            if field not in FIXED_FIELDS and getattr(node, field, None)}
+
+
+def export_level(labyrinth, path: str, start: Optional[str] = None) -> Dict:
+    """Write a labyrinth of Node objects as a level file; the start defaults to its first room"""
+    names = list(labyrinth)
+    ids = {name: i for i, name in enumerate(names)}
+    strings: Dict[str, int] = {"": 0}
+
+    def string_id(text: str) -> int:
+        if text not in strings:
+            strings[text] = len(strings)
+        return strings[text]
+
+    rooms = bytearray()
+    edges = bytearray()
+    lists = []
+    index = []
+    edge_count = 0
+    puzzle_count = 0
+    signature = hashlib.blake2b(digest_size=8)
+    params = None
+    for name in names:
+        node = labyrinth[name]
+        puzzle_count += bool(getattr(node, "puzzle", None) or getattr(node, "puzzles", None))
+        signature.update(room_signature(name, node))
+        if params is None:
+            params = [field for field in inspect.signature(type(node)).parameters]
+        extras = _extras(node, params)
+        rooms += ROOM.pack(string_id(name), string_id(node.description),
+                           string_id(json.dumps(extras, sort_keys=True) if extras else ""),
+                           float(node.position[0]), float(node.position[1]),
+                           edge_count, len(node.neighbors), len(lists),
+                           len(node.items), len(node.required_items))
+        for neighbor, cost in node.neighbors:
+            if cost != int(cost):
+                raise ValueError(f"Corridor {name} -> {neighbor} has a non-integer cost")
+            edges += EDGE.pack(ids[neighbor], int(cost))
+            edge_count += 1
+        lists.extend(string_id(item) for item in node.items)
+        lists.extend(string_id(item) for item in node.required_items)
+        room = ids[name]
+        index.extend((item, ITEM_HELD, room) for item in node.items)
+        index.extend((item, ITEM_NEEDED, room) for item in node.required_items)
+        weakness = (getattr(node, "boss", None) or {}).get("weakness")
+        if weakness:
+            index.append((weakness, ITEM_NEEDED, room))
+
+    index = [(string_id(item), kind, room) for item, kind, room in sorted(set(index))]
+
+    by_name = sorted(range(len(names)), key=names.__getitem__)
+    pool = bytearray()
+    offsets = []
+    for text in strings:  # Insertion order is id order
+        offsets.append(len(pool))
+        pool += text.encode("utf-8")
+    offsets.append(len(pool))
+
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(names), edge_count, len(lists), len(strings), len(pool),
+                            signature.digest(), ids[start or names[0]], puzzle_count, len(index)))
+        f.write(rooms)
+        f.write(edges)
+        f.write(struct.pack(f"<{len(lists)}I", *lists))
+        f.write(struct.pack(f"<{len(by_name)}I", *by_name))
+        for entry in index:
+            f.write(INDEX.pack(*entry))
+        f.write(struct.pack(f"<{len(offsets)}I", *offsets))
+        f.write(pool)
+    return {"path": path, "rooms": len(names), "edges": edge_count, "strings": len(strings),
+            "puzzles": puzzle_count, "bytes": os.path.getsize(path)}
+
+
+class LevelFile:
+    """Read-only labyrinth dict over a memory-mapped level file.
+
+    Nothing is decoded up front: a room's record is read and its Node
+    built on first access, then kept so game state on it persists. Name
+    lookups binary-search the sorted name index. The start room, puzzle
+    count and layout signature come from the header, the rooms an item
+    lies in or unlocks from the item index, and map positions from the
+    room records, so the game never has to build every room for them.
+    """
+    def __init__(self, path: str, node_cls):
+        self.node_cls = node_cls
+        self.params = set(inspect.signature(node_cls).parameters)
+        with open(path, "rb") as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, self.room_count, edge_count, list_count, string_count, pool_size,
+         self.signature, start_room, self.puzzle_count, self.index_count) = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a level file (or one from an older version)")
+        self.rooms_start = HEADER.size
+        self.edges_start = self.rooms_start + ROOM.size * self.room_count
+        self.lists_start = self.edges_start + EDGE.size * edge_count
+        self.by_name_start = self.lists_start + 4 * list_count
+        self.index_start = self.by_name_start + 4 * self.room_count
+        self.offsets_start = self.index_start + INDEX.size * self.index_count
+        self.pool_start = self.offsets_start + 4 * (string_count + 1)
+        self.strings: Dict[int, str] = {}
+        self.nodes: Dict[int, object] = {}
+        self.ids: Dict[str, int] = {}  # Names already looked up
+        self.start = self.room_name(start_room)
+
+    def string(self, string_id: int) -> str:
+        text = self.strings.get(string_id)
+        if text is None:
+            start, end = struct.unpack_from("<2I", self.data, self.offsets_start + 4 * string_id)
+            text = self.strings[string_id] = self.data[self.pool_start + start:self.pool_start + end].decode("utf-8")
+        return text
+
+    def room_name(self, room: int) -> str:
+        (name_id,) = struct.unpack_from("<I", self.data, self.rooms_start + ROOM.size * room)
+        return self.string(name_id)
+
+    def _string_bytes(self, string_id: int) -> bytes:
+        start, end = struct.unpack_from("<2I", self.data, self.offsets_start + 4 * string_id)
+        return self.data[self.pool_start + start:self.pool_start + end]
+
+    def _name_bytes(self, room: int) -> bytes:
+        (name_id,) = struct.unpack_from("<I", self.data, self.rooms_start + ROOM.size * room)
+        return self._string_bytes(name_id)
+
+    def room_id(self, name: str) -> Optional[int]:
+        room = self.ids.get(name)
+        if room is not None:
+            return room
+        # UTF-8 byte order is code point order, so the probes need no decoding
+        target = name.encode("utf-8")
+        low, high = 0, self.room_count
+        while low < high:
+            middle = (low + high) // 2
+            (candidate,) = struct.unpack_from("<I", self.data, self.by_name_start + 4 * middle)
+            if self._name_bytes(candidate) < target:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.room_count:
+            (candidate,) = struct.unpack_from("<I", self.data, self.by_name_start + 4 * low)
+            if self._name_bytes(candidate) == target:
+                self.ids[name] = candidate
+                return candidate
+        return None
+
+    def indexed_rooms(self, item: str, kind: int) -> List[str]:
+        """Rooms the item index lists for item: ITEM_HELD or ITEM_NEEDED"""
+        target = item.encode("utf-8")
+        low, high = 0, self.index_count
+        while low < high:
+            middle = (low + high) // 2
+            (string_id,) = struct.unpack_from("<I", self.data, self.index_start + INDEX.size * middle)
+            if self._string_bytes(string_id) < target:
+                low = middle + 1
+            else:
+                high = middle
+        rooms = []
+        for entry in range(low, self.index_count):
+            string_id, entry_kind, room = INDEX.unpack_from(self.data, self.index_start + INDEX.size * entry)
+            if self._string_bytes(string_id) != target:
+                break
+            if entry_kind == kind:
+                rooms.append(self.room_name(room))
+        return rooms
+
+    def room_positions(self) -> Dict[str, Tuple[float, float]]:
+        """Every room's map position, from the room records without building Nodes"""
+        records = ROOM.iter_unpack(self.data[self.rooms_start:self.edges_start])
+        return {self.string(record[0]): (record[3], record[4]) for record in records}
+
+    def corridors(self) -> Iterator[Tuple[str, str]]:
+        """Every corridor as (room, neighbour), from the records without building Nodes"""
+        targets = [target for target, _ in EDGE.iter_unpack(self.data[self.edges_start:self.lists_start])]
+        for record in ROOM.iter_unpack(self.data[self.rooms_start:self.edges_start]):
+            name = self.string(record[0])
+            for target in targets[record[5]:record[5] + record[6]]:
+                yield name, self.room_name(target)
+
+    def node(self, room: int):
+        node = self.nodes.get(room)
+        if node is not None:
+            return node
+        (name_id, description_id, extras_id, x, y, first_edge, edge_count,
+         first_list, item_count, required_count) = ROOM.unpack_from(self.data, self.rooms_start + ROOM.size * room)
+        edges = struct.unpack_from(f"<{2 * edge_count}i", self.data, self.edges_start + EDGE.size * first_edge)
+        neighbors = [(self.room_name(target), cost) for target, cost in zip(edges[::2], edges[1::2])]
+        entries = struct.unpack_from(f"<{item_count + required_count}I", self.data, self.lists_start + 4 * first_list)
+        kwargs = {"name": self.string(name_id), "description": self.string(description_id), "neighbors": neighbors,
+                  "items": [self.string(entry) for entry in entries[:item_count]] or None,
+                  "required_items": [self.string(entry) for entry in entries[item_count:]] or None,
+                  "position": (x, y)}
+        if extras_id:
+            kwargs.update((field, value) for field, value in json.loads(self.string(extras_id)).items()
+                          if field in self.params)
+        node = self.nodes[room] = self.node_cls(**kwargs)
+        self.ids[node.name] = room
+        return node
+
+    def peek(self, name: str):
+        """The room's Node if it was already built, else None; never builds one"""
+        room = self.ids.get(name)
+        return None if room is None else self.nodes.get(room)
+
+    def __getitem__(self, name: str):
+        room = self.room_id(name)
+        if room is None:
+            raise KeyError(name)
+        return self.node(room)
+
+    def __contains__(self, name) -> bool:
+        return isinstance(name, str) and self.room_id(name) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        return (self.room_name(room) for room in range(self.room_count))
+
+    def __len__(self) -> int:
+        return self.room_count
+
+    def get(self, name: str, default=None):
+        room = self.room_id(name)
+        return default if room is None else self.node(room)
+
+    def keys(self) -> Iterator[str]:
+        return iter(self)
+
+    def values(self) -> Iterator:
+        return (self.node(room) for room in range(self.room_count))
+
+    def items(self) -> Iterator:
+        return ((node.name, node) for node in self.values())
+
+    def close(self) -> None:
+        self.data.close()
+
+
+def benchmark(rooms: int, lookups: int = 1000, seed: int = 0) -> None:
+    """Opening a level file versus building the same rooms as Python dicts"""
+    from engine import Node
+    from worldgen import generate_labyrinth
+
+    labyrinth = generate_labyrinth(rooms, Node, seed)
+    path = default_level_path(f"bench_{rooms}")
+    started = time.perf_counter()
+    stats = export_level(labyrinth, path)
+    export_seconds = time.perf_counter() - started
+    # What a literal _create_labyrinth evaluates: one keyword dict per room
+    params = list(inspect.signature(Node).parameters)
+    specs = [dict({"name": name, "description": node.description, "neighbors": list(node.neighbors),
+                   "items": list(node.items), "required_items": list(node.required_items),
+                   "position": node.position}, **_extras(node, params))
+             for name, node in labyrinth.items()]
+    names = list(labyrinth)
+    del labyrinth
+    # Parsing JSON stands in for evaluating the literals, so every string is created anew
+    source = json.dumps(specs)
+    del specs
+
+    rng = random.Random(seed)
+    sample = [rng.choice(names) for _ in range(lookups)]
+
+    def build_dicts():
+        return {spec["name"]: Node(**spec) for spec in json.loads(source)}
+
+    def open_level():
+        return LevelFile(path, Node)
+
+    def look_up():
+        level = LevelFile(path, Node)
+        for name in sample:
+            level[name]
+        return level
+
+    def load_all():
+        level = LevelFile(path, Node)
+        for _ in level.values():
+            pass
+        return level
+
+    # Each step runs twice: timed, then under tracemalloc for the memory it keeps
+    results = {}
+    for name, step in (("dicts", build_dicts), ("open", open_level), ("lookups", look_up), ("all", load_all)):
+        started = time.perf_counter()
+        kept = step()
+        seconds = time.perf_counter() - started
+        del kept
+        tracemalloc.start()
+        kept = step()
+        results[name] = (seconds, tracemalloc.get_traced_memory()[0])
+        tracemalloc.stop()
+        if isinstance(kept, LevelFile):
+            kept.close()
+        del kept
+    os.remove(path)
+
+    print(f"{rooms} rooms: file {stats['bytes'] / 1e6:.1f} MB ({stats['strings']} strings), "
+          f"exported in {export_seconds:.2f}s")
+    labels = {"dicts": "python dicts, all rooms", "open": "level file, open",
+              "lookups": f"level file, {lookups} rooms", "all": "level file, all rooms"}
+    for name, (seconds, kept_bytes) in results.items():
+        print(f"  {labels[name]:<26} {seconds * 1000:9.1f} ms {kept_bytes / 1e6:8.2f} MB")
+
+
+if __name__ == "__main__":
+    # python levelfile.py export a|a1|u [path]  -- write the built-in rooms as a level file
+    # python levelfile.py [rooms]               -- benchmark against Python dicts
+    if len(sys.argv) > 2 and sys.argv[1] == "export":
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        labyrinth = builtin_labyrinth(sys.argv[2])
+        print(export_level(labyrinth, sys.argv[3] if len(sys.argv) > 3 else default_level_path(sys.argv[2])))
+    else:
+        benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
\ No newline at end of file
@@ -0,0 +1,176 @@
+import os
+import random
+import sys
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+import pygame
+
+TILE = 64  # Tile side in screen pixels
+HEAT = 4   # Heat cell side in pixels; each cell takes the colour of its most common level
+HEAT_FULL = 6  # Rooms in a heat cell for full opacity
+LEVEL_COLORS = [(120, 120, 120), (173, 216, 230), (128, 0, 128), (139, 69, 19),
+                (0, 200, 0), (255, 215, 0), (255, 100, 100), (0, 150, 255)]
+
+
+class TileCache:
+    """Heatmap tiles of the discovered rooms, pre-rendered per zoom level.
+
+    At zoom level z the whole 0-100 map spans size * 2**z screen pixels and
+    is cut into TILE x TILE tiles, so a tile is blitted 1:1 with no scaling.
+    Each zoom level keeps the discovered rooms binned by tile; a newly
+    discovered room drops only the tiles it lands in, and nothing else ever
+    invalidates a tile.
+    """
+    def __init__(self, size: Tuple[int, int], zoom_levels: int):
+        self.size = size
+        self.zoom_levels = zoom_levels
+        self.positions: Dict[str, Tuple[float, float]] = {}
+        self.regions: Dict[str, int] = {}
+        self.bins: List[Dict[Tuple[int, int], List[str]]] = [{} for _ in range(zoom_levels)]
+        self.tiles: List[Dict[Tuple[int, int], pygame.Surface]] = [{} for _ in range(zoom_levels)]
+        self.discovered = None  # The discovery set being followed
+        self.seen: set = set()  # Rooms of it already binned
+        self.renders = 0
+
+    def reset(self, positions: Dict[str, Tuple[float, float]], regions: Dict[str, int]) -> None:
+        """New labyrinth: forget every bin and tile"""
+        self.positions = positions
+        self.regions = regions
+        self.bins = [{} for _ in range(self.zoom_levels)]
+        self.tiles = [{} for _ in range(self.zoom_levels)]
+        self.discovered = None
+        self.seen = set()
+
+    def scale(self, zoom: int) -> Tuple[float, float]:
+        """Screen pixels per map unit at a zoom level"""
+        return self.size[0] * 2 ** zoom / 100, self.size[1] * 2 ** zoom / 100
+
+    def update(self, discovered: set) -> int:
+        """Bin rooms discovered since the last call; returns how many were new"""
+        if discovered is not self.discovered or len(discovered) < len(self.seen):
+            # A different (e.g. restarted) discovery set: start over
+            self.reset(self.positions, self.regions)
+            self.discovered = discovered
+        if len(discovered) == len(self.seen):
+            return 0
+        new = discovered - self.seen
+        self.seen.update(new)
+        for zoom in range(self.zoom_levels):
+            sx, sy = self.scale(zoom)
+            bins, tiles = self.bins[zoom], self.tiles[zoom]
+            for room in new:
+                if room not in self.positions:
+                    continue
+                x, y = self.positions[room]
+                key = int(x * sx // TILE), int(y * sy // TILE)
+                bins.setdefault(key, []).append(room)
+                tiles.pop(key, None)
+        return len(new)
+
+    def tile(self, zoom: int, key: Tuple[int, int]) -> Optional[pygame.Surface]:
+        """The rendered tile, or None if no discovered room falls in it"""
+        surface = self.tiles[zoom].get(key)
+        if surface is not None:
+            return surface
+        rooms = self.bins[zoom].get(key)
+        if not rooms:
+            return None
+        sx, sy = self.scale(zoom)
+        cells: Dict[Tuple[int, int], Counter] = {}
+        for room in rooms:
+            x, y = self.positions[room]
+            cell = int((x * sx - key[0] * TILE) // HEAT), int((y * sy - key[1] * TILE) // HEAT)
+            cells.setdefault(cell, Counter())[self.regions.get(room, 0)] += 1
+        surface = pygame.Surface((TILE, TILE), pygame.SRCALPHA)
+        for (cx, cy), levels in cells.items():
+            level, _ = levels.most_common(1)[0]
+            alpha = 90 + 165 * min(1.0, sum(levels.values()) / HEAT_FULL)
+            color = LEVEL_COLORS[level % len(LEVEL_COLORS)]
+            surface.fill((*color, int(alpha)), (cx * HEAT, cy * HEAT, HEAT, HEAT))
+        self.tiles[zoom][key] = surface
+        self.renders += 1
+        return surface
+
+    def blit(self, screen, rect: pygame.Rect, zoom: int, view: Tuple[float, float, float, float]) -> None:
+        """Draw the tiles covering view (map units) into rect"""
+        sx, sy = self.scale(zoom)
+        left, top, right, bottom = view
+        origin_x, origin_y = rect.x - left * sx, rect.y - top * sy
+        clip = screen.get_clip()
+        screen.set_clip(rect)
+        for tx in range(int(left * sx // TILE), int(right * sx // TILE) + 1):
+            for ty in range(int(top * sy // TILE), int(bottom * sy // TILE) + 1):
+                surface = self.tile(zoom, (tx, ty))
+                if surface is not None:
+                    screen.blit(surface, (origin_x + tx * TILE, origin_y + ty * TILE))
+        screen.set_clip(clip)
+
+
+def benchmark(rooms: int, discovered: int, frames: int = 60, seed: int = 0) -> None:
+    """Whole-map frames: a circle per discovered room against cached heatmap tiles"""
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    from explorer import Node
+    from worldgen import generate_labyrinth, generated_levels
+    from hpa import level_regions
+
+    labyrinth = generate_labyrinth(rooms, Node, seed)
+    regions = level_regions(labyrinth, generated_levels(rooms))
+    positions = {name: node.position for name, node in labyrinth.items()}
+    # Discover rooms the way a player spreads out: breadth first from the start
+    seen = ["R0_0"]
+    found = {"R0_0"}
+    for room in seen:
+        if len(seen) >= discovered:
+            break
+        for neighbor, _ in labyrinth[room].neighbors:
+            if neighbor not in found and len(seen) < discovered:
+                found.add(neighbor)
+                seen.append(neighbor)
+    found = set(seen)
+    del labyrinth
+
+    pygame.init()
+    screen = pygame.Surface((1000, 700))
+    rect = pygame.Rect(660, 100, 340, 150)
+    view = (0, 0, 100, 100)
+
+    started = time.perf_counter()
+    for _ in range(frames // 10 or 1):
+        for room in found:
+            x, y = positions[room]
+            pygame.draw.circle(screen, LEVEL_COLORS[1], (int(rect.x + x * 3.4), int(rect.y + y * 1.5)), 15)
+    circle_seconds = (time.perf_counter() - started) / (frames // 10 or 1)
+
+    cache = TileCache(rect.size, 1)
+    cache.reset(positions, regions)
+    started = time.perf_counter()
+    cache.update(found)
+    cache.blit(screen, rect, 0, view)
+    cold_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    for _ in range(frames):
+        cache.update(found)
+        cache.blit(screen, rect, 0, view)
+    warm_seconds = (time.perf_counter() - started) / frames
+
+    # One more room found: only its tile is re-rendered
+    rng = random.Random(seed)
+    extra = rng.choice([room for room in positions if room not in found])
+    found.add(extra)
+    renders = cache.renders
+    started = time.perf_counter()
+    cache.update(found)
+    cache.blit(screen, rect, 0, view)
+    discover_seconds = time.perf_counter() - started
+    print(f"{rooms} rooms, {discovered} discovered, whole map in view:")
+    print(f"  circle per room {circle_seconds * 1000:8.2f} ms/frame")
+    print(f"  tiles, cold     {cold_seconds * 1000:8.2f} ms ({renders} tiles rendered)")
+    print(f"  tiles, cached   {warm_seconds * 1000:8.2f} ms/frame")
+    print(f"  one discovery   {discover_seconds * 1000:8.2f} ms ({cache.renders - renders} tile re-rendered)")
+
+
+if __name__ == "__main__":
+    # Benchmark: python map_tiles.py [rooms] [discovered]
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000,
+              int(sys.argv[2]) if len(sys.argv) > 2 else 100_000)
\ No newline at end of file
@@ -0,0 +1,470 @@
+import heapq
+import itertools
+import math
+import random
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+from search_stats import SearchStats
+
+
+class TravelCost:
+    """Cost of moving into a room, priced the way uniform_cost_search does it.
+
+    Rooms whose required items the player lacks cost three times as much,
+    and hazardous rooms add half their total damage unless the player holds
+    a protection item.
+    """
+    def __init__(self, labyrinth, inventory, protection_items):
+        self.labyrinth = labyrinth
+        self.inventory = set(inventory)
+        self.protected = any(item in protection_items for item in inventory)
+
+    def __call__(self, next_location: str, cost: float) -> float:
+        next_room = self.labyrinth[next_location]
+        if next_room.required_items and not all(item in self.inventory for item in next_room.required_items):
+            cost = cost * 3
+        if next_room.hazards and not self.protected:
+            cost += sum(damage for damage in next_room.hazards.values()) / 2
+        return cost
+
+
+def distance(a, b) -> float:
+    return math.hypot(a[0] - b[0], a[1] - b[1])
+
+
+def min_cost_per_distance(labyrinth) -> float:
+    """Smallest base edge cost per unit of map distance.
+
+    Adjusted costs are never below base costs, so the straight-line distance
+    to the goal times this ratio never overestimates the remaining cost.
+    """
+    ratio = math.inf
+    for node in labyrinth.values():
+        for neighbor, cost in node.neighbors:
+            length = distance(node.position, labyrinth[neighbor].position)
+            if length > 0:
+                ratio = min(ratio, cost / length)
+    return 0.0 if ratio == math.inf else max(ratio, 0.0)
+
+
+def reconstruct(came_from: Dict, goal: str) -> List[str]:
+    path = []
+    state = goal
+    while came_from[state][0] is not None:
+        path.append(f"Move to {state}")
+        state = came_from[state][0]
+    return list(reversed(path))
+
+
+def a_star_path(labyrinth, start: str, goal: str, travel_cost: Callable[[str, float], float],
+                cost_per_distance: Optional[float] = None,
+                stats: Optional[SearchStats] = None) -> List[str]:
+    """A* over the labyrinth; returns "Move to X" actions like uniform_cost_search.
+
+    best_g keeps the cheapest known cost of every room, so a relaxation is
+    only pushed when it improves on it and stale heap entries are skipped.
+    """
+    if cost_per_distance is None:
+        cost_per_distance = min_cost_per_distance(labyrinth)
+    stats = stats or SearchStats("path", "astar", {"start": start, "goal": goal})
+    goal_position = labyrinth[goal].position
+
+    def heuristic(state):
+        return cost_per_distance * distance(labyrinth[state].position, goal_position)
+
+    counter = itertools.count()  # Tie-breaker so equal f prefers the lower h, then FIFO
+    h = heuristic(start)
+    frontier = [(h, h, next(counter), 0, start)]
+    best_g = {start: 0}
+    came_from = {start: (None, 0)}  # room -> (previous room, moves from start)
+    stats.nodes_generated = 1
+    stats.frontier(1)
+
+    while frontier:
+        _, _, _, g, state = heapq.heappop(frontier)
+        if g > best_g[state]:
+            stats.duplicate_pops += 1  # A cheaper entry for this room was pushed later
+            continue
+        if state == goal:
+            stats.finish("goal")
+            return reconstruct(came_from, goal)
+
+        depth = came_from[state][1]
+        stats.nodes_expanded += 1
+        stats.depth(depth)
+        for next_location, cost in labyrinth[state].neighbors:
+            next_g = g + travel_cost(next_location, cost)
+            if next_g < best_g.get(next_location, math.inf):
+                best_g[next_location] = next_g
+                came_from[next_location] = (state, depth + 1)
+                h = heuristic(next_location)
+                heapq.heappush(frontier, (next_g + h, h, next(counter), next_g, next_location))
+                stats.nodes_generated += 1
+        stats.frontier(len(frontier))
+
+    stats.finish("exhausted")
+    return []
+
+
+class RoutePlanner:
+    """Cheapest routes over (room, collected items) states.
+
+    Unlike uniform_cost_search, which only makes locked rooms dearer, doors
+    are enforced exactly: a room can be entered once its required_items are
+    held, and a room's items are picked up on arrival as process_location
+    does. Only items that open doors or give protection go in the bitmask.
+
+    Keys are tracked lazily. The search starts tracking only protection
+    items and treats other doors as open; if the cheapest route found that
+    way walks through a door the player couldn't open, that door's items
+    are tracked and the search repeats. A relaxed route that checks out is
+    optimal, so most queries never pay for keys they don't need. Within a
+    search, a state is dropped when a settled state in the same room holds
+    a superset of its items at no greater cost.
+    """
+    def __init__(self, labyrinth, protection_items, cost_per_distance: float = 0.0):
+        self.labyrinth = labyrinth
+        self.cost_per_distance = cost_per_distance
+        self.items = []
+        for node in labyrinth.values():
+            for item in node.required_items:
+                if item not in self.items:
+                    self.items.append(item)
+        for item in protection_items:
+            if item not in self.items:
+                self.items.append(item)
+        self.item_bits = {item: 1 << i for i, item in enumerate(self.items)}
+        self.protection_mask = self.mask(protection_items)
+        self.required = {name: self.mask(node.required_items) for name, node in labyrinth.items()}
+        self.pickups = {name: self.mask(node.items) for name, node in labyrinth.items()}
+        self.hazard_cost = {name: sum(node.hazards.values()) / 2 for name, node in labyrinth.items()}
+
+    def mask(self, items) -> int:
+        mask = 0
+        for item in items:
+            mask |= self.item_bits.get(item, 0)
+        return mask
+
+    def plan(self, start: str, goals, inventory, stats: Optional[SearchStats] = None,
+             dominance: bool = True, lazy: bool = True) -> List[str]:
+        """Cheapest list of "Move to X" actions reaching any goal room, or [] if none can"""
+        goals = set(goals)
+        stats = stats or SearchStats("route", "item-route", {"start": start, "goals": sorted(goals)})
+        held = self.mask(inventory)
+        tracked = self.protection_mask if lazy else (1 << len(self.items)) - 1
+
+        while True:
+            rooms = self._search(start, goals, held, tracked, stats, dominance)
+            if rooms is None:
+                stats.finish("exhausted")  # Even with doors relaxed there is no route
+                return []
+            missing = self.blocked_doors(rooms, held)
+            if not missing:
+                stats.finish("goal")
+                return [f"Move to {room}" for room in rooms]
+            tracked |= missing
+
+    def blocked_doors(self, rooms: List[str], held: int) -> int:
+        """Items the route needs at a door before it has picked them up"""
+        missing = 0
+        for room in rooms:
+            missing |= self.required[room] & ~held
+            held |= self.pickups[room]
+        return missing
+
+    def _search(self, start, goals, held, tracked, stats, dominance) -> Optional[List[str]]:
+        labyrinth = self.labyrinth
+        goal_positions = [labyrinth[goal].position for goal in goals]
+
+        def heuristic(room):
+            if not self.cost_per_distance:
+                return 0.0
+            position = labyrinth[room].position
+            return self.cost_per_distance * min(distance(position, goal) for goal in goal_positions)
+
+        counter = itertools.count()
+        start_state = (start, held & tracked)
+        frontier = [(heuristic(start), next(counter), 0, start_state)]
+        best_g = {start_state: 0}
+        came_from = {start_state: (None, 0)}
+        settled: Dict[str, List[int]] = {}  # room -> maximal item masks already expanded there
+        stats.nodes_generated += 1
+        stats.frontier(1)
+
+        while frontier:
+            _, _, g, state = heapq.heappop(frontier)
+            room, mask = state
+            if g > best_g[state]:
+                stats.duplicate_pops += 1
+                continue
+            if room in goals:
+                return reconstruct_rooms(came_from, state)
+            if dominance:
+                masks = settled.setdefault(room, [])
+                if any(other & mask == mask for other in masks):
+                    stats.duplicate_pops += 1  # Same room, more items, no dearer
+                    continue
+                # Settled costs only grow, so keep just the maximal masks
+                masks[:] = [other for other in masks if other & mask != other]
+                masks.append(mask)
+
+            depth = came_from[state][1]
+            stats.nodes_expanded += 1
+            stats.depth(depth)
+            for next_room, cost in labyrinth[room].neighbors:
+                required = self.required[next_room] & tracked
+                if required & mask != required:
+                    continue  # Door stays shut without its items
+                if self.hazard_cost[next_room] and not mask & self.protection_mask:
+                    cost += self.hazard_cost[next_room]
+                next_state = (next_room, mask | (self.pickups[next_room] & tracked))
+                next_g = g + cost
+                if next_g < best_g.get(next_state, math.inf):
+                    best_g[next_state] = next_g
+                    came_from[next_state] = (state, depth + 1)
+                    heapq.heappush(frontier, (next_g + heuristic(next_room), next(counter), next_g, next_state))
+                    stats.nodes_generated += 1
+            stats.frontier(len(frontier))
+        return None
+
+
+def reconstruct_rooms(came_from: Dict, state) -> List[str]:
+    rooms = []
+    while came_from[state][0] is not None:
+        rooms.append(state[0])
+        state = came_from[state][0]
+    return list(reversed(rooms))
+
+
+def reverse_neighbors(labyrinth) -> Dict[str, List]:
+    """room -> (predecessor, base cost) for every edge into the room"""
+    reverse = {name: [] for name in labyrinth}
+    for name, node in labyrinth.items():
+        for neighbor, cost in node.neighbors:
+            reverse[neighbor].append((name, cost))
+    return reverse
+
+
+def bidirectional_path(labyrinth, start: str, goal: str, travel_cost: Callable[[str, float], float],
+                       cost_per_distance: float = 0.0, reverse: Optional[Dict[str, List]] = None,
+                       stats: Optional[SearchStats] = None) -> List[str]:
+    """Bidirectional Dijkstra, or bidirectional A* when cost_per_distance is set.
+
+    The forward search follows neighbors from start; the backward search
+    follows reverse edges from goal, pricing an edge u -> v by its target
+    exactly as the forward search does, so asymmetric costs are fine. With
+    a heuristic both searches use the average potential
+        p(v) = (h_goal(v) - h_start(v)) / 2
+    which keeps reduced edge costs non-negative for both directions. The
+    search stops once the two smallest frontier keys sum to at least the
+    best meeting cost found, which proves no shorter route remains.
+    """
+    stats = stats or SearchStats("path", "bidirectional", {"start": start, "goal": goal})
+    if start == goal:
+        stats.finish("goal")
+        return []
+    reverse = reverse if reverse is not None else reverse_neighbors(labyrinth)
+    start_position, goal_position = labyrinth[start].position, labyrinth[goal].position
+
+    def potential(room):
+        if not cost_per_distance:
+            return 0.0
+        position = labyrinth[room].position
+        return cost_per_distance * (distance(position, goal_position) - distance(position, start_position)) / 2
+
+    dist = [{start: 0.0}, {goal: 0.0}]  # Reduced costs: forward from start, backward to goal
+    parent = [{start: None}, {goal: None}]
+    frontiers = [[(0.0, start)], [(0.0, goal)]]
+    best, meeting = math.inf, None
+    stats.nodes_generated = 2
+    stats.frontier(2)
+
+    while frontiers[0] and frontiers[1]:
+        if frontiers[0][0][0] + frontiers[1][0][0] >= best:
+            break
+        side = 0 if frontiers[0][0][0] <= frontiers[1][0][0] else 1
+        d, room = heapq.heappop(frontiers[side])
+        if d > dist[side][room]:
+            stats.duplicate_pops += 1
+            continue
+        stats.nodes_expanded += 1
+
+        edges = labyrinth[room].neighbors if side == 0 else reverse[room]
+        for other, cost in edges:
+            if side == 0:
+                weight = travel_cost(other, cost) - potential(room) + potential(other)
+            else:
+                weight = travel_cost(room, cost) - potential(other) + potential(room)
+            next_d = d + weight
+            if next_d < dist[side].get(other, math.inf):
+                dist[side][other] = next_d
+                parent[side][other] = room
+                heapq.heappush(frontiers[side], (next_d, other))
+                stats.nodes_generated += 1
+                if other in dist[1 - side] and next_d + dist[1 - side][other] < best:
+                    best, meeting = next_d + dist[1 - side][other], other
+        stats.frontier(len(frontiers[0]) + len(frontiers[1]))
+
+    if meeting is None:
+        stats.finish("exhausted")
+        return []
+
+    path = []
+    room = meeting
+    while parent[0][room] is not None:
+        path.append(f"Move to {room}")
+        room = parent[0][room]
+    path.reverse()
+    room = meeting
+    while parent[1][room] is not None:
+        room = parent[1][room]
+        path.append(f"Move to {room}")
+    stats.depth(len(path))
+    stats.finish("goal")
+    return path
+
+
+def path_cost(labyrinth, start: str, path: List[str], travel_cost: Callable[[str, float], float]) -> float:
+    """Total adjusted cost of a list of "Move to X" actions"""
+    total = 0
+    state = start
+    for action in path:
+        next_location = action[len("Move to "):]
+        total += travel_cost(next_location, dict(labyrinth[state].neighbors)[next_location])
+        state = next_location
+    return total
+
+
+def grid_labyrinth(side: int, node_cls, seed: int = 0, locked_share: float = 0.05,
+                   hazard_share: float = 0.1, asymmetric: bool = False) -> Dict:
+    """A side x side grid of rooms with random costs, locks and hazards.
+
+    Positions span the 0-100 map space, so map distance is proportional
+    to grid distance. With asymmetric set, each direction of a corridor
+    gets its own cost.
+    """
+    rng = random.Random(seed)
+    scale = 100 / max(1, side - 1)
+    costs = {}
+    for y in range(side):
+        for x in range(side):
+            if x + 1 < side:
+                costs[(x, y), (x + 1, y)] = rng.randint(1, 9)
+            if y + 1 < side:
+                costs[(x, y), (x, y + 1)] = rng.randint(1, 9)
+
+    labyrinth = {}
+    for y in range(side):
+        for x in range(side):
+            neighbors = []
+            for nx, ny in ((x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)):
+                if 0 <= nx < side and 0 <= ny < side:
+                    edge = ((x, y), (nx, ny)) if (x, y) < (nx, ny) else ((nx, ny), (x, y))
+                    cost = costs[edge]
+                    if asymmetric and (x, y) > (nx, ny):
+                        cost = costs[edge] = rng.randint(1, 9)
+                    neighbors.append((f"R{nx}_{ny}", cost))
+            roll = rng.random()
+            labyrinth[f"R{x}_{y}"] = node_cls(
+                name=f"R{x}_{y}",
+                description="",
+                neighbors=neighbors,
+                required_items=["Torch"] if roll < locked_share else None,
+                hazards={"Spikes": rng.randint(2, 10)} if locked_share <= roll < locked_share + hazard_share else None,
+                position=(x * scale, y * scale)
+            )
+    return labyrinth
+
+
+def benchmark(sizes: List[int], queries: int = 5, seed: int = 0) -> None:
+    """Compare uniform_cost_search, A* and the bidirectional searches on generated grids"""
+    from explorer import ExplorerEngine, Node
+
+    game = ExplorerEngine()
+    print(f"{'rooms':>9} {'search':>8} {'mean ms':>9} {'settled':>10} {'frontier':>9} {'dup pops':>9}  same cost")
+    for size in sizes:
+        side = int(math.isqrt(size))
+        game.labyrinth = grid_labyrinth(side, Node, seed, asymmetric=True)
+        travel_cost = TravelCost(game.labyrinth, game.inventory, game.protection_items)
+        ratio = min_cost_per_distance(game.labyrinth)
+        reverse = reverse_neighbors(game.labyrinth)
+        rng = random.Random(seed)
+        pairs = [("R0_0", f"R{side - 1}_{side - 1}")]
+        while len(pairs) < queries:
+            pairs.append((f"R{rng.randrange(side)}_{rng.randrange(side)}",
+                          f"R{rng.randrange(side)}_{rng.randrange(side)}"))
+
+        totals = {name: [0.0, 0, 0, 0] for name in ("ucs", "astar", "bidi", "bidi-a*")}
+        same = True
+        for start, goal in pairs:
+            started = time.perf_counter()
+            ucs_path = game.uniform_cost_search(start, goal)
+            ucs = game.last_search_stats
+            ucs.wall_time = time.perf_counter() - started
+
+            searches = {"ucs": ucs}
+            paths = [ucs_path]
+            for name, search, args in (("astar", a_star_path, (ratio,)),
+                                       ("bidi", bidirectional_path, (0.0, reverse)),
+                                       ("bidi-a*", bidirectional_path, (ratio, reverse))):
+                searches[name] = SearchStats("path", name)
+                paths.append(search(game.labyrinth, start, goal, travel_cost, *args, stats=searches[name]))
+            costs = [path_cost(game.labyrinth, start, path, travel_cost) for path in paths]
+            same &= all(math.isclose(costs[0], cost) for cost in costs)
+            for name, stats in searches.items():
+                totals[name][0] += stats.wall_time
+                totals[name][1] += stats.nodes_expanded
+                totals[name][2] = max(totals[name][2], stats.peak_frontier)
+                totals[name][3] += stats.duplicate_pops
+
+        for name, (seconds, expanded, frontier, duplicates) in totals.items():
+            print(f"{side * side:>9} {name:>8} {seconds / len(pairs) * 1000:>9.1f} "
+                  f"{expanded // len(pairs):>10} {frontier:>9} {duplicates // len(pairs):>9}  {same}")
+
+
+def keyed_labyrinth(side: int, keys: int, node_cls, seed: int = 0) -> Dict:
+    """grid_labyrinth with `keys` locked doors, each key lying in another room"""
+    rng = random.Random(seed)
+    labyrinth = grid_labyrinth(side, node_cls, seed, locked_share=0.0)
+    rooms = list(labyrinth)[1:]
+    rng.shuffle(rooms)
+    for i in range(keys):
+        door, key_room = labyrinth[rooms[2 * i]], labyrinth[rooms[2 * i + 1]]
+        door.required_items = [f"Key {i}"]
+        door.locked = True
+        key_room.items.append(f"Key {i}")
+    labyrinth[rng.choice(rooms[2 * keys:])].items.append("Shield")
+    return labyrinth
+
+
+def benchmark_routes(key_counts: List[int], side: int = 60, queries: int = 5, seed: int = 0) -> None:
+    """Time RoutePlanner tracking every key versus lazily, as key items grow"""
+    from explorer import Node
+
+    protection_items = {"Shield": 50, "Magic Amulet": 75}
+    print(f"{'keys':>5} {'tracking':>9} {'mean ms':>9} {'expanded':>10} {'pruned':>9} {'found':>6}")
+    for keys in key_counts:
+        labyrinth = keyed_labyrinth(side, keys, Node, seed)
+        planner = RoutePlanner(labyrinth, protection_items, min_cost_per_distance(labyrinth))
+        rng = random.Random(seed)
+        goals = [rng.choice(list(labyrinth)) for _ in range(queries)]
+        for mode, lazy in (("all keys", False), ("lazy", True)):
+            seconds = expanded = pruned = found = 0
+            for goal in goals:
+                stats = SearchStats("route", "item-route")
+                found += bool(planner.plan("R0_0", [goal], [], stats, lazy=lazy))
+                seconds += stats.wall_time
+                expanded += stats.nodes_expanded
+                pruned += stats.duplicate_pops
+            print(f"{keys:>5} {mode:>9} {seconds / queries * 1000:>9.1f} "
+                  f"{expanded // queries:>10} {pruned // queries:>9} {found:>3}/{queries}")
+
+
+if __name__ == "__main__":
+    # Benchmarks: python pathfinding.py [rooms ...]
+    #             python pathfinding.py routes [key counts ...]
+    if sys.argv[1:2] == ["routes"]:
+        benchmark_routes([int(arg) for arg in sys.argv[2:]] or [4, 12, 24, 48])
+    else:
+        benchmark([int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 1_000_000])
\ No newline at end of file
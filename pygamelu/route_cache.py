@@ -0,0 +1,182 @@
+import heapq
+import math
+import random
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from pathfinding import TravelCost
+
+
+def shortest_path_tree(labyrinth, source: str, travel_cost) -> Dict[str, Optional[str]]:
+    """Dijkstra from source over every reachable room; returns room -> previous room"""
+    parents = {source: None}
+    best = {source: 0}
+    frontier = [(0, source)]
+    while frontier:
+        g, room = heapq.heappop(frontier)
+        if g > best[room]:
+            continue
+        for neighbor, cost in labyrinth[room].neighbors:
+            next_g = g + travel_cost(neighbor, cost)
+            if next_g < best.get(neighbor, math.inf):
+                best[neighbor] = next_g
+                parents[neighbor] = room
+                heapq.heappush(frontier, (next_g, neighbor))
+    return parents
+
+
+class RouteCache:
+    """Shortest-path trees shared by every route query with the same edge weights.
+
+    uniform_cost_search weights only depend on which locked rooms the
+    inventory opens and whether a protection item is held, so trees are
+    keyed by that signature and by source room. inventory_changed works the
+    signature out once per pickup; while the inventory it was given is
+    unchanged, a route is a walk up the tree, O(path length). Trees are kept in LRU order and evicted once the
+    rooms stored across all trees exceed max_rooms.
+    """
+    def __init__(self, labyrinth, protection_items, max_rooms: int = 200_000):
+        self.labyrinth = labyrinth
+        self.protection_items = protection_items
+        self.max_rooms = max_rooms
+        self.locked_rooms = [name for name, node in labyrinth.items() if node.required_items]
+        self.trees: "OrderedDict[Tuple[int, str], Dict[str, Optional[str]]]" = OrderedDict()
+        self.stored_rooms = 0
+        self.signature = None
+        self.inventory = None  # The inventory self.signature was worked out for, and its item mask then
+        self.inventory_mask = None
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.build_seconds = 0.0
+
+    def signature_of(self, inventory) -> int:
+        """Bit 0: protected; bit i+1: the i-th locked room is open"""
+        held = set(inventory)
+        signature = int(any(item in self.protection_items for item in held))
+        for i, name in enumerate(self.locked_rooms):
+            if all(item in held for item in self.labyrinth[name].required_items):
+                signature |= 2 << i
+        return signature
+
+    def inventory_changed(self, inventory) -> bool:
+        """Drop the old trees if the new inventory changes edge weights"""
+        signature = self.signature_of(inventory)
+        self.inventory = inventory
+        self.inventory_mask = getattr(inventory, "mask", None)
+        if signature == self.signature:
+            return False
+        if self.signature is not None:
+            self.invalidate(self.signature)
+        self.signature = signature
+        return True
+
+    def invalidate(self, signature: Optional[int] = None) -> None:
+        """Drop the trees for one signature, or every tree"""
+        with self.lock:
+            for key in [key for key in self.trees if signature is None or key[0] == signature]:
+                self.stored_rooms -= len(self.trees.pop(key))
+
+    def current_signature(self, inventory) -> int:
+        """self.signature for the inventory inventory_changed last saw, if unchanged; else worked out"""
+        if (inventory is self.inventory and self.inventory_mask is not None
+                and inventory.mask == self.inventory_mask):
+            return self.signature
+        return self.signature_of(inventory)
+
+    def tree(self, source: str, inventory) -> Dict[str, Optional[str]]:
+        signature = self.current_signature(inventory)
+        key = (signature, source)
+        with self.lock:
+            tree = self.trees.get(key)
+            if tree is not None:
+                self.trees.move_to_end(key)
+                self.hits += 1
+                return tree
+            self.misses += 1
+
+        started = time.perf_counter()
+        tree = shortest_path_tree(self.labyrinth, source,
+                                  TravelCost(self.labyrinth, inventory, self.protection_items))
+        with self.lock:
+            self.build_seconds += time.perf_counter() - started
+            if key not in self.trees:
+                self.trees[key] = tree
+                self.stored_rooms += len(tree)
+            while self.stored_rooms > self.max_rooms and len(self.trees) > 1:
+                _, old = self.trees.popitem(last=False)
+                self.stored_rooms -= len(old)
+                self.evictions += 1
+        return tree
+
+    def route(self, start: str, goal: str, inventory) -> List[str]:
+        """Route from start to goal as "Move to X" actions, or [] if unreachable"""
+        parents = self.tree(start, inventory)
+        if goal not in parents or goal == start:
+            return []
+        path = []
+        room = goal
+        while room != start:
+            path.append(f"Move to {room}")
+            room = parents[room]
+        return list(reversed(path))
+
+    def precompute(self, inventory, sources=None) -> None:
+        """Build trees ahead of time (all rooms by default, as far as max_rooms allows)"""
+        for source in sources if sources is not None else self.labyrinth:
+            self.tree(source, inventory)
+
+    def stats(self) -> Dict:
+        with self.lock:
+            # Dict overhead only; the room names are shared with the labyrinth
+            tree_bytes = sum(sys.getsizeof(tree) for tree in self.trees.values())
+            total = self.hits + self.misses
+            return {
+                "trees": len(self.trees),
+                "stored_rooms": self.stored_rooms,
+                "max_rooms": self.max_rooms,
+                "bytes": tree_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "evictions": self.evictions,
+                "build_seconds": self.build_seconds
+            }
+
+
+if __name__ == "__main__":
+    # Benchmark: python route_cache.py [rooms]
+    from explorer import ExplorerEngine, Node
+    from pathfinding import grid_labyrinth, path_cost
+
+    rooms = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    side = math.isqrt(rooms)
+    game = ExplorerEngine()
+    game.labyrinth = grid_labyrinth(side, Node)
+    cache = RouteCache(game.labyrinth, game.protection_items)
+    cache.inventory_changed(game.inventory)
+    travel_cost = TravelCost(game.labyrinth, game.inventory, game.protection_items)
+
+    # Questions come from a few rooms the player keeps returning to
+    rng = random.Random(0)
+    sources = [f"R{rng.randrange(side)}_{rng.randrange(side)}" for _ in range(4)]
+    queries = [(rng.choice(sources), f"R{rng.randrange(side)}_{rng.randrange(side)}") for _ in range(200)]
+
+    started = time.perf_counter()
+    ucs_paths = [game.uniform_cost_search(start, goal) for start, goal in queries]
+    ucs_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    cached_paths = [cache.route(start, goal, game.inventory) for start, goal in queries]
+    cache_seconds = time.perf_counter() - started
+
+    same = all(math.isclose(path_cost(game.labyrinth, start, a, travel_cost),
+                            path_cost(game.labyrinth, start, b, travel_cost))
+               for (start, _), a, b in zip(queries, ucs_paths, cached_paths))
+    print(f"{side * side} rooms, {len(queries)} queries from {len(sources)} rooms")
+    print(f"  uniform_cost_search: {ucs_seconds / len(queries) * 1000:.2f} ms/query")
+    print(f"  route cache:         {cache_seconds / len(queries) * 1000:.2f} ms/query (same costs: {same})")
+    for name, value in cache.stats().items():
+        print(f"    {name}: {value}")
\ No newline at end of file
@@ -0,0 +1,129 @@
+import csv
+import json
+import time
+from typing import Dict, List, Optional
+
+
+class SearchStats:
+    """What one search did: attached to or returned with every search"""
+    FIELDS = ["nodes_generated", "nodes_expanded", "duplicate_pops", "peak_frontier",
+              "depth_reached", "wall_time"]
+
+    def __init__(self, kind: str, strategy: str = "", context: Optional[Dict] = None):
+        self.kind = kind            # "hint" or "path"
+        self.strategy = strategy
+        self.context = context or {}  # e.g. the location, to find pathological states
+        self.nodes_generated = 0
+        self.nodes_expanded = 0
+        self.duplicate_pops = 0
+        self.peak_frontier = 0
+        self.depth_reached = 0
+        self.wall_time = 0.0
+        self.termination = None
+        self.started = time.perf_counter()
+
+    def frontier(self, size: int) -> None:
+        if size > self.peak_frontier:
+            self.peak_frontier = size
+
+    def depth(self, depth: int) -> None:
+        if depth > self.depth_reached:
+            self.depth_reached = depth
+
+    def finish(self, termination: str) -> "SearchStats":
+        self.termination = termination
+        self.wall_time = time.perf_counter() - self.started
+        return self
+
+    def to_dict(self) -> Dict:
+        data = {"kind": self.kind, "strategy": self.strategy, "termination": self.termination}
+        data.update({field: getattr(self, field) for field in self.FIELDS})
+        data["context"] = self.context
+        return data
+
+
+class Histogram:
+    """Counts in power-of-two buckets: [0, 1), [1, 2), [2, 4), [4, 8) ..."""
+    def __init__(self):
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value: float) -> None:
+        bucket = 0 if value < 1 else int(value).bit_length()
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    @staticmethod
+    def bounds(bucket: int):
+        return (0, 1) if bucket == 0 else (1 << (bucket - 1), 1 << bucket)
+
+    def to_dict(self) -> Dict:
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "max": self.max,
+            "buckets": [{"low": low, "high": high, "count": self.buckets[bucket]}
+                        for bucket in sorted(self.buckets)
+                        for low, high in [self.bounds(bucket)]]
+        }
+
+
+class SessionStats:
+    """Per-session histograms of every search, grouped by kind"""
+    def __init__(self, keep_slowest: int = 10):
+        self.keep_slowest = keep_slowest
+        self.histograms: Dict[str, Dict[str, Histogram]] = {}
+        self.terminations: Dict[str, Dict[str, int]] = {}
+        self.slowest: Dict[str, List[SearchStats]] = {}
+
+    def add(self, stats: SearchStats) -> None:
+        histograms = self.histograms.setdefault(stats.kind, {field: Histogram() for field in SearchStats.FIELDS})
+        for field in SearchStats.FIELDS:
+            value = getattr(stats, field)
+            # Wall time is bucketed in microseconds
+            histograms[field].add(value * 1e6 if field == "wall_time" else value)
+
+        terminations = self.terminations.setdefault(stats.kind, {})
+        terminations[stats.termination] = terminations.get(stats.termination, 0) + 1
+
+        slowest = self.slowest.setdefault(stats.kind, [])
+        slowest.append(stats)
+        slowest.sort(key=lambda s: s.wall_time, reverse=True)
+        del slowest[self.keep_slowest:]
+
+    def to_dict(self) -> Dict:
+        return {
+            kind: {
+                "searches": histograms["wall_time"].count,
+                "terminations": self.terminations[kind],
+                "histograms": {("wall_time_us" if field == "wall_time" else field): histogram.to_dict()
+                               for field, histogram in histograms.items()},
+                "slowest": [stats.to_dict() for stats in self.slowest[kind]]
+            }
+            for kind, histograms in self.histograms.items()
+        }
+
+    def dump_json(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def dump_csv(self, path: str) -> None:
+        """One row per histogram bucket"""
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["kind", "metric", "low", "high", "count"])
+            for kind, summary in self.to_dict().items():
+                for metric, histogram in summary["histograms"].items():
+                    for bucket in histogram["buckets"]:
+                        writer.writerow([kind, metric, bucket["low"], bucket["high"], bucket["count"]])
+
+    def dump(self, path: str) -> None:
+        """Write JSON or CSV depending on the file extension"""
+        if path.endswith(".csv"):
+            self.dump_csv(path)
+        else:
+            self.dump_json(path)
\ No newline at end of file
@@ -0,0 +1,193 @@
+import math
+import random
+import sys
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+Rect = Tuple[float, float, float, float]  # left, top, right, bottom in map units
+
+
+class SpatialGrid:
+    """Uniform grid over room positions and corridor bounding boxes.
+
+    Each cell lists the rooms inside it and the corridors whose bounding box
+    overlaps it, so a viewport query only touches the cells it covers and
+    a click only the cells around it. Rooms and corridors can be added and
+    removed one at a time as the labyrinth grows or streams.
+    """
+    def __init__(self, cell: float):
+        self.cell = cell
+        self.positions: Dict[str, Tuple[float, float]] = {}
+        self.room_cells: Dict[Tuple[int, int], List[str]] = {}
+        self.edge_cells: Dict[Tuple[int, int], List[Tuple[str, str]]] = {}
+        self.edges: Dict[str, Set[Tuple[str, str]]] = {}  # Room -> corridors touching it
+
+    @classmethod
+    def from_labyrinth(cls, labyrinth, rooms_per_cell: int = 4) -> "SpatialGrid":
+        """Index every room and corridor, sizing cells to hold a few rooms each.
+
+        A level file (levelfile.LevelFile) hands over its position and
+        corridor records, so none of its rooms are built.
+        """
+        if hasattr(labyrinth, "room_positions"):
+            return cls.from_records(labyrinth.room_positions(), labyrinth.corridors(), rooms_per_cell)
+        positions = {name: node.position for name, node in labyrinth.items()}
+        corridors = ((name, neighbor) for name, node in labyrinth.items() for neighbor, _ in node.neighbors)
+        return cls.from_records(positions, corridors, rooms_per_cell)
+
+    @classmethod
+    def from_records(cls, positions: Dict[str, Tuple[float, float]], corridors: Iterable[Tuple[str, str]],
+                     rooms_per_cell: int = 4) -> "SpatialGrid":
+        """Index rooms by position and the corridors between them"""
+        if positions:
+            xs = [x for x, _ in positions.values()]
+            ys = [y for _, y in positions.values()]
+            width, height = max(xs) - min(xs), max(ys) - min(ys)
+            cell = math.sqrt(max(width * height, 1.0) * rooms_per_cell / len(positions))
+        else:
+            cell = 1.0
+        grid = cls(max(cell, 1e-6))
+        for name, position in positions.items():
+            grid.add_room(name, position)
+        for name, neighbor in corridors:
+            grid.add_edge(name, neighbor)
+        return grid
+
+    def key(self, x: float, y: float) -> Tuple[int, int]:
+        return math.floor(x / self.cell), math.floor(y / self.cell)
+
+    def cells(self, rect: Rect) -> Iterator[Tuple[int, int]]:
+        left, top = self.key(rect[0], rect[1])
+        right, bottom = self.key(rect[2], rect[3])
+        for cx in range(left, right + 1):
+            for cy in range(top, bottom + 1):
+                yield cx, cy
+
+    def add_room(self, name: str, position) -> None:
+        if name in self.positions:
+            return
+        self.positions[name] = (position[0], position[1])
+        self.room_cells.setdefault(self.key(*position), []).append(name)
+
+    def add_edge(self, a: str, b: str) -> None:
+        """Index the corridor a-b once, whichever direction it is added from"""
+        if a not in self.positions or b not in self.positions:
+            return
+        edge = (a, b) if a < b else (b, a)
+        if edge in self.edges.get(a, ()):
+            return
+        for cell in self.cells(self.edge_box(edge)):
+            self.edge_cells.setdefault(cell, []).append(edge)
+        self.edges.setdefault(a, set()).add(edge)
+        self.edges.setdefault(b, set()).add(edge)
+
+    def edge_box(self, edge: Tuple[str, str]) -> Rect:
+        (x1, y1), (x2, y2) = self.positions[edge[0]], self.positions[edge[1]]
+        return min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2)
+
+    def remove_room(self, name: str) -> None:
+        """Drop a room and its corridors, e.g. when its chunk is evicted"""
+        position = self.positions.get(name)
+        if position is None:
+            return
+        for edge in list(self.edges.get(name, ())):
+            for cell in self.cells(self.edge_box(edge)):
+                self.edge_cells[cell].remove(edge)
+            for end in edge:
+                self.edges[end].discard(edge)
+        self.edges.pop(name, None)
+        self.room_cells[self.key(*position)].remove(name)
+        del self.positions[name]
+
+    def sync(self, labyrinth) -> None:
+        """Catch up with rooms added to or removed from the labyrinth since the last sync.
+
+        Only the rooms the labyrinth holds (its keys) count; a streamed
+        world's `in` also answers for rooms it could load, which the map
+        must neither keep nor pull in.
+        """
+        resident = set(labyrinth.keys())
+        for name in [name for name in self.positions if name not in resident]:
+            self.remove_room(name)
+        added = [name for name in resident if name not in self.positions]
+        for name in added:
+            self.add_room(name, labyrinth[name].position)
+        # Corridors run both ways, so each new room's own list covers those into it
+        for name in added:
+            for neighbor, _ in labyrinth[name].neighbors:
+                self.add_edge(name, neighbor)
+
+    def rooms_in(self, rect: Rect) -> List[str]:
+        """Rooms whose position lies inside rect"""
+        left, top, right, bottom = rect
+        found = []
+        for cell in self.cells(rect):
+            for name in self.room_cells.get(cell, ()):
+                x, y = self.positions[name]
+                if left <= x <= right and top <= y <= bottom:
+                    found.append(name)
+        return found
+
+    def edges_in(self, rect: Rect) -> Set[Tuple[str, str]]:
+        """Corridors whose bounding box overlaps rect"""
+        left, top, right, bottom = rect
+        found = set()
+        for cell in self.cells(rect):
+            for edge in self.edge_cells.get(cell, ()):
+                x1, y1, x2, y2 = self.edge_box(edge)
+                if x1 <= right and x2 >= left and y1 <= bottom and y2 >= top:
+                    found.add(edge)
+        return found
+
+    def room_at(self, x: float, y: float, radius: float) -> Optional[str]:
+        """Nearest room within radius of the point, for clicks on the map"""
+        best, best_distance = None, radius
+        for name in self.rooms_in((x - radius, y - radius, x + radius, y + radius)):
+            rx, ry = self.positions[name]
+            distance = math.hypot(rx - x, ry - y)
+            if distance <= best_distance:
+                best, best_distance = name, distance
+        return best
+
+
+def benchmark(sizes: List[int], queries: int = 200, seed: int = 0) -> None:
+    """Viewport and click queries against a full scan, as the world grows"""
+    from explorer import Node
+    from worldgen import generate_labyrinth
+
+    rng = random.Random(seed)
+    print(f"{'rooms':>9} {'build s':>8} {'scan ms':>9} {'view ms':>9} {'click us':>9} {'visible':>8}")
+    for rooms in sizes:
+        labyrinth = generate_labyrinth(rooms, Node, seed)
+        started = time.perf_counter()
+        grid = SpatialGrid.from_labyrinth(labyrinth)
+        build_seconds = time.perf_counter() - started
+
+        # A viewport showing about 400 rooms' worth of map
+        span = 100 * math.sqrt(400 / rooms) if rooms > 400 else 100
+        views = []
+        for _ in range(queries):
+            x, y = rng.uniform(0, 100 - span), rng.uniform(0, 100 - span)
+            views.append((x, y, x + span, y + span))
+
+        started = time.perf_counter()
+        for left, top, right, bottom in views[:10]:
+            [name for name, node in labyrinth.items()
+             if left <= node.position[0] <= right and top <= node.position[1] <= bottom]
+        scan_seconds = (time.perf_counter() - started) / 10
+        started = time.perf_counter()
+        visible = 0
+        for view in views:
+            visible += len(grid.rooms_in(view)) + len(grid.edges_in(view))
+        view_seconds = (time.perf_counter() - started) / len(views)
+        started = time.perf_counter()
+        for left, top, _, _ in views:
+            grid.room_at(left, top, span / 20)
+        click_seconds = (time.perf_counter() - started) / len(views)
+        print(f"{rooms:>9} {build_seconds:>8.2f} {scan_seconds * 1000:>9.2f} {view_seconds * 1000:>9.2f} "
+              f"{click_seconds * 1e6:>9.1f} {visible // len(views):>8}")
+
+
+if __name__ == "__main__":
+    # Benchmark: python spatial.py [rooms ...]
+    benchmark([int(arg) for arg in sys.argv[1:]] or [1_000, 10_000, 100_000, 1_000_000])
\ No newline at end of file
@@ -0,0 +1,72 @@
+import random
+
+import pytest
+
+from engine import GameEngine
+from event_log import BOSS_HEALTH, COMPLEXITY, PUZZLE_ATTEMPT, ROOM_ITEM_TAKEN, VISITED, read_events, replay
+from explorer import ExplorerEngine
+
+# Write/replay round trips: a game played through step() is written to a log
+# file, and replaying the file over a fresh labyrinth gives back the same
+# player and the same rooms.
+# Run with: python -m pytest test_event_log.py
+
+
+@pytest.fixture
+def log_path(tmp_path, monkeypatch):
+    path = str(tmp_path / "game.lev")
+    monkeypatch.setenv("LUMOS_EVENT_LOG", path)
+    return path
+
+
+def play(engine, steps: int, seed: int) -> None:
+    """Random legal actions, scaling the difficulty now and then as the window does"""
+    random.seed(seed)
+    agent = random.Random(seed)
+    for step in range(steps):
+        engine.step(agent.choice(engine.legal_actions()))
+        if step % 5 == 0 and hasattr(engine, "adjust_dynamic_difficulty"):
+            engine.adjust_dynamic_difficulty()
+
+
+def rooms(labyrinth):
+    return {name: vars(node) for name, node in labyrinth.items()}
+
+
+def assert_replays(engine, data: bytes, upto=None) -> None:
+    state = replay(data, upto, rooms=engine._create_labyrinth())
+    assert state.location == engine.current_location
+    assert state.values == engine.events.state.values
+    assert list(state.inventory) == list(engine.inventory)
+    assert rooms(state.rooms) == rooms(engine.labyrinth)
+
+
+def read(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+@pytest.mark.parametrize("engine_cls, kinds", [
+    (GameEngine, {VISITED, PUZZLE_ATTEMPT, COMPLEXITY, BOSS_HEALTH}),
+    (ExplorerEngine, {ROOM_ITEM_TAKEN}),
+])
+def test_replay_rebuilds_rooms(log_path, engine_cls, kinds):
+    engine = engine_cls()
+    play(engine, 400, seed=1)
+    engine.close()
+    data = read(log_path)
+    assert kinds <= {kind for kind, _, _, _ in read_events(data)}
+    assert_replays(engine, data)
+
+
+def test_replay_stops_in_earlier_session(log_path):
+    first = GameEngine()
+    play(first, 150, seed=2)
+    first.close()
+    first_events = sum(1 for _ in read_events(read(log_path)))
+    second = GameEngine()
+    play(second, 150, seed=3)
+    second.close()
+    data = read(log_path)
+    assert_replays(first, data, upto=first_events)
+    assert_replays(second, data)
\ No newline at end of file
@@ -1,8 +1,10 @@
 import pygame
 import sys
-import heapq
-import random
-from typing import Dict, List, Tuple, Set, Optional
+from typing import Optional
+from hpa import level_regions
+from spatial import SpatialGrid
+from map_tiles import TileCache
+from explorer import ExplorerEngine
 
 # Initialize pygame
 pygame.init()
@@ -12,6 +14,8 @@ pygame.font.init()
 SCREEN_WIDTH = 1024
 SCREEN_HEIGHT = 768
 FPS = 60
+MAP_MAX_ZOOM = 10  # The minimap zooms in by powers of two up to this
+MAP_DETAIL_ROOMS = 60  # Rooms and labels are drawn once about this few rooms are in view
 
 # Colors
 BLACK = (0, 0, 0)
@@ -26,122 +30,7 @@ GOLD = (255, 215, 0)
 PURPLE = (128, 0, 128)
 DARK_BLUE = (0, 0, 128)
 BROWN = (165, 42, 42)
-
-class LUMOS:
-    """LUMOS - Labyrinth Unity Master Operating System with cost-based hint system"""
-    def __init__(self):
-        self.greetings = ["Greetings, brave adventurer! I am LUMOS, your magical guide."]
-        self.encouragements = ["Your progress is remarkable!", "You're on the right path!",
-                             "Trust in your abilities!", "The way forward becomes clearer!"]
-        # Hint levels with costs
-        self.hint_costs = {
-            "vague": 1,     # Very cryptic hint
-            "moderate": 3,  # Somewhat helpful hint
-            "specific": 5,  # Very direct hint
-            "explicit": 10  # Almost gives the answer away
-        }
-
-    def greet(self) -> str:
-        return self.greetings[0]
-
-    def encourage(self) -> str:
-        return random.choice(self.encouragements)
-
-    def give_hint(self, location: str, context: str = None, hint_level: str = "vague") -> Tuple[str, int]:
-        """Returns a hint based on location, context, and hint level with its cost."""
-        # Enhanced hint database with multiple detail levels
-        hints = {
-            "Ancient Entrance": {
-                "general": {
-                    "vague": "Ancient wisdom lies dormant in these halls...",
-                    "moderate": "The symbols here hold ancient wisdom...",
-                    "specific": "Look carefully at the arrangement of the symbols.",
-                    "explicit": "Match the symbols in order of size, smallest to largest."
-                },
-                "puzzle": {
-                    "vague": "Patterns reveal themselves to the patient observer...",
-                    "moderate": "Symbols can have multiple meanings.",
-                    "specific": "The order matters as much as the symbols themselves.",
-                    "explicit": "Arrange the stone tiles to match the ceiling pattern."
-                }
-            },
-            "Crystal Caverns": {
-                "general": {
-                    "vague": "Light and crystal dance together in harmony...",
-                    "moderate": "The crystals react to your presence in subtle ways.",
-                    "specific": "Your light source affects how the crystals behave.",
-                    "explicit": "Use the torch to activate the central crystal formation."
-                },
-                "puzzle": {
-                    "vague": "Reflections hold more than meets the eye...",
-                    "moderate": "The angle of light reveals hidden truths.",
-                    "specific": "Direct your torch at the largest crystal to reveal a path.",
-                    "explicit": "Shine your torch at the northwest crystal to open the secret passage."
-                }
-            },
-            "Shadow Corridor": {
-                "general": {
-                    "vague": "Darkness hides both danger and opportunity...",
-                    "moderate": "The shadows move in peculiar ways here.",
-                    "specific": "Some shadows are more solid than they appear.",
-                    "explicit": "Avoid the moving shadows, they will drain your health."
-                },
-                "puzzle": {
-                    "vague": "Light creates shadow, but shadow can also create light...",
-                    "moderate": "The pattern of shadows tells a story.",
-                    "specific": "Project shadows onto the wall markings to reveal the code.",
-                    "explicit": "Use your torch to cast specific shadow shapes on the three wall symbols."
-                }
-            }
-        }
-
-        # Default hints if location or context not found
-        default_hints = {
-            "vague": "Trust your instincts, brave one...",
-            "moderate": "The path forward is not always clear, but it exists.",
-            "specific": "Your current situation demands careful observation.",
-            "explicit": "Look for the unusual pattern - that's your next step."
-        }
-
-        # Use default hint level if invalid level provided
-        if hint_level not in self.hint_costs:
-            hint_level = "vague"
-
-        # Get the appropriate hint
-        if location in hints and context in hints[location]:
-            hint = hints[location][context].get(hint_level, hints[location][context]["vague"])
-        else:
-            hint = default_hints.get(hint_level, default_hints["vague"])
-
-        return hint, self.hint_costs[hint_level]
-
-class Node:
-    def __init__(self, name: str, description: str, neighbors: List[Tuple[str, int]],
-                 items: List[str] = None, required_items: List[str] = None,
-                 hazards: Dict[str, int] = None, puzzles: Dict[str, int] = None,
-                 position: Tuple[int, int] = (0, 0)):
-        self.name = name
-        self.description = description
-        self.neighbors = neighbors
-        self.items = items or []
-        self.required_items = required_items or []
-        self.visited = False
-        self.locked = True if required_items else False
-        self.hazards = hazards or {}  # Dict of hazard_name: damage_value
-        self.puzzles = puzzles or {}  # Dict of puzzle_name: reward_value
-        self.puzzle_solved = set()    # Track which puzzles have been solved
-        self.position = position      # For map rendering (x, y) coordinates
-
-class PathNode:
-    """Node class for UCS pathfinding"""
-    def __init__(self, state: str, parent=None, action=None, path_cost=0):
-        self.state = state
-        self.parent = parent
-        self.action = action
-        self.path_cost = path_cost
-
-    def __lt__(self, other):
-        return self.path_cost < other.path_cost
+TONE_COLORS = {"info": WHITE, "good": GREEN, "bad": RED, "notice": GOLD, "lumos": LIGHT_BLUE}  # Engine message tones
 
 class Button:
     def __init__(self, x, y, width, height, text, color=LIGHT_BLUE, hover_color=BLUE, text_color=BLACK, font_size=20):
@@ -237,44 +126,163 @@ class MessageBox:
                     self.scroll_position = 0
 
 class MiniMap:
+    """Zoomable, pannable map of the discovered rooms.
+
+    The mouse wheel zooms in powers of two around the cursor and dragging
+    with the right button pans. While more than MAP_DETAIL_ROOMS rooms would
+    be in view, the map shows heatmap tiles coloured by level, cached per
+    zoom level; closer in it draws each room with its label.
+    """
     def __init__(self, x, y, width, height):
         self.rect = pygame.Rect(x, y, width, height)
         self.node_radius = 15
         self.current_location = None
         self.labyrinth = None
-        
-    def set_data(self, labyrinth, current_location):
+        self.levels = None
+        self.index = None  # SpatialGrid over the labyrinth, for culling and clicks
+        self.graph = None  # Optional CSRGraph of the same labyrinth, for the corridor pass
+        self.discovered_mask = None  # graph.discovered_mask, rebuilt when a room is discovered
+        self.mask_key = None
+        self.tiles = None  # TileCache for the zoom levels too crowded for rooms
+        self.zoom = 0
+        self.center = (50.0, 50.0)
+        self.follow = True  # Keep the player centred until the map is dragged
+        self.dragging = False
+        
+    def set_data(self, labyrinth, current_location, levels=None):
+        if labyrinth is not self.labyrinth:
+            self.index = SpatialGrid.from_labyrinth(labyrinth)
+            self.tiles = None
+        if levels is not None:
+            self.levels = levels
         self.labyrinth = labyrinth
         self.current_location = current_location
+        if self.follow and current_location in self.index.positions:
+            self.look_at(self.index.positions[current_location])
+
+    def detail_zoom(self):
+        """Lowest zoom level at which rooms are drawn one by one"""
+        zoom = 0
+        while zoom < MAP_MAX_ZOOM and len(self.index.positions) / 4 ** zoom > MAP_DETAIL_ROOMS:
+            zoom += 1
+        return zoom
+
+    def tile_cache(self):
+        if self.tiles is None:
+            regions = level_regions(self.labyrinth, self.levels) if self.levels else {}
+            self.tiles = TileCache(self.rect.size, self.detail_zoom())
+            self.tiles.reset(dict(self.index.positions), regions)
+        return self.tiles
+
+    def look_at(self, position):
+        """Centre the view on a map position, keeping it inside the map"""
+        half = 50 / 2 ** self.zoom
+        self.center = (min(max(position[0], half), 100 - half), min(max(position[1], half), 100 - half))
+
+    def zoom_by(self, steps, point=None):
+        """Zoom in (steps > 0) or out, keeping the map position under point still"""
+        zoom = min(max(self.zoom + steps, 0), MAP_MAX_ZOOM)
+        if zoom == self.zoom:
+            return
+        if point is None:
+            point = self.rect.center
+        left, top, right, bottom = self.visible_area()
+        fx, fy = (point[0] - self.rect.x) / self.rect.width, (point[1] - self.rect.y) / self.rect.height
+        anchor = (left + fx * (right - left), top + fy * (bottom - top))
+        self.zoom = zoom
+        span = 100 / 2 ** zoom
+        self.look_at((anchor[0] + (0.5 - fx) * span, anchor[1] + (0.5 - fy) * span))
+        if zoom == 0:
+            self.follow = True
+
+    def handle_event(self, event, mouse_pos):
+        """Wheel zoom and right-drag panning; returns True if the event was used"""
+        if event.type == pygame.MOUSEWHEEL and self.rect.collidepoint(mouse_pos):
+            self.zoom_by(event.y, mouse_pos)
+            return True
+        if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1 and self.rect.collidepoint(mouse_pos) \
+                and self.index is not None and self.zoom < self.detail_zoom():
+            self.zoom_by(1, mouse_pos)  # Rooms can't be picked out of the heatmap, so a click zooms in
+            return True
+        if event.type == pygame.MOUSEBUTTONDOWN and event.button == 3 and self.rect.collidepoint(mouse_pos):
+            self.dragging = True
+            return True
+        if event.type == pygame.MOUSEBUTTONUP and event.button == 3:
+            self.dragging = False
+        if event.type == pygame.MOUSEMOTION and self.dragging:
+            span = 100 / 2 ** self.zoom
+            self.follow = False
+            self.look_at((self.center[0] - event.rel[0] * span / self.rect.width,
+                          self.center[1] - event.rel[1] * span / self.rect.height))
+            return True
+        return False
+
+    def visible_area(self):
+        """Part of the 0-100 map space the minimap shows"""
+        half = 50 / 2 ** self.zoom
+        return (self.center[0] - half, self.center[1] - half, self.center[0] + half, self.center[1] + half)
+
+    def to_screen(self, position):
+        left, top, right, bottom = self.visible_area()
+        return (self.rect.x + ((position[0] - left) / (right - left)) * self.rect.width,
+                self.rect.y + ((position[1] - top) / (bottom - top)) * self.rect.height)
+
+    def room_at(self, point) -> Optional[str]:
+        """Room drawn under a screen point, if any"""
+        if not self.labyrinth or not self.rect.collidepoint(point) or self.zoom < self.detail_zoom():
+            return None
+        left, top, right, bottom = self.visible_area()
+        scale = (right - left) / self.rect.width
+        x = left + (point[0] - self.rect.x) * scale
+        y = top + (point[1] - self.rect.y) * (bottom - top) / self.rect.height
+        return self.index.room_at(x, y, self.node_radius * scale)
         
     def draw(self, screen, discovered_locations):
         if not self.labyrinth:
             return
             
         pygame.draw.rect(screen, BLACK, self.rect)
-        pygame.draw.rect(screen, WHITE, self.rect, 2)
-        
-        # Draw connections first
-        for location_name, node in self.labyrinth.items():
-            if location_name in discovered_locations:
-                for neighbor_name, _ in node.neighbors:
-                    if neighbor_name in discovered_locations:
-                        neighbor = self.labyrinth[neighbor_name]
-                        # Calculate scaled positions
-                        x1 = self.rect.x + ((node.position[0] / 100) * self.rect.width)
-                        y1 = self.rect.y + ((node.position[1] / 100) * self.rect.height)
-                        x2 = self.rect.x + ((neighbor.position[0] / 100) * self.rect.width)
-                        y2 = self.rect.y + ((neighbor.position[1] / 100) * self.rect.height)
-                        
-                        pygame.draw.line(screen, GRAY, (x1, y1), (x2, y2), 2)
+        view = self.visible_area()
+
+        if self.zoom < self.detail_zoom():
+            # Too many rooms to tell apart: heatmap tiles, then where the player is
+            tiles = self.tile_cache()
+            tiles.update(discovered_locations)
+            tiles.blit(screen, self.rect, self.zoom, view)
+            if self.current_location in self.index.positions:
+                x, y = self.to_screen(self.index.positions[self.current_location])
+                if self.rect.collidepoint(x, y):
+                    pygame.draw.circle(screen, GOLD, (int(x), int(y)), 4)
+            pygame.draw.rect(screen, WHITE, self.rect, 2)
+            return
+
+        clip = screen.get_clip()
+        screen.set_clip(self.rect)
+        
+        # Draw connections first, only those in view
+        if self.graph is not None and len(self.graph.names) == len(self.index.positions):
+            # Corridors leaving rooms near the view, culled and scaled in one array pass
+            left, top, right, bottom = view
+            reach = self.graph.longest_edge
+            nearby = self.graph.room_ids(self.index.rooms_in((left - reach, top - reach,
+                                                              right + reach, bottom + reach)))
+            if self.mask_key != (id(discovered_locations), len(discovered_locations)):
+                self.discovered_mask = self.graph.discovered_mask(discovered_locations)
+                self.mask_key = (id(discovered_locations), len(discovered_locations))
+            for x1, y1, x2, y2 in self.graph.minimap_segments(self.discovered_mask, self.rect, view, nearby):
+                pygame.draw.line(screen, GRAY, (x1, y1), (x2, y2), 2)
+        else:
+            for start, end in self.index.edges_in(view):
+                if start in discovered_locations and end in discovered_locations:
+                    pygame.draw.line(screen, GRAY, self.to_screen(self.index.positions[start]),
+                                     self.to_screen(self.index.positions[end]), 2)
         
         # Draw nodes
         font = pygame.font.SysFont(None, 20)
-        for location_name, node in self.labyrinth.items():
+        for location_name in self.index.rooms_in(view):
             if location_name in discovered_locations:
                 # Calculate scaled position
-                x = self.rect.x + ((node.position[0] / 100) * self.rect.width)
-                y = self.rect.y + ((node.position[1] / 100) * self.rect.height)
+                x, y = self.to_screen(self.index.positions[location_name])
                 
                 # Different colors for different location types
                 color = LIGHT_BLUE
@@ -296,6 +304,8 @@ class MiniMap:
                 label = font.render(location_name.split()[0], True, BLACK)
                 label_rect = label.get_rect(center=(x, y))
                 screen.blit(label, label_rect)
+        screen.set_clip(clip)
+        pygame.draw.rect(screen, WHITE, self.rect, 2)
 
 class InventoryDisplay:
     def __init__(self, x, y, width, height):
@@ -381,43 +391,20 @@ class StatusBar:
         screen.blit(tokens_text, (self.rect.x + 500, self.rect.y + 10))
 
 class LabyrinthGame:
+    """Pygame window over explorer.ExplorerEngine: buttons become engine actions"""
     def __init__(self):
         self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-        pygame.display.set_caption("LUMOS Labyrinth")
+        pygame.display.set_caption("LUMOS Labyrinth Adventure")
         self.clock = pygame.time.Clock()
-        
-        # Game state
-        self.levels = {1: "Ancient Entrance", 2: "Crystal Caverns", 3: "Shadow Corridor"}
-        self.current_location = self.levels[1]
-        self.inventory = []
-        self.health = 100
-        self.score = 0
-        self.labyrinth = self._create_labyrinth()
-        self.hint_history = []
-        self.lumos = LUMOS()
-        self.game_state = "intro"  # intro, game, hint_selection, puzzle
-        
-        # Hint system mechanics
-        self.hint_tokens = 3  # Player starts with 3 free hint tokens
-        self.hint_requests = {}  # Track how many hints requested per location
-        self.hint_penalty_threshold = 3  # After this many hints, penalties apply
-        self.consecutive_hint_count = 0  # Track consecutive hint requests
-        self.hint_context = "general"  # Default hint context
-        
-        # Combat & health mechanics
-        self.healing_items = {"Health Potion": 20, "Magic Elixir": 50}
-        self.protection_items = {"Shield": 50, "Magic Amulet": 75}
-        
-        # Score mechanics - track progress
-        self.discovered_locations = set()
-        self.completed_puzzles = set()
+        self.engine = ExplorerEngine()
         
         # UI Elements - Adjusted positions to prevent overlap
         self.message_box = MessageBox(20, 270, 600, 300)
         self.inventory_display = InventoryDisplay(660, 270, 340, 300)
         self.status_bar = StatusBar(20, 600, 980, 40)
         self.mini_map = MiniMap(660, 100, 340, 150)
-        self.mini_map.set_data(self.labyrinth, self.current_location)
+        self.map_labyrinth = None  # Labyrinth the minimap was last given; a restart brings a new one
+        self.map_location = None
         
         # Navigation buttons
         self.navigation_buttons = []
@@ -426,44 +413,13 @@ class LabyrinthGame:
         
         # Initialize game
         self._initialize_ui()
-        
-    def _create_labyrinth(self):
-        """Create a labyrinth structure with hazards, puzzles, and rewards"""
-        return {
-            "Ancient Entrance": Node(
-                name="Ancient Entrance",
-                description="A mysterious entrance with ancient symbols carved into the walls.",
-                neighbors=[("Crystal Caverns", 5), ("Shadow Corridor", 8)],
-                items=["Torch"],
-                puzzles={"Symbol Alignment": 15},  # Solving gives 15 points
-                position=(20, 50)  # Position for map display
-            ),
-            "Crystal Caverns": Node(
-                name="Crystal Caverns",
-                description="Glowing crystals illuminate this beautiful cavern.",
-                neighbors=[("Ancient Entrance", 5), ("Shadow Corridor", 3)],
-                items=["Light Crystal"],
-                required_items=["Torch"],
-                hazards={"Crystal Shards": 5},  # 5 health damage if not careful
-                puzzles={"Crystal Alignment": 20},  # Solving gives 20 points
-                position=(60, 20)  # Position for map display
-            ),
-            "Shadow Corridor": Node(
-                name="Shadow Corridor",
-                description="A dark corridor where shadows seem to move on their own.",
-                neighbors=[("Ancient Entrance", 8), ("Crystal Caverns", 3)],
-                items=["Health Potion", "Shield"],
-                hazards={"Living Shadows": 15},  # 15 health damage per turn if not solved
-                puzzles={"Shadow Projection": 25},  # Solving gives 25 points
-                position=(80, 70)  # Position for map display
-            )
-        }
+        self._sync_ui()
         
     def _initialize_ui(self):
         # Add intro message
         self.message_box.add_message("🎮 Welcome to the Labyrinth!", GOLD)
-        self.message_box.add_message(self.lumos.greet(), LIGHT_BLUE)
-        self.message_box.add_message(f"You start with {self.hint_tokens} hint tokens for free hints.", WHITE)
+        self.message_box.add_message(self.engine.lumos.greet(), LIGHT_BLUE)
+        self.message_box.add_message(f"You start with {self.engine.hint_tokens} hint tokens for free hints.", WHITE)
         self.message_box.add_message("- Explore locations to earn score points", WHITE)
         self.message_box.add_message("- Solve puzzles for rewards", WHITE)
         self.message_box.add_message("- Use hints wisely - they have costs", WHITE)
@@ -483,26 +439,49 @@ class LabyrinthGame:
             30
         )
         
+    def act(self, action) -> None:
+        """Play one action on the engine and show what it said"""
+        self.engine.step(action)
+        for text, tone in self.engine.messages:
+            self.message_box.add_message(text, TONE_COLORS[tone])
+        self._sync_ui()
+        
+    def _sync_ui(self):
+        """Rebuild the widgets that mirror engine state"""
+        engine = self.engine
+        if engine.inventory != self.inventory_display.inventory:
+            self.inventory_display.update_inventory(engine.inventory)
+        if engine.labyrinth is not self.map_labyrinth or engine.current_location != self.map_location:
+            self.mini_map.set_data(engine.labyrinth, engine.current_location, engine.levels)
+            self.mini_map.graph = engine.graph
+            self.map_labyrinth = engine.labyrinth
+            self.map_location = engine.current_location
+        if engine.current_screen == "game":
+            self._update_navigation_buttons()
+        elif engine.current_screen == "hint_selection":
+            self._update_hint_buttons()
+        
     def _update_navigation_buttons(self):
         """Update navigation buttons based on current location"""
         self.navigation_buttons = []
-        current = self.labyrinth[self.current_location]
+        engine = self.engine
+        current = engine.labyrinth[engine.current_location]
         
         # Add navigation buttons - Fixed positioning to prevent overlap
         y_pos = 100
         for i, (location, difficulty) in enumerate(current.neighbors):
-            next_room = self.labyrinth[location]
+            next_room = engine.labyrinth[location]
             button_text = f"To {location} (Difficulty: {difficulty})"
             
             # Show lock if room requires items
-            if next_room.required_items and not all(item in self.inventory for item in next_room.required_items):
+            if next_room.required_items and not engine.inventory.has_all(next_room.required_items):
                 button_text += f" 🔒 Requires: {', '.join(next_room.required_items)}"
                 button_color = GRAY  # Grayed out
             else:
                 button_color = LIGHT_BLUE
                 
             btn = Button(20, y_pos, 560, 40, button_text, button_color)
-            self.navigation_buttons.append((btn, location))
+            self.navigation_buttons.append((btn, ("move", location)))
             y_pos += 50
             
         # Update action buttons with correct vertical position
@@ -518,8 +497,7 @@ class LabyrinthGame:
         self.action_buttons.append((use_item_btn, "use_item"))
         
         # Puzzle button
-        current = self.labyrinth[self.current_location]
-        if current.puzzles and (set(current.puzzles.keys()) - current.puzzle_solved):
+        if "solve_puzzle" in self.engine.legal_actions():
             puzzle_btn = Button(320, y_pos, 260, 40, "Solve Puzzle", LIGHT_GRAY)
             self.action_buttons.append((puzzle_btn, "solve_puzzle"))
         
@@ -527,7 +505,7 @@ class LabyrinthGame:
         
         # Hint button
         hint_btn = Button(20, y_pos, 260, 40, "Ask LUMOS for Hint", GOLD)
-        self.action_buttons.append((hint_btn, "request_hint"))
+        self.action_buttons.append((hint_btn, "hint"))
         
         # Quit button
         quit_btn = Button(320, y_pos, 260, 40, "Quit Game", RED)
@@ -538,276 +516,20 @@ class LabyrinthGame:
         self.hint_buttons = []
         y_pos = 200
         
-        hint_options = self.get_hint_options()
+        hint_options = self.engine.get_hint_options()
         for i, option_text in enumerate(hint_options):
             btn = Button(150, y_pos, 600, 40, option_text, LIGHT_BLUE)
-            self.hint_buttons.append((btn, i+1))  # Store button and hint level choice
+            self.hint_buttons.append((btn, ("hint", i+1)))  # Store button and hint level choice
             y_pos += 60
             
         # Add cancel button
         cancel_btn = Button(350, y_pos, 200, 40, "Cancel", RED)
         self.hint_buttons.append((cancel_btn, "cancel"))
         
-    def uniform_cost_search(self, start: str, goal: str) -> List[str]:
-        """Implement UCS to find the optimal path through the labyrinth"""
-        frontier = []
-        explored = set()
-        start_node = PathNode(state=start)
-        heapq.heappush(frontier, start_node)
-
-        while frontier:
-            node = heapq.heappop(frontier)
-            if node.state == goal:
-                path = []
-                while node.parent:
-                    path.append(node.action)
-                    node = node.parent
-                return list(reversed(path))
-
-            if node.state in explored:
-                continue
-            explored.add(node.state)
-
-            current_room = self.labyrinth[node.state]
-            for next_location, cost in current_room.neighbors:
-                if next_location not in explored:
-                    # Consider inventory requirements in pathfinding
-                    next_room = self.labyrinth[next_location]
-                    if next_room.required_items and not all(item in self.inventory for item in next_room.required_items):
-                        # Increase cost for locked rooms
-                        adjusted_cost = cost * 3
-                    else:
-                        adjusted_cost = cost
-
-                    # Consider hazards in pathfinding
-                    if next_room.hazards and not any(item in self.protection_items for item in self.inventory):
-                        # Increase cost for dangerous rooms without protection
-                        hazard_penalty = sum(damage for damage in next_room.hazards.values())
-                        adjusted_cost += hazard_penalty / 2
-
-                    child = PathNode(
-                        state=next_location,
-                        parent=node,
-                        action=f"Move to {next_location}",
-                        path_cost=node.path_cost + adjusted_cost
-                    )
-                    heapq.heappush(frontier, child)
-        return []
-
-    def get_hint_options(self) -> List[str]:
-        """Get available hint options based on current tokens and costs"""
-        hint_options = []
-
-        # Add free hint if player has tokens
-        if self.hint_tokens > 0:
-            hint_options.append(f"1. Vague hint (Free - {self.hint_tokens} tokens left)")
-        else:
-            hint_options.append(f"1. Vague hint (Cost: {self.lumos.hint_costs['vague']} points)")
-
-        # Add paid hint options
-        hint_options.append(f"2. Moderate hint (Cost: {self.lumos.hint_costs['moderate']} points)")
-        hint_options.append(f"3. Specific hint (Cost: {self.lumos.hint_costs['specific']} points)")
-        hint_options.append(f"4. Explicit hint (Cost: {self.lumos.hint_costs['explicit']} points)")
-
-        return hint_options
-
-    def request_hint(self, choice: int) -> None:
-        """Handle player hint requests with cost system and consequences"""
-        # Track hint requests for this location
-        self.hint_requests[self.current_location] = self.hint_requests.get(self.current_location, 0) + 1
-        self.consecutive_hint_count += 1
-
-        if 1 <= choice <= 4:
-            hint_levels = ["vague", "moderate", "specific", "explicit"]
-            selected_level = hint_levels[choice-1]
-
-            # Calculate cost with penalties
-            base_cost = self.lumos.hint_costs[selected_level]
-            penalty_multiplier = 1.0
-
-            # Apply penalties for excessive hints at this location
-            if self.hint_requests[self.current_location] > self.hint_penalty_threshold:
-                penalty_multiplier = 1.5
-                self.message_box.add_message("\n💫 LUMOS: The magic here grows weaker with repeated questions...", LIGHT_BLUE)
-
-            # Apply penalty for consecutive hints anywhere
-            if self.consecutive_hint_count > 2:
-                penalty_multiplier += 0.5
-                self.message_box.add_message("\n💫 LUMOS: My energy drains with so many questions in succession...", LIGHT_BLUE)
-
-            final_cost = round(base_cost * penalty_multiplier)
-
-            # Check if player has tokens for vague hints
-            if choice == 1 and self.hint_tokens > 0:
-                self.hint_tokens -= 1
-                self.message_box.add_message(f"\n💫 LUMOS is using one of your hint tokens. {self.hint_tokens} tokens remaining.", GOLD)
-                cost_applied = 0
-            else:
-                # Apply the cost
-                if self.score >= final_cost:
-                    self.score -= final_cost
-                    cost_applied = final_cost
-                    if penalty_multiplier > 1.0:
-                        self.message_box.add_message("\n💫 LUMOS: The magic requires more energy due to repeated inquiries...", LIGHT_BLUE)
-                else:
-                    self.message_box.add_message("\n💫 LUMOS: You do not have enough points for this level of insight.", RED)
-                    self.message_box.add_message(f"Cost: {final_cost} points. Your score: {self.score} points.", RED)
-                    return
-
-            # Add health penalty for explicit hints - Conversation has consequences!
-            if selected_level == "explicit" and choice != 1:
-                health_cost = 5
-                self.health -= health_cost
-                self.message_box.add_message(f"\n💫 LUMOS: Warning - such direct knowledge taxes your life force! (-{health_cost} health)", RED)
-
-            # Deliver the hint
-# Deliver the hint
-            hint, _ = self.lumos.give_hint(self.current_location, self.hint_context, selected_level)
-            
-            # Add hint to history
-            self.hint_history.append({
-                "location": self.current_location,
-                "level": selected_level,
-                "text": hint,
-                "cost": cost_applied
-            })
-            
-            self.message_box.add_message(f"\n💫 LUMOS: {hint}", LIGHT_BLUE)
-            if cost_applied > 0:
-                self.message_box.add_message(f"Cost: {cost_applied} points deducted.", GOLD)
-            
-            # Small chance (20%) for bonus encouragement from LUMOS
-            if random.random() < 0.2:
-                self.message_box.add_message(f"\n💫 LUMOS: {self.lumos.encourage()}", LIGHT_BLUE)
-                
-        elif choice == "cancel":
-            self.message_box.add_message("\nHint request canceled.", WHITE)
-            self.consecutive_hint_count -= 1  # Don't count canceled requests
-            
-        # Reset game state
-        self.game_state = "game"
-        self._update_navigation_buttons()
-            
-    def process_location(self) -> None:
-        """Process arrival at a new location"""
-        current = self.labyrinth[self.current_location]
-        
-        # Add location to discovered locations
-        if self.current_location not in self.discovered_locations:
-            self.discovered_locations.add(self.current_location)
-            self.score += 10  # Points for discovering new location
-            self.message_box.add_message(f"\n🏆 +10 points for discovering {self.current_location}!", GREEN)
-            
-        # Apply hazards if present
-        for hazard, damage in current.hazards.items():
-            # Check for protection items
-            protected = False
-            for item in self.inventory:
-                if item in self.protection_items:
-                    protected = True
-                    protection_value = self.protection_items[item]
-                    reduced_damage = max(0, damage - (damage * protection_value / 100))
-                    if reduced_damage > 0:
-                        self.health -= reduced_damage
-                        self.message_box.add_message(f"\n⚠️ {hazard} causes {reduced_damage:.1f} damage (reduced by {item})!", GOLD)
-                    else:
-                        self.message_box.add_message(f"\n🛡️ Your {item} completely protects you from {hazard}!", GREEN)
-                    break
-                    
-            if not protected:
-                self.health -= damage
-                self.message_box.add_message(f"\n⚠️ {hazard} causes {damage} damage!", RED)
-                
-        # Handle death
-        if self.health <= 0:
-            self.health = 0
-            self.message_box.add_message("\n💀 You have fallen in the labyrinth! Game over.", RED)
-            self.game_state = "game_over"
-            return
-            
-        # Check for items to collect
-        if current.items:
-            self.message_box.add_message("\nYou find the following items:", WHITE)
-            for item in current.items[:]:  # Create a copy to iterate while removing
-                self.message_box.add_message(f"- {item}", GREEN)
-                self.inventory.append(item)
-                current.items.remove(item)
-                
-            self.inventory_display.update_inventory(self.inventory)
-            
-        # Reset consecutive hint count when moving
-        self.consecutive_hint_count = 0
-            
-    def solve_puzzle(self) -> None:
-        """Handle puzzle solving"""
-        current = self.labyrinth[self.current_location]
-        unsolved_puzzles = set(current.puzzles.keys()) - current.puzzle_solved
-        
-        if not unsolved_puzzles:
-            self.message_box.add_message("\nThere are no puzzles to solve here.", WHITE)
-            return
-            
-        puzzle = next(iter(unsolved_puzzles))
-        reward = current.puzzles[puzzle]
-        
-        # Set hint context to puzzle for more relevant hints
-        self.hint_context = "puzzle"
-        
-        self.message_box.add_message(f"\nYou attempt to solve the {puzzle} puzzle...", WHITE)
-        
-        # Simulate puzzle solving with higher chance of success if player has received hints
-        received_hints = sum(1 for h in self.hint_history if h["location"] == self.current_location and h["level"] in ["specific", "explicit"])
-        
-        success_chance = 0.3 + (received_hints * 0.2)  # Base 30% + 20% per relevant hint
-        
-        if random.random() < success_chance:
-            self.message_box.add_message("\n🎮 Success! You solved the puzzle!", GREEN)
-            self.message_box.add_message(f"🏆 +{reward} points awarded!", GREEN)
-            self.score += reward
-            current.puzzle_solved.add(puzzle)
-            self.completed_puzzles.add(f"{self.current_location}: {puzzle}")
-            
-            # Bonus reward: hint token for puzzle completion
-            if random.random() < 0.5:
-                self.hint_tokens += 1
-                self.message_box.add_message("💫 You've earned a hint token as a bonus reward!", GOLD)
-                
-            # Check if room was locked and now can be unlocked
-            if current.locked and not current.required_items:
-                current.locked = False
-                self.message_box.add_message("\n🔓 This room is now fully accessible!", GREEN)
-        else:
-            self.message_box.add_message("\n❌ You failed to solve the puzzle. Try again or use a hint.", RED)
-            
-            # Small health penalty for failed puzzle attempts
-            damage = 5
-            self.health -= damage
-            self.message_box.add_message(f"😵 The failed attempt cost you {damage} health!", RED)
-            
-        # Reset hint context
-        self.hint_context = "general"
-        
-    def use_item(self, item: str) -> None:
-        """Handle item usage"""
-        if item in self.healing_items:
-            # Apply healing effect
-            heal_amount = self.healing_items[item]
-            self.health = min(100, self.health + heal_amount)
-            self.message_box.add_message(f"\n💊 You used {item} and recovered {heal_amount} health!", GREEN)
-            self.inventory.remove(item)
-            self.inventory_display.update_inventory(self.inventory)
-        elif "Torch" in item and "Crystal" in self.current_location:
-            # Special interaction in crystal caverns
-            self.message_box.add_message("\n✨ Your torch causes the crystals to glow brightly!", LIGHT_BLUE)
-            self.message_box.add_message("The path becomes clearer, and you feel energized.", LIGHT_BLUE)
-            self.score += 5
-            self.message_box.add_message("🏆 +5 points for clever item usage!", GREEN)
-        else:
-            self.message_box.add_message(f"\nYou cannot use {item} here effectively.", GOLD)
-            
     def run(self):
         """Main game loop"""
         running = True
+        engine = self.engine
         
         while running:
             mouse_pos = pygame.mouse.get_pos()
@@ -818,67 +540,56 @@ class LabyrinthGame:
                     running = False
                     
                 # Handle mouse hover
-                if self.game_state == "intro":
+                if engine.current_screen == "intro":
                     self.intro_button.check_hover(mouse_pos)
                     
                     # Check if intro button clicked
                     if self.intro_button.is_clicked(mouse_pos, event):
-                        self.game_state = "game"
-                        self.message_box.add_message("\n🚪 Your adventure begins! Where would you like to go?", WHITE)
-                        self._update_navigation_buttons()
+                        self.act("start")
                         
-                elif self.game_state == "game":
+                elif engine.current_screen == "game":
                     # Handle navigation buttons
-                    for button, destination in self.navigation_buttons:
+                    for button, action in self.navigation_buttons:
                         button.check_hover(mouse_pos)
                         if button.is_clicked(mouse_pos, event):
-                            next_room = self.labyrinth[destination]
-                            if next_room.required_items and not all(item in self.inventory for item in next_room.required_items):
-                                self.message_box.add_message(f"\n🔒 You need {', '.join(next_room.required_items)} to enter {destination}.", RED)
-                            else:
-                                self.current_location = destination
-                                self.message_box.add_message(f"\n🚶 You move to {destination}.", WHITE)
-                                self.message_box.add_message(next_room.description, WHITE)
-                                self._update_navigation_buttons()
-                                self.mini_map.set_data(self.labyrinth, self.current_location)
-                                self.process_location()
+                            self.act(action)
+
+                    # Zoom and pan the map; click a discovered room on it to take the first step towards it
+                    map_event = self.mini_map.handle_event(event, mouse_pos)
+                    if not map_event and event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                        target = self.mini_map.room_at(mouse_pos)
+                        if target in engine.discovered_locations and target != engine.current_location:
+                            path = engine.find_path(engine.current_location, target)
+                            if path:
+                                self.act(("move", path[0][len("Move to "):]))
                     
                     # Handle action buttons
                     for button, action in self.action_buttons:
                         button.check_hover(mouse_pos)
                         if button.is_clicked(mouse_pos, event):
-                            if action == "request_hint":
-                                self.game_state = "hint_selection"
-                                self._update_hint_buttons()
-                                self.message_box.add_message("\n💫 LUMOS: What level of guidance do you seek?", LIGHT_BLUE)
-                            elif action == "solve_puzzle":
-                                self.solve_puzzle()
-                            elif action == "use_item":
-                                if not self.inventory:
-                                    self.message_box.add_message("\nYour inventory is empty.", RED)
-                                # Items are handled by inventory display
-                            elif action == "quit":
+                            if action == "quit":
                                 running = False
+                            else:
+                                self.act(action)
                     
                     # Handle inventory item buttons
                     for i, button in enumerate(self.inventory_display.buttons):
                         button.check_hover(mouse_pos)
                         if button.is_clicked(mouse_pos, event):
-                            item = self.inventory[i]
-                            self.use_item(item)
+                            self.act(("use", engine.inventory[i]))
                     
-                elif self.game_state == "hint_selection":
+                elif engine.current_screen == "hint_selection":
                     # Handle hint buttons
-                    for button, choice in self.hint_buttons:
+                    for button, action in self.hint_buttons:
                         button.check_hover(mouse_pos)
                         if button.is_clicked(mouse_pos, event):
-                            self.request_hint(choice)
+                            self.act(action)
                 
                 # Handle message box scrolling
                 self.message_box.handle_scroll(event)
                     
             # Update status
-            self.status_bar.update(self.health, self.score, self.hint_tokens)
+            self.status_bar.update(engine.health, engine.score, engine.hint_tokens)
             
             # Draw background
             self.screen.fill(BLACK)
@@ -889,20 +600,20 @@ class LabyrinthGame:
             self.screen.blit(title, (SCREEN_WIDTH // 2 - title.get_width() // 2, 20))
             
             # Draw current location
-            if self.game_state != "intro":
+            if engine.current_screen != "intro":
                 loc_font = pygame.font.SysFont(None, 36)
-                location_text = loc_font.render(f"Location: {self.current_location}", True, WHITE)
+                location_text = loc_font.render(f"Location: {engine.current_location}", True, WHITE)
                 self.screen.blit(location_text, (20, 80))
             
             # Draw UI elements
-            if self.game_state == "intro":
+            if engine.current_screen == "intro":
                 intro_font = pygame.font.SysFont(None, 32)
                 intro_text = intro_font.render("A mysterious labyrinth awaits exploration...", True, WHITE)
                 self.screen.blit(intro_text, (SCREEN_WIDTH // 2 - intro_text.get_width() // 2, 150))
                 
                 self.intro_button.draw(self.screen)
             
-            elif self.game_state == "game":
+            elif engine.current_screen == "game":
                 # Draw navigation and action buttons
                 for button, _ in self.navigation_buttons:
                     button.draw(self.screen)
@@ -910,7 +621,7 @@ class LabyrinthGame:
                 for button, _ in self.action_buttons:
                     button.draw(self.screen)
                     
-            elif self.game_state == "hint_selection":
+            elif engine.current_screen == "hint_selection":
                 # Draw hint prompt
                 hint_font = pygame.font.SysFont(None, 32)
                 hint_text = hint_font.render("Select a hint level:", True, WHITE)
@@ -919,12 +630,12 @@ class LabyrinthGame:
                 for button, _ in self.hint_buttons:
                     button.draw(self.screen)
                     
-            elif self.game_state == "game_over":
+            elif engine.current_screen == "game_over":
                 game_over_font = pygame.font.SysFont(None, 64)
                 game_over_text = game_over_font.render("GAME OVER", True, RED)
                 self.screen.blit(game_over_text, (SCREEN_WIDTH // 2 - game_over_text.get_width() // 2, 150))
                 
-                score_text = pygame.font.SysFont(None, 32).render(f"Final Score: {self.score}", True, WHITE)
+                score_text = pygame.font.SysFont(None, 32).render(f"Final Score: {engine.score}", True, WHITE)
                 self.screen.blit(score_text, (SCREEN_WIDTH // 2 - score_text.get_width() // 2, 250))
                 
                 # Show restart button
@@ -948,12 +659,13 @@ class LabyrinthGame:
             self.message_box.draw(self.screen)
             self.inventory_display.draw(self.screen)
             self.status_bar.draw(self.screen)
-            self.mini_map.draw(self.screen, self.discovered_locations)
+            self.mini_map.draw(self.screen, engine.discovered_locations)
             
             # Update display
             pygame.display.flip()
             self.clock.tick(FPS)
             
+        engine.close()
         pygame.quit()
 
 if __name__ == "__main__":
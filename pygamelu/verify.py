@@ -0,0 +1,326 @@
+import os
+import shutil
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from levelfile import LevelFile, builtin_labyrinth, export_level
+
+MAX_STATES = 250_000  # (room, keys) states before the collection order falls back to the item closure
+SHOWN_ROOMS = 5  # Rooms listed per dead key in reports
+
+
+class Room:
+    """Bare room for reading level files without importing a game (and pygame)"""
+    def __init__(self, name, description="", neighbors=None, items=None, required_items=None, position=(0, 0),
+                 puzzle=None, boss=None, hazards=None, puzzles=None):
+        self.name = name
+        self.description = description
+        self.neighbors = neighbors or []
+        self.items = items or []
+        self.required_items = required_items or []
+        self.position = position
+        self.puzzle = puzzle
+        self.boss = boss
+        self.hazards = hazards or {}
+        self.puzzles = puzzles or {}
+
+
+class Report:
+    """What verify found out about one labyrinth"""
+    def __init__(self, start: str, goals: List[str]):
+        self.start = start
+        self.goals = goals
+        self.rooms = 0
+        self.unreachable: List[str] = []
+        self.dead_keys: Dict[str, str] = {}  # Required item -> why it can never be held
+        self.completable = False
+        self.moves: Optional[int] = None  # Fewest moves from start into a goal (no goals: to hold every key); None if not searched out
+        self.order: List[str] = []  # Keys picked up on that route, in order
+        self.optimal = True  # False if the state limit was hit and order is only the goal's key chain
+        self.states = 0
+        self.seconds = 0.0
+
+    def to_dict(self) -> Dict:
+        return dict(vars(self))
+
+    def summary(self) -> str:
+        lines = [f"{self.rooms} rooms from {self.start}: "
+                 f"{'completable' if self.completable else 'NOT completable'}"
+                 f" ({self.states} states, {self.seconds * 1000:.1f} ms)"]
+        if self.completable:
+            order = " -> ".join(self.order) or "no keys needed"
+            target = self.goals[0] if len(self.goals) == 1 else "a goal" if self.goals else "hold every key"
+            moves = f"{self.moves} moves to {target}" if self.moves is not None else f"moves to {target} unknown"
+            lines.append(f"  {moves}; collect {order}{'' if self.optimal else ' (not proven minimal)'}")
+        if self.unreachable:
+            shown = ", ".join(self.unreachable[:SHOWN_ROOMS])
+            more = f" and {len(self.unreachable) - SHOWN_ROOMS} more" if len(self.unreachable) > SHOWN_ROOMS else ""
+            lines.append(f"  unreachable: {shown}{more}")
+        for item, reason in self.dead_keys.items():
+            lines.append(f"  dead key {item}: {reason}")
+        return "\n".join(lines)
+
+
+def default_goals(labyrinth) -> List[str]:
+    """Boss rooms; a labyrinth without a boss is complete once every room can be entered"""
+    return [name for name, node in labyrinth.items() if getattr(node, "boss", None)]
+
+
+def verify(labyrinth, start: str, goals: Optional[Iterable[str]] = None, max_states: int = MAX_STATES) -> Report:
+    """Check that a labyrinth can be completed from start.
+
+    Items are picked up on entering a room and never used up, so the rooms
+    that can ever be entered are the closure of start under the items
+    found on the way. The fewest-moves route and its key order come from a
+    breadth-first search over (room, keys held) states; a state is skipped
+    when the same room was already reached holding a superset of its keys.
+    Past max_states the moves stay unknown and the order is the goal's
+    lock-dependency chain, taken from how the closure reached it.
+    """
+    started = time.perf_counter()
+    goals = list(goals) if goals is not None else default_goals(labyrinth)
+    report = Report(start, goals)
+    names = list(labyrinth)
+    ids = {name: i for i, name in enumerate(names)}
+    report.rooms = len(names)
+
+    # Only items some lock asks for get a bit
+    keys = sorted({item for node in labyrinth.values() for item in node.required_items})
+    bits = {item: 1 << i for i, item in enumerate(keys)}
+    neighbors: List[List[int]] = []
+    locks: List[int] = []
+    found: List[int] = []
+    placed: Dict[str, List[str]] = {item: [] for item in keys}
+    for name in names:
+        node = labyrinth[name]
+        neighbors.append([ids[neighbor] for neighbor, _ in node.neighbors if neighbor in ids])
+        locks.append(sum(bits[item] for item in set(node.required_items)))
+        mask = 0
+        for item in set(node.items):
+            if item in bits:
+                mask |= bits[item]
+                placed[item].append(name)
+        found.append(mask)
+
+    # Closure: rooms behind a lock wait until its last missing key turns up
+    source = ids[start]
+    held = found[source]
+    reached = [False] * len(names)
+    reached[source] = True
+    came_from = [-1] * len(names)  # Room the closure entered each room from
+    queue = [source]
+    waiting: Dict[int, List[Tuple[int, int]]] = {}  # Missing key bit -> (room, entered from) parked on it
+    for room in queue:
+        for item_bit in _bits(found[room] & ~held):
+            held |= item_bit
+            for parked, via in waiting.pop(item_bit, ()):
+                _enter(parked, via, held, locks, reached, came_from, queue, waiting)
+        held |= found[room]
+        for neighbor in neighbors[room]:
+            if not reached[neighbor]:
+                _enter(neighbor, room, held, locks, reached, came_from, queue, waiting)
+    report.unreachable = [names[room] for room in range(len(names)) if not reached[room]]
+    for item in keys:
+        if not placed[item]:
+            report.dead_keys[item] = "never placed"
+        elif not held & bits[item]:
+            shown = ", ".join(placed[item][:SHOWN_ROOMS])
+            report.dead_keys[item] = f"only in unreachable rooms ({shown})"
+
+    goal_ids = {ids[goal] for goal in goals if goal in ids}
+    if goals:
+        report.completable = any(reached[goal] for goal in goal_ids)
+    else:
+        report.completable = not report.unreachable
+        goal_ids = None
+    if report.completable:
+        route = _shortest_route(source, goal_ids, neighbors, locks, found, max_states, report)
+        if route is None:
+            # Too many key combinations to search exhaustively: just the keys the goal depends on
+            report.optimal = False
+            report.order = _key_chain(goal_ids, came_from, queue, found, locks, keys)
+        else:
+            report.order = _collection_order(route, found, locks, keys, goal_ids)
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+def _bits(mask: int) -> Iterator[int]:
+    while mask:
+        low = mask & -mask
+        yield low
+        mask ^= low
+
+
+def _enter(room: int, via: int, held: int, locks: List[int], reached: List[bool], came_from: List[int],
+           queue: List[int], waiting: Dict[int, List[Tuple[int, int]]]) -> None:
+    if reached[room]:
+        return
+    missing = locks[room] & ~held
+    if missing:
+        waiting.setdefault(missing & -missing, []).append((room, via))  # Rechecked when that key is found
+    else:
+        reached[room] = True
+        came_from[room] = via
+        queue.append(room)
+
+
+def _shortest_route(source: int, goal_ids, neighbors: List[List[int]], locks: List[int], found: List[int],
+                    max_states: int, report: Report) -> Optional[List[int]]:
+    """Rooms of the fewest-moves route into a goal (or, with no goals, through every room's keys)"""
+    all_keys = 0
+    for mask in found:
+        all_keys |= mask
+    start = (source, found[source])
+    parents: Dict[Tuple[int, int], Optional[Tuple[int, int]]] = {start: None}
+    masks_at: Dict[int, List[int]] = {source: [found[source]]}  # Key sets each room was reached with
+    queue = deque([start])
+    end = None
+    while queue:
+        state = queue.popleft()
+        room, mask = state
+        if (room in goal_ids) if goal_ids is not None else mask == all_keys:
+            end = state
+            break
+        for neighbor in neighbors[room]:
+            if locks[neighbor] & ~mask:
+                continue
+            next_mask = mask | found[neighbor]
+            seen = masks_at.setdefault(neighbor, [])
+            if any(next_mask & ~other == 0 for other in seen):
+                continue
+            seen[:] = [other for other in seen if other & ~next_mask] + [next_mask]
+            next_state = (neighbor, next_mask)
+            parents[next_state] = state
+            queue.append(next_state)
+        if len(parents) > max_states:
+            report.states = len(parents)
+            return None
+    report.states = len(parents)
+    if end is None:
+        return None
+    route = []
+    while end is not None:
+        route.append(end[0])
+        end = parents[end]
+    route.reverse()
+    report.moves = len(route) - 1
+    return route
+
+
+def _collection_order(route: List[int], found: List[int], locks: List[int], keys: List[str], goal_ids) -> List[str]:
+    """Keys picked up along route that a lock on it (or on a goal) actually needs.
+
+    Without goals every room has to be enterable, so every lock counts.
+    """
+    needed = 0
+    for room in route if goal_ids is not None else range(len(locks)):
+        needed |= locks[room]
+    for room in goal_ids or ():
+        needed |= locks[room]
+    order = []
+    held = 0
+    for room in route:
+        for item_bit in _bits(found[room] & needed & ~held):
+            order.append(keys[item_bit.bit_length() - 1])
+        held |= found[room]
+    return order
+
+
+def _key_chain(goal_ids, came_from: List[int], queue: List[int], found: List[int], locks: List[int],
+               keys: List[str]) -> List[str]:
+    """Keys the goal depends on, in the order the closure found them.
+
+    The locks on the closure's path into the first goal it reached, then
+    the locks on the path to the room each of those keys came from, and
+    so on. Without goals every lock counts.
+    """
+    position = {room: i for i, room in enumerate(queue)}
+    first_room: Dict[int, int] = {}  # Key bit -> room the closure picked it up in
+    for room in queue:
+        for item_bit in _bits(found[room]):
+            first_room.setdefault(item_bit, room)
+    if goal_ids is None:
+        pending = list(queue)
+    else:
+        pending = [min((goal for goal in goal_ids if goal in position), key=position.__getitem__)]
+    needed = 0
+    walked = set()
+    while pending:
+        room = pending.pop()
+        while room != -1 and room not in walked:
+            walked.add(room)
+            for item_bit in _bits(locks[room] & ~needed):
+                needed |= item_bit
+                pending.append(first_room[item_bit])
+            room = came_from[room]
+    chain = sorted(_bits(needed), key=lambda item_bit: position[first_room[item_bit]])
+    return [keys[item_bit.bit_length() - 1] for item_bit in chain]
+
+
+def verify_file(path: str, start: Optional[str] = None) -> Tuple[str, Dict]:
+    """verify() on a level file; the start defaults to the one in its header. Runs in pool workers."""
+    level = LevelFile(path, Room)
+    try:
+        labyrinth = {node.name: node for node in level.values()}
+        start = start or level.start
+    finally:
+        level.close()
+    return path, verify(labyrinth, start).to_dict()
+
+
+def verify_files(paths: List[str], workers: Optional[int] = None, chunksize: int = 8) -> Iterator[Tuple[str, Dict]]:
+    """verify_file over many level files in a process pool, in order"""
+    if workers == 1:
+        yield from map(verify_file, paths)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(verify_file, paths, chunksize=chunksize)
+
+
+def benchmark(maps: int, rooms: int, workers: Optional[int] = None, seed: int = 0) -> None:
+    """Generate maps as level files, then verify them serially and in a process pool"""
+    from worldgen import generate_labyrinth
+
+    directory = os.path.join(os.path.dirname(os.path.abspath(__file__)), f"verify_{maps}x{rooms}")
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for i in range(maps):
+        path = os.path.join(directory, f"map{i}.llv")
+        export_level(generate_labyrinth(rooms, Room, seed + i), path)
+        paths.append(path)
+
+    sample = paths[:max(1, maps // 10)]
+    started = time.perf_counter()
+    for _ in verify_files(sample, workers=1):
+        pass
+    serial_rate = len(sample) / (time.perf_counter() - started) * 60
+    started = time.perf_counter()
+    completable = 0
+    for _, report in verify_files(paths, workers):
+        completable += report["completable"]
+    pool_seconds = time.perf_counter() - started
+    shutil.rmtree(directory)
+    print(f"{maps} maps of {rooms} rooms, {completable} completable")
+    print(f"  serial       {serial_rate:10.0f} maps/minute")
+    print(f"  {workers or os.cpu_count()} processes  {maps / pool_seconds * 60:10.0f} maps/minute")
+
+
+if __name__ == "__main__":
+    # python verify.py a|a1|u            -- the game's built-in labyrinth
+    # python verify.py file.llv ...      -- level files, in parallel
+    # python verify.py bench [maps] [rooms]
+    args = sys.argv[1:] or ["a"]
+    if args[0] in ("a", "a1", "u"):
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        game_labyrinth = builtin_labyrinth(args[0])
+        print(verify(game_labyrinth, next(iter(game_labyrinth))).summary())
+    elif args[0] == "bench":
+        benchmark(int(args[1]) if len(args) > 1 else 2000, int(args[2]) if len(args) > 2 else 400)
+    else:
+        for file_path, data in verify_files(args):
+            report = Report(data["start"], data["goals"])
+            vars(report).update(data)
+            print(f"{file_path}: {report.summary()}")
\ No newline at end of file
@@ -0,0 +1,295 @@
+import copy
+import random
+import sys
+import time
+from typing import Dict, List, Set
+try:
+    import numpy as np
+except ImportError:  # The store is optional; without NumPy rooms keep their own state
+    np = None
+
+# Node attribute -> array, for the plain per-room fields
+NODE_FIELDS = ("visited", "locked", "puzzle_attempts", "stuck_count")
+# Key in node.puzzle / node.boss -> array
+PUZZLE_KEYS = {"solved": "puzzle_solved", "complexity": "complexity"}
+BOSS_KEYS = {"defeated": "boss_defeated", "health": "boss_health"}
+
+
+class StateDict(dict):
+    """A room's puzzle or boss dict whose state keys read and write the store's arrays.
+
+    Other keys (question, options, name, weakness...) stay in the dict.
+    """
+    def __init__(self, data: Dict, state: "WorldState", room: int, keys: Dict[str, str]):
+        super().__init__((key, value) for key, value in data.items() if key not in keys)
+        self.state = state
+        self.room = room
+        self.keys = keys
+
+    def __getitem__(self, key):
+        field = self.keys.get(key)
+        if field is None:
+            return super().__getitem__(key)
+        return self._read(field)
+
+    def get(self, key, default=None):
+        field = self.keys.get(key)
+        if field is None:
+            return super().get(key, default)
+        return self._read(field)
+
+    def _read(self, field: str):
+        value = self.state.arrays[field][self.room].item()
+        # Complexities are floats in the array; whole ones read back as the ints they were written as
+        return int(value) if isinstance(value, float) and value.is_integer() else value
+
+    def __setitem__(self, key, value) -> None:
+        field = self.keys.get(key)
+        if field is None:
+            super().__setitem__(key, value)
+        else:
+            self.state.arrays[field][self.room] = value
+
+    def __contains__(self, key) -> bool:
+        return key in self.keys or super().__contains__(key)
+
+    def __bool__(self) -> bool:
+        return True  # Only rooms that had a puzzle or boss get one
+
+    def __iter__(self):
+        return iter(self.plain())
+
+    def items(self):
+        return self.plain().items()
+
+    def copy(self) -> Dict:
+        return self.plain()
+
+    def plain(self) -> Dict:
+        data = dict(super().items())
+        data.update((key, self[key]) for key in self.keys)
+        return data
+
+
+def _state_property(field: str):
+    def get(self):
+        return self._state.arrays[field][self._state_id].item()
+
+    def set(self, value) -> None:
+        self._state.arrays[field][self._state_id] = value
+    return property(get, set)
+
+
+_BOUND_CLASSES: Dict[type, type] = {}
+
+
+def unbound_copy(node):
+    """A shallow copy of a room that holds its state as plain values.
+
+    A copy of a bound room would still read and write the store's arrays;
+    this one is of the room's own class with the current values copied in.
+    Other rooms are simply copied.
+    """
+    room = copy.copy(node)
+    if "_state" in node.__dict__:
+        room.__class__ = type(node).__bases__[0]
+        del room._state, room._state_id
+        room.__dict__.update((field, getattr(node, field)) for field in NODE_FIELDS)
+    if isinstance(node.puzzle, StateDict):
+        room.puzzle = node.puzzle.plain()
+    if isinstance(node.boss, StateDict):
+        room.boss = node.boss.plain()
+    return room
+
+
+def _bound_class(node_cls: type) -> type:
+    """node_cls with its state attributes redirected to the store"""
+    bound = _BOUND_CLASSES.get(node_cls)
+    if bound is None:
+        attributes = {field: _state_property(field) for field in NODE_FIELDS}
+        bound = _BOUND_CLASSES[node_cls] = type(node_cls.__name__, (node_cls,), attributes)
+    return bound
+
+
+class WorldState:
+    """Per-room mutable state kept as NumPy arrays indexed by room id.
+
+    attach() points each room's visited, locked, puzzle_attempts and
+    stuck_count, and the solved/complexity and defeated/health entries of its
+    puzzle and boss dicts, at the arrays, so the per-room game code keeps
+    working while whole-world passes (reset, counting, difficulty scaling)
+    become single array operations. detach() writes the arrays back into
+    plain nodes, e.g. before the rooms are saved.
+    """
+    def __init__(self, labyrinth):
+        if np is None:
+            raise ImportError("WorldState needs NumPy")
+        self.labyrinth = labyrinth
+        self.names: List[str] = list(labyrinth)
+        self.ids: Dict[str, int] = {name: i for i, name in enumerate(self.names)}
+        nodes = [labyrinth[name] for name in self.names]
+        count = len(nodes)
+        self.arrays = {
+            "visited": np.fromiter((node.visited for node in nodes), bool, count),
+            "locked": np.fromiter((node.locked for node in nodes), bool, count),
+            "puzzle_attempts": np.fromiter((node.puzzle_attempts for node in nodes), np.int32, count),
+            "stuck_count": np.fromiter((node.stuck_count for node in nodes), np.int32, count),
+            "has_puzzle": np.fromiter((bool(node.puzzle) for node in nodes), bool, count),
+            "puzzle_solved": np.fromiter((bool(node.puzzle and node.puzzle.get("solved", False)) for node in nodes),
+                                         bool, count),
+            "complexity": np.fromiter((node.puzzle.get("complexity", 1) if node.puzzle else 0 for node in nodes),
+                                      np.float64, count),
+            "has_boss": np.fromiter((bool(node.boss) for node in nodes), bool, count),
+            "boss_defeated": np.fromiter((bool(node.boss and node.boss.get("defeated", False)) for node in nodes),
+                                         bool, count),
+            "boss_health": np.fromiter((node.boss.get("health", 100) if node.boss else 0 for node in nodes),
+                                       np.int32, count),
+        }
+        # What reset() returns to
+        self.initial = {field: self.arrays[field].copy()
+                        for field in ("locked", "complexity", "boss_health")}
+        self.attached = False
+
+    def __getattr__(self, field: str):
+        try:
+            return self.__dict__["arrays"][field]
+        except KeyError:
+            raise AttributeError(field) from None
+
+    def attach(self) -> None:
+        """Redirect every room's state to the arrays"""
+        for room, name in enumerate(self.names):
+            node = self.labyrinth[name]
+            for field in NODE_FIELDS:
+                node.__dict__.pop(field, None)
+            node._state = self
+            node._state_id = room
+            if node.puzzle:
+                node.puzzle = StateDict(node.puzzle, self, room, PUZZLE_KEYS)
+            if node.boss:
+                node.boss = StateDict(node.boss, self, room, BOSS_KEYS)
+            node.__class__ = _bound_class(type(node))
+        self.attached = True
+
+    def detach(self) -> None:
+        """Write the arrays back into plain nodes"""
+        for room, name in enumerate(self.names):
+            node = self.labyrinth[name]
+            values = {field: getattr(node, field) for field in NODE_FIELDS}
+            node.__class__ = node.__class__.__bases__[0]
+            del node._state, node._state_id
+            node.__dict__.update(values)
+            if isinstance(node.puzzle, StateDict):
+                node.puzzle = node.puzzle.plain()
+            if isinstance(node.boss, StateDict):
+                node.boss = node.boss.plain()
+        self.attached = False
+
+    # Whole-world operations
+    def reset(self) -> None:
+        """Every room back to unvisited, unsolved and at its starting difficulty"""
+        self.visited[:] = False
+        self.puzzle_attempts[:] = 0
+        self.stuck_count[:] = 0
+        self.puzzle_solved[:] = False
+        self.boss_defeated[:] = False
+        for field, values in self.initial.items():
+            self.arrays[field][:] = values
+
+    def total_puzzles(self) -> int:
+        return int(np.count_nonzero(self.has_puzzle))
+
+    def count_solved(self) -> int:
+        return int(np.count_nonzero(self.puzzle_solved))
+
+    def solved_rooms(self) -> Set[str]:
+        return {self.names[room] for room in np.flatnonzero(self.puzzle_solved)}
+
+    def visited_rooms(self) -> Set[str]:
+        return {self.names[room] for room in np.flatnonzero(self.visited)}
+
+    def scale_complexity(self, step: float, cap: float = 5.0) -> int:
+        """Raise every unsolved puzzle's complexity by step, capped; returns how many changed"""
+        unsolved = self.has_puzzle & ~self.puzzle_solved
+        np.minimum(self.complexity + step, cap, out=self.complexity, where=unsolved)
+        return int(np.count_nonzero(unsolved))
+
+    def scale_bosses(self, extra_health: int) -> None:
+        """Give every undefeated boss extra health"""
+        self.boss_health[self.has_boss & ~self.boss_defeated] += extra_health
+
+
+def benchmark(rooms: int, seed: int = 0) -> None:
+    """Whole-world passes over Node attributes against the array store"""
+    from engine import Node
+    from worldgen import generate_labyrinth
+
+    labyrinth = generate_labyrinth(rooms, Node, seed, puzzle_share=0.2)
+    rng = random.Random(seed)
+    for node in labyrinth.values():
+        if node.puzzle and rng.random() < 0.3:
+            node.puzzle["solved"] = True
+        node.visited = rng.random() < 0.5
+
+    def python_passes():
+        total = sum(1 for node in labyrinth.values() if node.puzzle)
+        solved = sum(1 for node in labyrinth.values() if node.puzzle and node.puzzle.get("solved", False))
+        for node in labyrinth.values():
+            if node.puzzle and not node.puzzle.get("solved", False):
+                node.puzzle["complexity"] = min(5, node.puzzle.get("complexity", 1) + 0.5)
+        for node in labyrinth.values():
+            node.visited = False
+            node.puzzle_attempts = 0
+            node.stuck_count = 0
+        return total, solved
+
+    started = time.perf_counter()
+    expected = python_passes()
+    python_seconds = time.perf_counter() - started
+
+    # The per-room code path, on plain nodes and then through the views
+    names = rng.sample(list(labyrinth), min(rooms, 100_000))
+
+    def visit_rooms():
+        started = time.perf_counter()
+        for name in names:
+            node = labyrinth[name]
+            if not node.visited:
+                node.visited = True
+                node.stuck_count += 1
+        return (time.perf_counter() - started) / len(names)
+
+    plain_seconds = visit_rooms()
+    for node in labyrinth.values():
+        node.visited = True
+    started = time.perf_counter()
+    state = WorldState(labyrinth)
+    state.attach()
+    attach_seconds = time.perf_counter() - started
+
+    def array_passes():
+        total, solved = state.total_puzzles(), state.count_solved()
+        state.scale_complexity(0.5)
+        state.visited[:] = False
+        state.puzzle_attempts[:] = 0
+        state.stuck_count[:] = 0
+        return total, solved
+
+    started = time.perf_counter()
+    got = array_passes()
+    array_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    state.reset()
+    reset_seconds = time.perf_counter() - started
+
+    view_seconds = visit_rooms()
+    print(f"{rooms} rooms ({expected[0]} puzzles, {expected[1]} solved; arrays agree: {got == expected})")
+    print(f"  python passes  {python_seconds * 1000:9.1f} ms")
+    print(f"  array passes   {array_seconds * 1000:9.1f} ms   (full reset {reset_seconds * 1000:.1f} ms, "
+          f"built and attached in {attach_seconds:.1f}s)")
+    print(f"  per-room visit {view_seconds * 1e9:9.0f} ns through the views, {plain_seconds * 1e9:.0f} ns on plain nodes")
+
+
+if __name__ == "__main__":
+    # Benchmark: python world_state.py [rooms]
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
\ No newline at end of file
@@ -0,0 +1,361 @@
+import hashlib
+import inspect
+import json
+import math
+import os
+import random
+import shutil
+import sys
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+from hint_table import room_signature
+
+# A world on disk is a directory holding world.json (room count, chunk size,
+# start and goal rooms, the start's chunk, level entry rooms, and what the
+# game needs about the whole world: the puzzle count, the layout signature
+# and the rooms holding each item a door needs) and one c<cx>_<cy>.json per
+# chunk. A chunk holds the rooms whose map position falls in one cell of a
+# square grid, every attribute of each room, and the chunk of each room its
+# corridors lead to outside the chunk.
+WORLD_FILE = "world.json"
+DERIVED_FIELDS = {"color"}  # Recomputed by Node.__init__, never stored
+
+
+def chunk_file(directory: str, key: Tuple[int, int]) -> str:
+    return os.path.join(directory, f"c{key[0]}_{key[1]}.json")
+
+
+def room_record(node) -> Dict:
+    """Every attribute of a room as JSON-ready data"""
+    record = {}
+    for field, value in vars(node).items():
+        if field in DERIVED_FIELDS:
+            continue
+        if isinstance(value, set):
+            value = sorted(value)
+        record[field] = value
+    return record
+
+
+def room_from_record(node_cls, record: Dict):
+    params = inspect.signature(node_cls).parameters
+    node = node_cls(**{field: value for field, value in record.items() if field in params})
+    for field, value in record.items():
+        if field in params:
+            continue
+        if isinstance(getattr(node, field, None), set):
+            value = set(value)
+        setattr(node, field, value)
+    node.neighbors = [tuple(edge) for edge in node.neighbors]
+    node.position = tuple(node.position)
+    return node
+
+
+def write_world(rooms: Iterator, directory: str, cell: float, start: str, goal: str,
+                levels: Optional[Dict[int, str]] = None) -> Dict:
+    """Split a stream of rooms into chunk files of cell x cell map units.
+
+    Rooms arriving row by row (as worldgen streams them) are flushed one
+    band of chunks at a time, so only a band is held in memory.
+    """
+    os.makedirs(directory, exist_ok=True)
+    band: Dict[Tuple[int, int], List] = {}
+    written = set()
+    where: Dict[str, Tuple[int, int]] = {}  # Rooms of the open band and the band before it
+    room_count = 0
+    puzzle_count = 0
+    signature = hashlib.blake2b(digest_size=8)
+    item_rooms: Dict[str, List[str]] = {}
+    required = set()
+    start_key = (0, 0)
+
+    def key_of(position):
+        return int(position[0] / cell + 1e-9), int(position[1] / cell + 1e-9)
+
+    def flush(keys):
+        for key in keys:
+            records = band.pop(key)
+            links = {}
+            for record in records:
+                for neighbor, _ in record["neighbors"]:
+                    other = where.get(neighbor)
+                    if other is None:
+                        # Not streamed yet, so in a row-by-row stream it is the room below
+                        other = key[0], key[1] + 1
+                    if other != key:
+                        links[neighbor] = list(other)
+            path = chunk_file(directory, key)
+            if key in written:
+                # Out-of-order stream: merge into what is already on disk
+                with open(path, encoding="utf-8") as f:
+                    old = json.load(f)
+                records = old["rooms"] + records
+                links.update(old["links"])
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({"rooms": records, "links": links}, f)
+            written.add(key)
+
+    current_row = None
+    for node in rooms:
+        record = room_record(node)
+        key = key_of(record["position"])
+        if current_row is not None and key[1] > current_row:
+            flush([k for k in band if k[1] < key[1]])
+            where = {name: k for name, k in where.items() if k[1] >= key[1] - 1}
+        current_row = key[1] if current_row is None else max(current_row, key[1])
+        band.setdefault(key, []).append(record)
+        where[record["name"]] = key
+        if record["name"] == start:
+            start_key = key
+        room_count += 1
+        puzzle_count += bool(record.get("puzzle") or record.get("puzzles"))
+        signature.update(room_signature(node.name, node))
+        for item in node.items:
+            item_rooms.setdefault(item, []).append(node.name)
+        required.update(node.required_items)
+    flush(list(band))
+
+    meta = {"rooms": room_count, "cell": cell, "start": start, "goal": goal, "start_chunk": list(start_key),
+            "levels": levels or {1: start}, "puzzles": puzzle_count, "signature": signature.hexdigest(),
+            "item_rooms": {item: item_rooms[item] for item in sorted(required) if item in item_rooms}}
+    with open(os.path.join(directory, WORLD_FILE), "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    return meta
+
+
+def generate_world(rooms: int, directory: str, node_cls, seed: int = 0, chunk_side: int = 32) -> Dict:
+    """Stream a worldgen labyrinth straight into chunk files"""
+    from worldgen import generate_rooms, generated_levels, goal_room
+
+    side = math.isqrt(rooms - 1) + 1
+    cell = chunk_side * 100 / max(1, side - 1)
+    return write_world(generate_rooms(rooms, node_cls, seed), directory, cell, "R0_0", goal_room(rooms),
+                       generated_levels(rooms))
+
+
+class Chunk:
+    def __init__(self, key: Tuple[int, int], nodes: Dict, links: Dict[str, Tuple[int, int]], snapshot: str):
+        self.key = key
+        self.nodes = nodes
+        self.links = links        # Room outside the chunk -> its chunk
+        self.snapshot = snapshot  # Room state as loaded, to skip writing back unchanged chunks
+
+
+class ChunkedLabyrinth:
+    """A labyrinth dict whose rooms live on disk and are loaded around the player.
+
+    focus(room) keeps the chunks within hops of the player's chunk resident,
+    loading missing ones on a background thread, and evicts chunks more
+    than hops + 1 away after writing back any room state that changed
+    (visited, puzzles solved, stuck counts, items taken). `in` is true for
+    any room whose chunk is known (resident, or linked from a resident
+    chunk), and looking such a room up loads its chunk on the spot; peek()
+    answers from resident rooms only.
+    Iteration only sees resident rooms, so the map never pulls in the far
+    side of the world; whole-world facts (levels, puzzle count, layout
+    signature, item rooms) come from the manifest instead.
+    """
+    def __init__(self, directory: str, node_cls, hops: int = 1):
+        self.directory = directory
+        self.node_cls = node_cls
+        self.hops = hops
+        with open(os.path.join(directory, WORLD_FILE), encoding="utf-8") as f:
+            meta = json.load(f)
+        self.room_count = meta["rooms"]
+        self.cell = meta["cell"]
+        self.start = meta["start"]
+        self.goal = meta["goal"]
+        self.levels = {int(level): room for level, room in meta.get("levels", {1: self.start}).items()}
+        self.puzzle_count = meta.get("puzzles", 0)
+        self.signature = bytes.fromhex(meta["signature"]) if "signature" in meta else None
+        self.item_rooms: Dict[str, List[str]] = meta.get("item_rooms", {})
+        self.chunks: Dict[Tuple[int, int], Chunk] = {}
+        self.nodes: Dict[str, object] = {}
+        self.pending = {}  # Chunk key -> future of a background load
+        self.lock = threading.Lock()  # Guards chunk files between the loader and write-backs
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="lumos-world")
+        self.loads = 0
+        self.stalls = 0  # Lookups that had to wait for a chunk
+        self.evictions = 0
+        self.writes = 0
+        self.cancelled = 0  # Background loads dropped because the player moved away first
+        self._install(self._read(tuple(meta["start_chunk"])))
+
+    def _read(self, key: Tuple[int, int]) -> Optional[Chunk]:
+        path = chunk_file(self.directory, key)
+        with self.lock:
+            if not os.path.exists(path):
+                return None
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        nodes = {record["name"]: room_from_record(self.node_cls, record) for record in data["rooms"]}
+        links = {room: tuple(other) for room, other in data["links"].items()}
+        return Chunk(key, nodes, links, self._state(nodes))
+
+    def _state(self, nodes: Dict) -> str:
+        return json.dumps([room_record(node) for node in nodes.values()])
+
+    def _install(self, chunk: Optional[Chunk]) -> None:
+        if chunk is None or chunk.key in self.chunks:
+            return
+        self.chunks[chunk.key] = chunk
+        self.nodes.update(chunk.nodes)
+        self.loads += 1
+
+    def key_of(self, room: str) -> Optional[Tuple[int, int]]:
+        node = self.nodes.get(room)
+        if node is not None:
+            return int(node.position[0] / self.cell + 1e-9), int(node.position[1] / self.cell + 1e-9)
+        for chunk in self.chunks.values():
+            if room in chunk.links:
+                return chunk.links[room]
+        return None
+
+    def poll(self) -> None:
+        """Install chunks the background thread has finished loading"""
+        for key in [key for key, future in self.pending.items() if future.done()]:
+            self._install(self.pending.pop(key).result())
+
+    def load(self, key: Tuple[int, int]) -> None:
+        """Make a chunk resident now, waiting for its background load if one is running"""
+        if key in self.chunks:
+            return
+        future = self.pending.pop(key, None)
+        self.stalls += 1
+        self._install(future.result() if future is not None else self._read(key))
+
+    def focus(self, room: str) -> None:
+        """The player is in room: prefetch the chunks around it, evict far ones"""
+        self.poll()
+        center = self.key_of(room)
+        if center is None:
+            return
+        self.load(center)
+        for dx in range(-self.hops, self.hops + 1):
+            for dy in range(-self.hops, self.hops + 1):
+                key = (center[0] + dx, center[1] + dy)
+                if key not in self.chunks and key not in self.pending and key[0] >= 0 and key[1] >= 0:
+                    self.pending[key] = self.executor.submit(self._read, key)
+        for key in list(self.chunks):
+            if max(abs(key[0] - center[0]), abs(key[1] - center[1])) > self.hops + 1:
+                self.evict(key)
+        for key in list(self.pending):
+            if max(abs(key[0] - center[0]), abs(key[1] - center[1])) > self.hops + 1:
+                # Out of range before it arrived; a read already running is simply dropped
+                self.pending.pop(key).cancel()
+                self.cancelled += 1
+
+    def evict(self, key: Tuple[int, int]) -> None:
+        chunk = self.chunks.pop(key)
+        for room in chunk.nodes:
+            del self.nodes[room]
+        self.evictions += 1
+        self.write_back(chunk)
+
+    def write_back(self, chunk: Chunk) -> None:
+        state = self._state(chunk.nodes)
+        if state == chunk.snapshot:
+            return
+        data = {"rooms": json.loads(state), "links": {room: list(other) for room, other in chunk.links.items()}}
+        with self.lock:
+            with open(chunk_file(self.directory, chunk.key), "w", encoding="utf-8") as f:
+                json.dump(data, f)
+        chunk.snapshot = state
+        self.writes += 1
+
+    def flush(self) -> None:
+        """Write back every resident chunk, e.g. before quitting"""
+        for chunk in self.chunks.values():
+            self.write_back(chunk)
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=True)
+        self.flush()
+
+    # The dict interface the game code uses; iteration covers resident rooms only
+    def __getitem__(self, room: str):
+        node = self.nodes.get(room)
+        if node is None:
+            key = self.key_of(room)
+            if key is None:
+                raise KeyError(room)
+            self.load(key)
+            node = self.nodes.get(room)
+            if node is None:
+                raise KeyError(room)
+        return node
+
+    def __contains__(self, room) -> bool:
+        return self.key_of(room) is not None
+
+    def __iter__(self):
+        return iter(list(self.nodes))
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def get(self, room: str, default=None):
+        try:
+            return self[room]
+        except KeyError:
+            return default
+
+    def peek(self, room: str):
+        """The room if it is resident, else None; never loads a chunk"""
+        return self.nodes.get(room)
+
+    def keys(self):
+        return list(self.nodes)
+
+    def values(self):
+        return list(self.nodes.values())
+
+    def items(self):
+        return list(self.nodes.items())
+
+
+def benchmark(sizes: List[int], steps: int = 400, seed: int = 0) -> None:
+    """Resident rooms and memory while walking across worlds of growing size"""
+    from engine import Node
+
+    print(f"{'rooms':>9} {'write s':>8} {'resident':>9} {'resident KB':>12} {'focus ms':>9} "
+          f"{'loads':>6} {'stalls':>7} {'dropped':>8} {'writes':>7}")
+    for rooms in sizes:
+        directory = os.path.join(os.path.dirname(os.path.abspath(__file__)), f"world_{rooms}")
+        started = time.perf_counter()
+        generate_world(rooms, directory, Node, seed)
+        write_seconds = time.perf_counter() - started
+
+        tracemalloc.start()
+        world = ChunkedLabyrinth(directory, Node)
+        rng = random.Random(seed)
+        room = world.start
+        world.focus(room)
+        focus_seconds = 0.0
+        resident = resident_bytes = 0
+        for _ in range(steps):
+            # Wander with a drift towards the far corner, marking rooms as the game does
+            neighbors = [neighbor for neighbor, _ in world[room].neighbors]
+            if rng.random() < 0.5:
+                room = rng.choice(neighbors)
+            else:
+                room = max(neighbors, key=lambda neighbor: sum(world[neighbor].position))
+            world[room].visited = True
+            started = time.perf_counter()
+            world.focus(room)
+            focus_seconds += time.perf_counter() - started
+            resident = max(resident, len(world))
+            resident_bytes = max(resident_bytes, tracemalloc.get_traced_memory()[0])
+        world.close()
+        tracemalloc.stop()
+        print(f"{rooms:>9} {write_seconds:>8.1f} {resident:>9} {resident_bytes // 1024:>12} "
+              f"{focus_seconds / steps * 1000:>9.2f} {world.loads:>6} {world.stalls:>7} {world.cancelled:>8} {world.writes:>7}")
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    # Benchmark: python world_stream.py [rooms ...]
+    benchmark([int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 1_000_000])
\ No newline at end of file
@@ -0,0 +1,201 @@
+import inspect
+import math
+import random
+import sys
+import time
+import tracemalloc
+from collections import deque
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Rooms are laid out row by row on a square grid and streamed in that order.
+# Row and column-0 corridors are always kept, so the route from R0_0 to any
+# room only passes rooms generated before it. Every door needs a key that
+# was placed in an earlier room, which by induction keeps the boss room
+# reachable however the other corridors and locks fall.
+KEY_WINDOW = 16  # Doors pick their key from the most recently placed ones
+DESCRIPTIONS = ["(A dusty chamber)", "(Glittering crystals)", "(Shifting shadows)",
+                "(A quiet library nook)", "(Dripping stone walls)", "(Ancient carvings)"]
+LOOSE_ITEMS = ["Health Potion", "Torch", "Shield", "Magic Elixir", "Old Map"]
+HAZARDS = ["Spikes", "Poison Gas", "Falling Rocks", "Dark Magic"]
+RIDDLES = [
+    ("What has keys but no locks, space but no room?", ["A Keyboard", "A Map", "A Phone", "A Book"], 0),
+    ("What comes next: Triangle, Square, Pentagon, ?", ["Circle", "Hexagon", "Octagon", "Triangle"], 1),
+    ("I grow without life, need air but no lungs, water kills me. What am I?", ["Tree", "Fire", "Shadow", "Echo"], 1),
+]
+GUARDIAN_KEY = "Guardian Key"
+
+
+def room_name(index: int, side: int) -> str:
+    return f"R{index % side}_{index // side}"
+
+
+def goal_room(rooms: int) -> str:
+    """The boss room: the last room generated"""
+    return room_name(rooms - 1, math.isqrt(rooms - 1) + 1)
+
+
+def generated_levels(rooms: int, levels: int = 5) -> Dict[int, str]:
+    """Level -> entry room, splitting the rows into bands"""
+    side = math.isqrt(rooms - 1) + 1
+    rows = (rooms + side - 1) // side
+    return {level + 1: room_name(level * rows // levels * side, side)
+            for level in range(min(levels, rows))}
+
+
+def make_node(node_cls, name: str, description: str, neighbors: List[Tuple[str, int]], items: List[str],
+              required_items: List[str], hazards: Dict[str, int], puzzle: Optional[Tuple], boss: Optional[Dict],
+              position: Tuple[float, float]):
+    """Build a room for either Node flavour: u.py (hazards, puzzles) or a.py/a1.py (puzzle dict, boss)"""
+    params = _node_params(node_cls)
+    kwargs = {"name": name, "description": description, "neighbors": neighbors, "items": items or None,
+              "required_items": required_items or None, "position": position}
+    if "hazards" in params:
+        kwargs["hazards"] = hazards or None
+    if puzzle and "puzzles" in params:
+        kwargs["puzzles"] = {f"Riddle of {name}": 10 * puzzle[3]}
+    if puzzle and "puzzle" in params:
+        question, options, correct, complexity = puzzle
+        kwargs["puzzle"] = {"type": "riddle", "question": question, "options": options, "correct_option": correct,
+                            "hint": "", "solved": False, "complexity": complexity}
+    if boss and "boss" in params:
+        kwargs["boss"] = boss
+    return node_cls(**kwargs)
+
+
+_PARAMS: Dict[type, frozenset] = {}
+
+
+def _node_params(node_cls) -> frozenset:
+    params = _PARAMS.get(node_cls)
+    if params is None:
+        params = _PARAMS[node_cls] = frozenset(inspect.signature(node_cls).parameters)
+    return params
+
+
+def generate_rooms(rooms: int, node_cls, seed: int = 0, loop_share: float = 0.5, locked_share: float = 0.05,
+                   key_share: float = 0.03, hazard_share: float = 0.1, item_share: float = 0.05,
+                   puzzle_share: float = 0.05) -> Iterator:
+    """Yield rooms one at a time, R0_0 first and the boss room last.
+
+    Only the corridor costs of the row above are held while streaming, so
+    extra memory is O(sqrt(rooms)) on top of whatever keeps the rooms.
+    """
+    if rooms < 2:
+        raise ValueError("A labyrinth needs at least a start and a boss room")
+    rng = random.Random(seed)
+    side = math.isqrt(rooms - 1) + 1
+    scale = 100 / max(1, side - 1)
+    down_costs: List[Optional[Tuple[int, int]]] = [None] * side  # Corridor to the room below: (there, back)
+    left_cost: Optional[Tuple[int, int]] = None
+    keys = deque(maxlen=KEY_WINDOW)
+    key_count = 0
+    for index in range(rooms):
+        x, y = index % side, index // side
+        neighbors = []
+        if x == 0:
+            left_cost = None
+        if left_cost:
+            neighbors.append((room_name(index - 1, side), left_cost[1]))
+        up_cost = down_costs[x] if y else None
+        if up_cost:
+            neighbors.append((room_name(index - side, side), up_cost[1]))
+
+        # Decide the corridors to rooms not generated yet
+        left_cost = None
+        if x + 1 < side and index + 1 < rooms:
+            left_cost = (rng.randint(1, 9), rng.randint(1, 9))
+            neighbors.append((room_name(index + 1, side), left_cost[0]))
+        down_costs[x] = None
+        if index + side < rooms and (x == 0 or rng.random() < loop_share):
+            down_costs[x] = (rng.randint(1, 9), rng.randint(1, 9))
+            neighbors.append((room_name(index + side, side), down_costs[x][0]))
+
+        last = index == rooms - 1
+        items = []
+        required_items = []
+        hazards = {}
+        puzzle = None
+        boss = None
+        if last:
+            required_items = [GUARDIAN_KEY]
+            boss = {"name": "Chronos Guardian", "health": 100,
+                    "attacks": ["Time Reversal", "Age Acceleration", "Temporal Freeze"],
+                    "weakness": GUARDIAN_KEY, "defeated": False}
+        else:
+            roll = rng.random()
+            if index and roll < locked_share and keys:
+                required_items = [rng.choice(keys)]
+            elif index and roll < locked_share + hazard_share:
+                hazards = {rng.choice(HAZARDS): rng.randint(2, 10)}
+            if index == rooms - 2:
+                items.append(GUARDIAN_KEY)
+            elif rng.random() < key_share:
+                key_count += 1
+                key = f"Key {key_count}"
+                keys.append(key)
+                items.append(key)
+            if rng.random() < item_share:
+                items.append(rng.choice(LOOSE_ITEMS))
+            if rng.random() < puzzle_share:
+                question, options, correct = rng.choice(RIDDLES)
+                puzzle = (question, options, correct, rng.randint(1, 5))
+        yield make_node(node_cls, room_name(index, side), rng.choice(DESCRIPTIONS), neighbors, items,
+                        required_items, hazards, puzzle, boss, (x * scale, y * scale))
+
+
+def generate_labyrinth(rooms: int, node_cls, seed: int = 0, **shares) -> Dict:
+    """generate_rooms collected into the usual name -> Node dict"""
+    return {node.name: node for node in generate_rooms(rooms, node_cls, seed, **shares)}
+
+
+def solvable(labyrinth, start: str, goal: str, inventory=()) -> bool:
+    """Whether goal can be entered, collecting items on the way and only entering open rooms"""
+    held = set(inventory)
+    waiting: Dict[str, set] = {}  # Missing item -> rooms seen behind a door needing it
+    seen = {start}
+    queue = [start]
+
+    def visit(room):
+        if room in seen:
+            return
+        missing = next((item for item in labyrinth[room].required_items if item not in held), None)
+        if missing is not None:
+            waiting.setdefault(missing, set()).add(room)  # Rechecked once the item turns up
+        else:
+            seen.add(room)
+            queue.append(room)
+
+    for room in queue:
+        if room == goal:
+            return True
+        for item in labyrinth[room].items:
+            if item not in held:
+                held.add(item)
+                for parked in waiting.pop(item, ()):
+                    visit(parked)
+        for neighbor, _ in labyrinth[room].neighbors:
+            visit(neighbor)
+    return False
+
+
+def benchmark(sizes: List[int], seed: int = 0) -> None:
+    """Generation time and memory per room, plus a solvability check"""
+    from explorer import Node
+
+    print(f"{'rooms':>9} {'seconds':>8} {'us/room':>8} {'bytes/room':>11} {'peak/room':>10}  solvable")
+    for rooms in sizes:
+        tracemalloc.start()
+        started = time.perf_counter()
+        labyrinth = generate_labyrinth(rooms, Node, seed)
+        seconds = time.perf_counter() - started
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        ok = solvable(labyrinth, room_name(0, 1), goal_room(rooms))
+        print(f"{rooms:>9} {seconds:>8.2f} {seconds / rooms * 1e6:>8.1f} {current / rooms:>11.0f} "
+              f"{peak / rooms:>10.0f}  {ok}")
+        del labyrinth
+
+
+if __name__ == "__main__":
+    # Benchmark: python worldgen.py [rooms ...]
+    benchmark([int(arg) for arg in sys.argv[1:]] or [10, 1_000, 100_000, 1_000_000])
\ No newline at end of file